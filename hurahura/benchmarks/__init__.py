@@ -0,0 +1,3 @@
+"""Benchmarks for hurahura: synthetic DICOM cohorts (synthetic_dicom) and timing of load / meta /
+anonymise / listing at cohort scale (run_benchmarks).
+"""
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmarks of hurahura operations on synthetic cohorts
+
+    python -m hurahura.benchmarks.run_benchmarks -scale 10 1000 10000 -o results.json
+
+For each scale (number of subjects) a synthetic cohort (see synthetic_dicom) is written once to the work
+directory (and reused by later runs with the same parameters), loaded to a new dataRoot and timed:
+    load                 - createNew_OrAddTo_Subject (LOAD_MULTI) of the whole cohort
+    buildDicomMeta       - full meta build of every subject
+    anonymise            - anonymise (SOFT) of every subject (or the first -anonN subjects)
+    setByDirectory       - SubjectList.setByDirectory of the dataRoot and building every subject
+    writeSummaryCSV      - summary CSV of every subject
+Results, with the parameters, platform and hurahura version, are written to a JSON file so that
+releases can be compared.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import datetime
+from importlib import metadata
+
+from hurahura import mi_utils
+from hurahura import mi_subject
+from hurahura.benchmarks import synthetic_dicom
+
+
+DEFAULT_SCALES = [10, 1000, 10000]
+SUBJECT_PREFIX = "BM"
+BENCHMARKS = ["load", "buildDicomMeta", "anonymise", "setByDirectory", "writeSummaryCSV"]
+
+
+def _getVersion():
+    try:
+        return metadata.version("hurahura")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def _timeIt(func, *args, **kwargs):
+    t0 = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - t0
+
+
+def getSyntheticCohort(workDir, nSubjects, nSeries, nInstances, matrixSize, seed=0):
+    """Get directory of synthetic cohort - written if not already in workDir
+
+    Returns:
+        tuple: cohort directory, seconds taken to write (0 if reused)
+    """
+    cohortDir = os.path.join(workDir, f"COHORT_{nSubjects}x{nSeries}x{nInstances}x{matrixSize}_{seed}")
+    completeFile = cohortDir + ".complete"
+    if os.path.isfile(completeFile):
+        return cohortDir, 0.0
+    if os.path.isdir(cohortDir):
+        shutil.rmtree(cohortDir)
+    tGen = _timeIt(synthetic_dicom.buildSyntheticCohort, cohortDir, nSubjects, nSeries, nInstances, matrixSize, seed=seed)
+    with open(completeFile, "w") as fid:
+        fid.write(datetime.datetime.now().isoformat())
+    return cohortDir, tGen
+
+
+def runBenchmark(nSubjects, workDir, nSeries=3, nInstances=10, matrixSize=64, workers=1, anonN=None, seed=0, QUIET=False):
+    """Time BENCHMARKS on a synthetic cohort of nSubjects
+
+    Args:
+        nSubjects (int): number of subjects (one study each)
+        workDir (str): directory for synthetic cohort and dataRoot
+        nSeries (int, optional): series per study. Defaults to 3.
+        nInstances (int, optional): images per series. Defaults to 10.
+        matrixSize (int, optional): image rows and columns. Defaults to 64.
+        workers (int, optional): load processes (createNew_OrAddTo_Subject workers). Defaults to 1.
+        anonN (int, optional): number of subjects to anonymise. Defaults to None - all.
+        seed (int, optional): seed for synthetic cohort. Defaults to 0.
+        QUIET (bool, optional): Set True to suppress progress output. Defaults to False.
+
+    Returns:
+        dict: parameters, timings (seconds), per subject timings (ms) and load stage times
+    """
+    cohortDir, tGenerate = getSyntheticCohort(workDir, nSubjects, nSeries, nInstances, matrixSize, seed=seed)
+    nFiles, nBytes = mi_utils.countFilesAndBytes(cohortDir)
+    dataRoot = os.path.join(workDir, f"DATAROOT_{nSubjects}")
+    if os.path.isdir(dataRoot):
+        shutil.rmtree(dataRoot)
+    os.makedirs(dataRoot)
+    timings, nTimed = {}, {}
+    def _log(name):
+        if not QUIET:
+            print(f"  {nSubjects} subjects: {name} {timings[name]:0.2f} s")
+    #
+    mi_utils.getLoadStageTimes(RESET=True)
+    timings["load"] = _timeIt(mi_subject.createNew_OrAddTo_Subject, cohortDir, dataRoot=dataRoot,
+                              SubjClass=mi_subject.AbstractSubject, subjPrefix=SUBJECT_PREFIX,
+                              LOAD_MULTI=True, QUIET=True, workers=workers)
+    stageTimes = mi_utils.getLoadStageTimes(RESET=True) if workers == 1 else None # Not seen from worker processes
+    nTimed["load"] = nSubjects
+    _log("load")
+    #
+    subjList = mi_subject.SubjectList.setByDirectory(dataRoot, SUBJECT_PREFIX, SubjClass=mi_subject.AbstractSubject)
+    timings["buildDicomMeta"] = _timeIt(lambda: [iSubj.buildDicomMeta() for iSubj in subjList])
+    nTimed["buildDicomMeta"] = len(subjList)
+    _log("buildDicomMeta")
+    #
+    anonSubjs = subjList if anonN is None else subjList[:anonN]
+    timings["anonymise"] = _timeIt(lambda: [iSubj.anonymise("SOFT", QUIET=True) for iSubj in anonSubjs])
+    nTimed["anonymise"] = len(anonSubjs)
+    _log("anonymise")
+    #
+    mi_subject.clearDataRootScan(dataRoot)
+    timings["setByDirectory"] = _timeIt(lambda: list(mi_subject.SubjectList.setByDirectory(dataRoot, SUBJECT_PREFIX,
+                                                                SubjClass=mi_subject.AbstractSubject)))
+    nTimed["setByDirectory"] = len(subjList)
+    _log("setByDirectory")
+    #
+    subjList = mi_subject.SubjectList.setByDirectory(dataRoot, SUBJECT_PREFIX, SubjClass=mi_subject.AbstractSubject)
+    timings["writeSummaryCSV"] = _timeIt(subjList.writeSummaryCSV, os.path.join(workDir, f"summary_{nSubjects}.csv"))
+    nTimed["writeSummaryCSV"] = len(subjList)
+    _log("writeSummaryCSV")
+    #
+    return {"nSubjects": nSubjects,
+            "nSeries": nSeries,
+            "nInstances": nInstances,
+            "matrixSize": matrixSize,
+            "workers": workers,
+            "files": nFiles,
+            "bytes": nBytes,
+            "generate_s": tGenerate,
+            "timings_s": timings,
+            "per_subject_ms": {k: 1000.0 * v / max(nTimed[k], 1) for k, v in timings.items()},
+            "load_stage_s": stageTimes}
+
+
+def runBenchmarks(scales, workDir, outputFile=None, nSeries=3, nInstances=10, matrixSize=64, workers=1, anonN=None,
+                  seed=0, KEEP=False, QUIET=False):
+    """Run benchmarks at each scale and write JSON results
+
+    Args:
+        scales (list): numbers of subjects
+        workDir (str): directory for synthetic cohorts and dataRoots
+        outputFile (str, optional): JSON results file. Defaults to None - workDir/benchmark_{version}_{time}.json
+        KEEP (bool, optional): Keep dataRoots (synthetic cohorts are always kept for reuse). Defaults to False.
+        (others as runBenchmark)
+
+    Returns:
+        dict: results (as written to outputFile)
+    """
+    os.makedirs(workDir, exist_ok=True)
+    version = _getVersion()
+    results = {"hurahura_version": version,
+               "python": sys.version.split()[0],
+               "platform": platform.platform(),
+               "cpu_count": os.cpu_count(),
+               "time": datetime.datetime.now().isoformat(timespec="seconds"),
+               "benchmarks": BENCHMARKS,
+               "results": []}
+    for nSubjects in scales:
+        if not QUIET:
+            print(f"Benchmark: {nSubjects} subjects x {nSeries} series x {nInstances} instances ({matrixSize}x{matrixSize})")
+        results["results"].append(runBenchmark(nSubjects, workDir, nSeries=nSeries, nInstances=nInstances,
+                                               matrixSize=matrixSize, workers=workers, anonN=anonN, seed=seed, QUIET=QUIET))
+        if not KEEP:
+            shutil.rmtree(os.path.join(workDir, f"DATAROOT_{nSubjects}"))
+    if outputFile is None:
+        outputFile = os.path.join(workDir, f"benchmark_{version}_{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(outputFile, "w") as fid:
+        json.dump(results, fid, indent=2)
+    if not QUIET:
+        print(f"Written benchmark results to {outputFile}")
+    return results
+
+
+### ====================================================================================================================
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark hurahura on synthetic DICOM cohorts")
+    ap.add_argument("-scale", dest="scales", help=f"Number(s) of subjects [default {DEFAULT_SCALES}]",
+                    nargs="*", type=int, default=DEFAULT_SCALES)
+    ap.add_argument("-nSeries", dest="nSeries", help="Series per study [default 3]", type=int, default=3)
+    ap.add_argument("-nInstances", dest="nInstances", help="Instances per series [default 10]", type=int, default=10)
+    ap.add_argument("-matrix", dest="matrixSize", help="Image matrix size [default 64]", type=int, default=64)
+    ap.add_argument("-j", dest="workers", help="Load processes [default 1]", type=int, default=1)
+    ap.add_argument("-anonN", dest="anonN", help="Number of subjects to anonymise [default all]", type=int, default=None)
+    ap.add_argument("-seed", dest="seed", help="Seed for synthetic cohort [default 0]", type=int, default=0)
+    ap.add_argument("-workDir", dest="workDir", help="Work directory [default ./hurahura_benchmark]",
+                    type=str, default=os.path.abspath("hurahura_benchmark"))
+    ap.add_argument("-o", dest="outputFile", help="JSON results file [default in workDir]", type=str, default=None)
+    ap.add_argument("-KEEP", dest="KEEP", help="Keep loaded dataRoots", action="store_true")
+    ap.add_argument("-QUIET", dest="QUIET", help="Suppress progress output", action="store_true")
+    args = ap.parse_args()
+    runBenchmarks(args.scales, args.workDir, outputFile=args.outputFile, nSeries=args.nSeries, nInstances=args.nInstances,
+                  matrixSize=args.matrixSize, workers=args.workers, anonN=args.anonN, seed=args.seed,
+                  KEEP=args.KEEP, QUIET=args.QUIET)
+
+
+if __name__ == "__main__":
+    main()
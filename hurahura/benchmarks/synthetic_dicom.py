@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+"""Synthetic DICOM cohorts for benchmarking
+
+Builds a cohort of MR studies with pydicom: one directory per subject (one study each), holding
+nSeries series of nInstances images of matrixSize x matrixSize (uint16). UIDs, names and dates are
+derived from the subject / series / instance index (and seed) so a cohort is reproducible.
+Written as: outputDir/SYN{subject}/SE{series}/IM{instance}.dcm
+"""
+
+import os
+import datetime
+import numpy as np
+from pydicom.dataset import Dataset, FileMetaDataset
+from pydicom.uid import generate_uid, ExplicitVRLittleEndian, MRImageStorage
+
+
+SERIES_DESCRIPTIONS = ["T1_SAG", "T2_AX", "FLAIR_COR", "DWI_AX", "CINE_SA", "PC_FLOW"]
+BASE_STUDY_DATE = datetime.date(2020, 1, 1)
+
+
+def _uid(seed, *indexes):
+    # Reproducible UID from seed and indexes
+    return generate_uid(entropy_srcs=[str(seed)] + [str(i) for i in indexes])
+
+
+def buildSyntheticSeries(subjIndex, seriesIndex, nInstances, matrixSize, seed=0):
+    """Build (in memory) the datasets of a synthetic series
+
+    Args:
+        subjIndex (int): subject index (sets patient / study tags)
+        seriesIndex (int): series index (SeriesNumber = seriesIndex+1)
+        nInstances (int): number of images
+        matrixSize (int): rows and columns of each image
+        seed (int, optional): seed for UIDs and pixel data. Defaults to 0.
+
+    Returns:
+        list: pydicom datasets (ordered by InstanceNumber)
+    """
+    rng = np.random.default_rng([seed, subjIndex, seriesIndex])
+    pixels = rng.integers(0, 4096, size=(matrixSize, matrixSize), dtype=np.uint16)
+    studyDate = BASE_STUDY_DATE + datetime.timedelta(days=subjIndex)
+    birthDate = studyDate - datetime.timedelta(days=365 * (20 + (subjIndex % 60)) + subjIndex % 365)
+    seriesUID = _uid(seed, subjIndex, seriesIndex)
+    dsList = []
+    for k in range(nInstances):
+        sopUID = _uid(seed, subjIndex, seriesIndex, k)
+        fileMeta = FileMetaDataset()
+        fileMeta.MediaStorageSOPClassUID = MRImageStorage
+        fileMeta.MediaStorageSOPInstanceUID = sopUID
+        fileMeta.TransferSyntaxUID = ExplicitVRLittleEndian
+        ds = Dataset()
+        ds.file_meta = fileMeta
+        ds.SOPClassUID = MRImageStorage
+        ds.SOPInstanceUID = sopUID
+        ds.PatientName = f"SYN{subjIndex:06d}^Synthetic"
+        ds.PatientID = f"SYNID{subjIndex:06d}"
+        ds.PatientBirthDate = birthDate.strftime("%Y%m%d")
+        ds.PatientSex = "MF"[subjIndex % 2]
+        ds.PatientWeight = 50 + (subjIndex % 50)
+        ds.StudyInstanceUID = _uid(seed, subjIndex)
+        ds.StudyDate = studyDate.strftime("%Y%m%d")
+        ds.StudyTime = "120000"
+        ds.StudyID = str(subjIndex + 1)
+        ds.StudyDescription = "SYNTHETIC"
+        ds.AccessionNumber = f"ACC{subjIndex:06d}"
+        ds.Modality = "MR"
+        ds.Manufacturer = "HURAHURA"
+        ds.MagneticFieldStrength = 3
+        ds.SeriesInstanceUID = seriesUID
+        ds.SeriesNumber = seriesIndex + 1
+        ds.SeriesDescription = SERIES_DESCRIPTIONS[seriesIndex % len(SERIES_DESCRIPTIONS)]
+        ds.InstanceNumber = k + 1
+        ds.ImagePositionPatient = [0.0, 0.0, float(k)]
+        ds.ImageOrientationPatient = [1.0, 0.0, 0.0, 0.0, 1.0, 0.0]
+        ds.PixelSpacing = [1.0, 1.0]
+        ds.SliceThickness = 1.0
+        ds.SpacingBetweenSlices = 1.0
+        ds.RepetitionTime = 5.0
+        ds.EchoTime = 2.0
+        ds.FlipAngle = 15
+        ds.SamplesPerPixel = 1
+        ds.PhotometricInterpretation = "MONOCHROME2"
+        ds.Rows = matrixSize
+        ds.Columns = matrixSize
+        ds.BitsAllocated = 16
+        ds.BitsStored = 12
+        ds.HighBit = 11
+        ds.PixelRepresentation = 0
+        ds.PixelData = pixels.tobytes()
+        dsList.append(ds)
+    return dsList
+
+
+def writeSyntheticStudy(outputDir, subjIndex, nSeries=3, nInstances=10, matrixSize=64, seed=0):
+    """Write a synthetic study (one subject) to outputDir/SYN{subjIndex}
+
+    Returns:
+        str: study directory written
+    """
+    studyDir = os.path.join(outputDir, f"SYN{subjIndex:06d}")
+    for iSeries in range(nSeries):
+        seriesDir = os.path.join(studyDir, f"SE{iSeries+1:03d}")
+        os.makedirs(seriesDir, exist_ok=True)
+        for ds in buildSyntheticSeries(subjIndex, iSeries, nInstances, matrixSize, seed=seed):
+            ds.save_as(os.path.join(seriesDir, f"IM{int(ds.InstanceNumber):05d}.dcm"), enforce_file_format=True)
+    return studyDir
+
+
+def buildSyntheticCohort(outputDir, nSubjects, nSeries=3, nInstances=10, matrixSize=64, seed=0):
+    """Write a synthetic cohort: nSubjects x nSeries x nInstances images of matrixSize x matrixSize
+
+    Args:
+        outputDir (str): directory to write to (one subdirectory per subject)
+        nSubjects (int): number of subjects (one study each)
+        nSeries (int, optional): series per study. Defaults to 3.
+        nInstances (int, optional): images per series. Defaults to 10.
+        matrixSize (int, optional): image rows and columns. Defaults to 64.
+        seed (int, optional): seed for UIDs and pixel data. Defaults to 0.
+
+    Returns:
+        list: study directories written
+    """
+    os.makedirs(outputDir, exist_ok=True)
+    return [writeSyntheticStudy(outputDir, k, nSeries, nInstances, matrixSize, seed=seed) for k in range(nSubjects)]
@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+
+"""Batch loading from a manifest
+
+A manifest is a CSV file with one source to load per row and columns:
+    source      - directory or archive (zip, tar, tar.gz) to load. Relative paths are relative to the manifest.
+    subjNumber  - (optional) subject number to create or add to. Empty - assigned as createNew_OrAddTo_Subject.
+    anonName    - (optional) anonName for this source. Empty - anonName given to loadBatch (or config anon_level).
+Sources are loaded by a pool of worker processes - the interpreter and configuration are set up once per worker,
+not per source. A BatchReport of throughput (studies/s, files/s, MB/s) and time per load stage is returned.
+"""
+
+import os
+import csv
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from hurahura import mi_utils
+from hurahura import mi_subject
+from hurahura.mi_subject import spydcm
+
+
+MANIFEST_COLUMNS = ["source", "subjNumber", "anonName"]
+ARCHIVE_EXTNS = (".zip", ".tar", ".tar.gz")
+ARCHIVES_JOB = "ARCHIVES" # Archives without a subject number: study (and so subject) only known once read - loaded in turn
+
+
+def readManifest(manifestFile):
+    """Read batch manifest CSV (see module doc)
+
+    Args:
+        manifestFile (str): path to manifest CSV file
+
+    Raises:
+        ValueError: if no 'source' column or an invalid subjNumber
+
+    Returns:
+        list: dict (source, subjNumber, anonName) per row, in file order
+    """
+    manifestDir = os.path.dirname(os.path.abspath(manifestFile))
+    items = []
+    with open(manifestFile, "r", newline="") as fid:
+        reader = csv.DictReader(fid)
+        if (reader.fieldnames is None) or ("source" not in [i.strip() for i in reader.fieldnames]):
+            raise ValueError(f"Manifest {manifestFile} must have a 'source' column (columns: {MANIFEST_COLUMNS})")
+        for row in reader:
+            row = {str(k).strip(): (v.strip() if isinstance(v, str) else "") for k, v in row.items() if k is not None}
+            source = row.get("source", "")
+            if len(source) == 0:
+                continue
+            subjNumber = row.get("subjNumber", "")
+            try:
+                subjNumber = int(subjNumber) if len(subjNumber) > 0 else None
+            except ValueError:
+                raise ValueError(f"Manifest {manifestFile}: subjNumber must be an integer (got '{subjNumber}' for {source})")
+            anonName = row.get("anonName", "")
+            items.append({"source": os.path.join(manifestDir, os.path.expanduser(source)),
+                          "subjNumber": subjNumber,
+                          "anonName": anonName if len(anonName) > 0 else None})
+    return items
+
+
+class BatchReport(object):
+    """Results and throughput of a batch load
+
+    Attributes:
+        results (list): per manifest row (in order): list of subject numbers loaded to, or error message (str)
+        sources (list): source per manifest row
+        nFiles (int): number of files in sources (an archive counts as one file)
+        nBytes (int): size of sources in bytes
+        stageTimes (dict): seconds in each load stage (mi_utils.LOAD_STAGES) - summed over workers
+        elapsed (float): wall time (seconds) of the batch
+    """
+    def __init__(self, sources, results, nFiles, nBytes, stageTimes, elapsed, workers=1) -> None:
+        self.sources = sources
+        self.results = results
+        self.nFiles = nFiles
+        self.nBytes = nBytes
+        self.stageTimes = stageTimes
+        self.elapsed = elapsed
+        self.workers = workers
+
+    @property
+    def errors(self):
+        return [(iSource, iResult) for iSource, iResult in zip(self.sources, self.results) if isinstance(iResult, str)]
+
+    @property
+    def subjNs(self):
+        return sorted(set([n for iResult in self.results if not isinstance(iResult, str) for n in iResult]))
+
+    @property
+    def nStudies(self):
+        # One study per subject (see createNew_OrAddTo_Subject)
+        return len(self.subjNs)
+
+    def _rate(self, N):
+        return N / self.elapsed if self.elapsed > 0 else 0.0
+
+    def getSummaryDict(self):
+        return {"sources": len(self.sources),
+                "loaded": len(self.sources) - len(self.errors),
+                "failed": len(self.errors),
+                "studies": self.nStudies,
+                "files": self.nFiles,
+                "bytes": self.nBytes,
+                "workers": self.workers,
+                "elapsed_s": self.elapsed,
+                "studies_per_s": self._rate(self.nStudies),
+                "files_per_s": self._rate(self.nFiles),
+                "MB_per_s": self._rate(self.nBytes / 1e6),
+                "stage_s": dict(self.stageTimes)}
+
+    def __str__(self):
+        summary = self.getSummaryDict()
+        lines = [f"Batch load: {summary['sources']} sources ({summary['loaded']} loaded, {summary['failed']} failed) "
+                    f"to {summary['studies']} subjects in {self.elapsed:0.1f} s ({self.workers} workers)",
+                 f"  Throughput: {summary['studies_per_s']:0.3f} studies/s, {summary['files_per_s']:0.1f} files/s, "
+                    f"{summary['MB_per_s']:0.2f} MB/s",
+                 "  Stage time (s, summed over workers): " + ", ".join([f"{k} {v:0.2f}" for k, v in self.stageTimes.items()])]
+        for iSource, iError in self.errors:
+            lines.append(f"  ERROR loading {iSource}: {iError}")
+        return "\n".join(lines)
+
+
+def _isArchive(source):
+    return os.path.isfile(source) and source.endswith(ARCHIVE_EXTNS)
+
+
+def _reserveSubjN(dataRoot, subjPrefix, excludeNs):
+    # Reserve next subject number (mi_subject.reserveSubjN) that is not one of excludeNs (given in manifest)
+    skippedNs = []
+    subjN = mi_subject.reserveSubjN(dataRoot, subjPrefix)
+    while subjN in excludeNs:
+        skippedNs.append(subjN)
+        subjN = mi_subject.reserveSubjN(dataRoot, subjPrefix)
+    for iN in skippedNs:
+        os.rmdir(os.path.join(dataRoot, mi_subject.buildSubjectID(iN, subjPrefix)))
+    mi_subject.clearDataRootScan(dataRoot)
+    return subjN
+
+
+def _assignJobs(items, dataRoot, SubjClass, subjPrefix):
+    """Group manifest rows into jobs keyed by subject number, so no subject is loaded by two workers at once.
+    Directories without a subject number go to the subject holding their study (existing, else reserved by reserveSubjN).
+    Archives without a subject number are loaded in turn by a single job (ARCHIVES_JOB).
+
+    Returns:
+        tuple: jobs (key: list of row indexes), reserved subject numbers, results for rows that can not be loaded
+    """
+    jobs, reservedNs, studyUIDToSubjN, results = {}, [], {}, {}
+    manifestNs = set([i["subjNumber"] for i in items if i["subjNumber"] is not None])
+    for k, item in enumerate(items):
+        source = item["source"]
+        if not os.path.exists(source):
+            results[k] = "IOError: source does not exist"
+            continue
+        if item["subjNumber"] is not None:
+            key = item["subjNumber"]
+        elif _isArchive(source):
+            key = ARCHIVES_JOB
+        elif not os.path.isdir(source):
+            results[k] = f"IOError: source is not a directory or archive ({ARCHIVE_EXTNS})"
+            continue
+        else:
+            ds = spydcm.returnFirstDicomFound(source)
+            if ds is None:
+                results[k] = "IOError: can not find valid dicoms"
+                continue
+            studyUID = ds.get("StudyInstanceUID", None)
+            if (studyUID is not None) and (studyUID in studyUIDToSubjN):
+                key = studyUIDToSubjN[studyUID]
+            else:
+                existingSubj = mi_subject.findSubjMatchingDicomStudyUID(source, dataRoot, subjPrefix, SubjClass)
+                if existingSubj is not None:
+                    key = existingSubj.subjN
+                else:
+                    key = _reserveSubjN(dataRoot, subjPrefix, manifestNs)
+                    reservedNs.append(key)
+                if studyUID is not None:
+                    studyUIDToSubjN[studyUID] = key
+        jobs.setdefault(key, []).append(k)
+    return jobs, reservedNs, results
+
+
+def _runBatchJob(jobItems, reservedSubjN, dataRoot, SubjClass, subjPrefix, anonName, transferMode, QUIET):
+    """Worker: load manifest rows of one job in turn
+
+    Args:
+        jobItems (list): manifest row dicts
+        reservedSubjN (int): subject number reserved for this job (rows without subjNumber), or None
+
+    Returns:
+        tuple: per row (list of subject numbers loaded to, or error message), files, bytes, stage times of this job
+    """
+    stageTimes0 = mi_utils.getLoadStageTimes()
+    results, nFiles, nBytes = [], 0, 0
+    for item in jobItems:
+        iAnonName = item["anonName"] if item["anonName"] is not None else anonName
+        try:
+            iFiles, iBytes = mi_utils.countFilesAndBytes(item["source"])
+            if (reservedSubjN is not None) and (item["subjNumber"] is None):
+                iSubj = SubjClass(reservedSubjN, dataRoot, subjectPrefix=subjPrefix)
+                iSubj.QUIET = QUIET
+                iSubj.loadDicomsToSubject(item["source"], anonName=iAnonName, HIDE_PROGRESSBAR=True, transferMode=transferMode)
+                newSubjs = [iSubj]
+            else:
+                newSubjs = mi_subject._createNew_OrAddTo_Subject(item["source"], dataRoot=dataRoot, SubjClass=SubjClass,
+                                                                 subjNumber=item["subjNumber"], subjPrefix=subjPrefix,
+                                                                 anonName=iAnonName, QUIET=QUIET, transferMode=transferMode)
+                if not isinstance(newSubjs, list):
+                    newSubjs = [newSubjs]
+            results.append([i.subjN for i in newSubjs])
+            nFiles += iFiles
+            nBytes += iBytes
+        except Exception as e:
+            results.append(f"{type(e).__name__}: {e}")
+    stageTimes1 = mi_utils.getLoadStageTimes()
+    return results, nFiles, nBytes, {i: stageTimes1[i] - stageTimes0[i] for i in mi_utils.LOAD_STAGES}
+
+
+def loadBatch(manifest, dataRoot, SubjClass=None, subjPrefix=None, anonName=None, workers=1, transferMode=None, QUIET=False):
+    """Load all sources of a manifest (see module doc) to subjects in dataRoot
+
+    Args:
+        manifest (str or list): path to manifest CSV, or list of row dicts (as readManifest)
+        dataRoot (str): the root directory where subjects are stored
+        SubjClass (subclass of AbstractSubject, optional): Defaults to None - configured subject class.
+        subjPrefix (str, optional): the subject prefix. Defaults to None - guess from dataRoot.
+        anonName (str, optional): anonName for rows without one. Defaults to None.
+        workers (int, optional): Number of processes loading in parallel. Defaults to 1 (load in this process).
+        transferMode (str, optional): copy, move, hardlink or reflink (see AbstractSubject.loadDicomsToSubject).
+                                    Defaults to None - config transfer_mode.
+        QUIET (bool, optional): If true will supress output. Defaults to False.
+
+    Returns:
+        BatchReport: results per manifest row and throughput
+    """
+    t0 = time.perf_counter()
+    if SubjClass is None:
+        SubjClass = mi_subject.get_configured_subject_class()
+    if not os.path.isdir(dataRoot):
+        raise IOError(f"Destination does not exist: {dataRoot}")
+    items = readManifest(manifest) if isinstance(manifest, (str, os.PathLike)) else list(manifest)
+    if subjPrefix is None:
+        subjPrefix = mi_subject.guessSubjectPrefix(dataRoot)
+    jobs, reservedNs, results = _assignJobs(items, dataRoot, SubjClass, subjPrefix)
+    jobArgs = {key: ([items[k] for k in iRows], key if key in reservedNs else None) for key, iRows in jobs.items()}
+    jobResults = {}
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {key: executor.submit(_runBatchJob, iItems, iSubjN, dataRoot,
+                                            SubjClass, subjPrefix, anonName, transferMode, QUIET)
+                       for key, (iItems, iSubjN) in jobArgs.items()}
+            for key, iFuture in futures.items():
+                try:
+                    jobResults[key] = iFuture.result()
+                except Exception as e: # worker process failed
+                    jobResults[key] = ([f"{type(e).__name__}: {e}"] * len(jobs[key]), 0, 0, {})
+    else:
+        for key, (iItems, iSubjN) in jobArgs.items():
+            jobResults[key] = _runBatchJob(iItems, iSubjN, dataRoot,
+                                           SubjClass, subjPrefix, anonName, transferMode, QUIET)
+    mi_subject.clearDataRootScan(dataRoot)
+    for subjN in reservedNs: # Release numbers not used (directory still empty)
+        try:
+            os.rmdir(os.path.join(dataRoot, mi_subject.buildSubjectID(subjN, subjPrefix)))
+        except OSError:
+            pass
+    #
+    nFiles, nBytes, stageTimes = 0, 0, {i: 0.0 for i in mi_utils.LOAD_STAGES}
+    for key, (iResults, iFiles, iBytes, iStageTimes) in jobResults.items():
+        results.update(zip(jobs[key], iResults))
+        nFiles += iFiles
+        nBytes += iBytes
+        for iStage, iTime in iStageTimes.items():
+            stageTimes[iStage] += iTime
+    report = BatchReport([i["source"] for i in items], [results[k] for k in range(len(items))],
+                         nFiles, nBytes, stageTimes, time.perf_counter() - t0, workers=workers)
+    if not QUIET:
+        for iSource, iResult in zip(report.sources, report.results):
+            if not isinstance(iResult, str):
+                print(f"Loaded {iSource} to {[mi_subject.buildSubjectID(n, subjPrefix) for n in iResult]}")
+    return report
@@ -0,0 +1,452 @@
+# -*- coding: utf-8 -*-
+
+"""Persistent subject catalog for a dataRoot
+
+A small SQLite database (dataRoot/.hurahura/catalog.sqlite) holding one row per subject directory.
+Rows are built from META/{subjID}Tags.json and are refreshed incrementally: a Tags file is only
+parsed again if its modification time (or size) has changed since it was last catalogued.
+Cohort wide meta data frames (study or series level) are cached alongside and rebuilt per subject.
+"""
+
+import os
+import json
+import sqlite3
+from contextlib import contextmanager
+import pandas as pd
+
+from hurahura import mi_utils
+
+
+CATALOG_DIR = ".hurahura"
+CATALOG_FILE = "catalog.sqlite"
+CATALOG_VERSION = 1
+# Study level tags held in their own (indexed) columns for fast lookup
+INDEXED_TAGS = ["PatientID", "PatientName", "StudyID", "StudyInstanceUID", "StudyDate", "NAME"]
+# Errors meaning the catalog can not be used (callers should fall back to reading subjects directly)
+CATALOG_ERRORS = (sqlite3.Error, OSError)
+# Cohort data frames (see SubjectCatalog.getDataFrame) - Parquet if available, else pickle
+FRAME_LEVELS = ["study", "series"]
+FRAME_MTIME_COL = "_tagsMtime"
+
+_CATALOGS = {}
+
+
+def getCatalog(dataRoot):
+    """Get the (cached) SubjectCatalog for a dataRoot
+
+    Args:
+        dataRoot (str): path to root directory of subject filesystem database
+
+    Returns:
+        SubjectCatalog: catalog object for this dataRoot
+    """
+    dataRoot = os.path.abspath(dataRoot)
+    if dataRoot not in _CATALOGS:
+        _CATALOGS[dataRoot] = SubjectCatalog(dataRoot)
+    return _CATALOGS[dataRoot]
+
+
+def _frameValue(value):
+    # Keep frame columns scalar - lists / dicts are stored as json strings
+    if isinstance(value, (list, tuple, dict)):
+        return json.dumps(value)
+    return value
+
+
+def metaDictToFrameRows(metaDict, level="study"):
+    """Flatten a subject meta dictionary (from {subjID}Tags.json) to data frame rows
+
+    Args:
+        metaDict (dict): subject meta dictionary (including 'Series' list)
+        level (str, optional): 'study' (one row) or 'series' (one row per series). Defaults to "study".
+
+    Returns:
+        list: list of row dictionaries
+    """
+    studyDict = {k: _frameValue(v) for k, v in metaDict.items() if k != 'Series'}
+    seriesList = metaDict.get('Series', [])
+    if level == "study":
+        studyDict['NumberOfSeries'] = len(seriesList)
+        studyDict['TotalDicoms'] = sum([i.get('ImagesInAcquisition', 0) for i in seriesList 
+                                        if isinstance(i.get('ImagesInAcquisition', 0), int)])
+        return [studyDict]
+    elif level == "series":
+        rows = []
+        for iSeries in seriesList:
+            iRow = {k: studyDict.get(k, None) for k in ['SubjectID', 'PatientID', 'StudyInstanceUID']}
+            iRow.update({k: _frameValue(v) for k, v in iSeries.items()})
+            rows.append(iRow)
+        return rows
+    raise ValueError(f"level must be one of {FRAME_LEVELS}")
+
+
+# ====================================================================================================
+#       SUBJECT CATALOG CLASS
+# ====================================================================================================
+class SubjectCatalog(object):
+    """
+    SQLite backed catalog of the subjects under a dataRoot.
+    A new connection is opened per operation so the catalog may be shared between threads and processes.
+    """
+    def __init__(self, dataRoot) -> None:
+        self.dataRoot = os.path.abspath(dataRoot)
+        self._schemaChecked = False
+        self._dataRootMtime = None
+
+
+    @property
+    def catalogDir(self):
+        return os.path.join(self.dataRoot, CATALOG_DIR)
+
+
+    @property
+    def catalogFile(self):
+        return os.path.join(self.catalogDir, CATALOG_FILE)
+
+
+    def __str__(self):
+        return f"SubjectCatalog at {self.catalogFile}"
+
+
+    @contextmanager
+    def _connect(self):
+        if not self._schemaChecked:
+            os.makedirs(self.catalogDir, exist_ok=True)
+        conn = sqlite3.connect(self.catalogFile, timeout=30)
+        try:
+            if not self._schemaChecked:
+                self._buildSchema(conn)
+                self._schemaChecked = True
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+
+    def _buildSchema(self, conn):
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, CATALOG_VERSION):
+            # Unknown layout - it is only a cache so start again
+            conn.execute("DROP TABLE IF EXISTS subjects")
+        tagCols = ", ".join([f"{i} TEXT" for i in INDEXED_TAGS])
+        conn.execute(f"CREATE TABLE IF NOT EXISTS subjects (subjID TEXT PRIMARY KEY, "
+                        f"tagsMtime INTEGER, tagsSize INTEGER, nSeries INTEGER, {tagCols}, tags TEXT)")
+        for iTag in INDEXED_TAGS:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{iTag} ON subjects ({iTag})")
+        conn.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+
+
+    ### ----------------------------------------------------------------------------------------------------------------
+    ### Building
+    ### ----------------------------------------------------------------------------------------------------------------
+    def getTagsFile(self, subjID):
+        return os.path.join(self.dataRoot, subjID, mi_utils.META, f"{subjID}Tags.json")
+
+
+    def _listSubjectDirectories(self):
+        subjIDs = []
+        with os.scandir(self.dataRoot) as it:
+            for entry in it:
+                if entry.name.startswith('.'):
+                    continue
+                if entry.is_dir():
+                    subjIDs.append(entry.name)
+        return subjIDs
+
+
+    def _statTagsFile(self, subjID):
+        try:
+            st = os.stat(self.getTagsFile(subjID))
+            return st.st_mtime_ns, st.st_size
+        except FileNotFoundError:
+            return None, None
+
+
+    def _buildRow(self, subjID, mtime, size):
+        tags = {}
+        if mtime is not None:
+            try:
+                with open(self.getTagsFile(subjID), 'r') as fid:
+                    tags = json.load(fid)
+            except (OSError, ValueError):
+                tags = {} # Being written or corrupt - will be picked up again on next refresh
+                mtime, size = None, None
+        nSeries = len(tags.pop('Series', []))
+        indexed = [None if tags.get(i, None) is None else str(tags[i]) for i in INDEXED_TAGS]
+        return [subjID, mtime, size, nSeries] + indexed + [json.dumps(tags)]
+
+
+    def _upsertRows(self, conn, rows):
+        if len(rows) == 0:
+            return
+        cols = ["subjID", "tagsMtime", "tagsSize", "nSeries"] + INDEXED_TAGS + ["tags"]
+        conn.executemany(f"INSERT OR REPLACE INTO subjects ({', '.join(cols)}) VALUES ({', '.join(['?']*len(cols))})", rows)
+
+
+    def refresh(self, subjIDs=None):
+        """Bring the catalog up to date with the filesystem.
+        Only Tags files with a changed modification time (or size) are parsed.
+
+        Args:
+            subjIDs (list, optional): Restrict the refresh to these subject IDs.
+                If None then all subject directories in dataRoot are checked and
+                rows for removed directories are deleted. Defaults to None.
+
+        Returns:
+            int: number of rows updated
+        """
+        FULL = subjIDs is None
+        if FULL:
+            subjIDs = self._listSubjectDirectories()
+        with self._connect() as conn:
+            known = {i[0]: (i[1], i[2]) for i in conn.execute("SELECT subjID, tagsMtime, tagsSize FROM subjects")}
+            toUpdate, toRemove = [], []
+            for iSubjID in subjIDs:
+                mtime, size = self._statTagsFile(iSubjID)
+                if (mtime is None) and (not FULL) and (not os.path.isdir(os.path.join(self.dataRoot, iSubjID))):
+                    if iSubjID in known:
+                        toRemove.append(iSubjID)
+                    continue
+                if known.get(iSubjID, False) != (mtime, size):
+                    toUpdate.append(self._buildRow(iSubjID, mtime, size))
+            if FULL:
+                toRemove += list(set(known.keys()).difference(subjIDs))
+            self._upsertRows(conn, toUpdate)
+            conn.executemany("DELETE FROM subjects WHERE subjID = ?", [(i,) for i in toRemove])
+        return len(toUpdate) + len(toRemove)
+
+
+    def syncDirectories(self):
+        """Add rows for new subject directories and remove rows for deleted ones. 
+        Existing rows are not checked against their Tags files (see refresh). 
+        Only acts if the dataRoot modification time has changed since the last call.
+
+        Returns:
+            int: number of rows added or removed
+        """
+        rootMtime = os.stat(self.dataRoot).st_mtime_ns
+        if rootMtime == self._dataRootMtime:
+            return 0
+        with self._connect() as conn:
+            known = set([i[0] for i in conn.execute("SELECT subjID FROM subjects")])
+        subjIDs = self._listSubjectDirectories()
+        toRemove = known.difference(subjIDs)
+        toAdd = [i for i in subjIDs if i not in known]
+        with self._connect() as conn:
+            self._upsertRows(conn, [self._buildRow(i, *self._statTagsFile(i)) for i in toAdd])
+            conn.executemany("DELETE FROM subjects WHERE subjID = ?", [(i,) for i in toRemove])
+        self._dataRootMtime = rootMtime
+        return len(toAdd) + len(toRemove)
+
+
+    def updateSubject(self, subjID):
+        """Update (or add) the catalog row for a single subject from its Tags file
+
+        Args:
+            subjID (str): subject ID
+        """
+        mtime, size = self._statTagsFile(subjID)
+        with self._connect() as conn:
+            self._upsertRows(conn, [self._buildRow(subjID, mtime, size)])
+
+
+    def removeSubject(self, subjID):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM subjects WHERE subjID = ?", (subjID,))
+
+
+    ### ----------------------------------------------------------------------------------------------------------------
+    ### Reading
+    ### ----------------------------------------------------------------------------------------------------------------
+    def getSubjIDs(self, subjectPrefix=None):
+        """Get all catalogued subject IDs (optionally only those starting with subjectPrefix)
+
+        Args:
+            subjectPrefix (str, optional): subject prefix to match. Defaults to None.
+
+        Returns:
+            list: subject IDs
+        """
+        with self._connect() as conn:
+            subjIDs = [i[0] for i in conn.execute("SELECT subjID FROM subjects")]
+        if subjectPrefix is not None:
+            subjIDs = [i for i in subjIDs if i.startswith(subjectPrefix)]
+        return subjIDs
+
+
+    def getTags(self, subjID):
+        """Get the catalogued (study level) tags of a subject. The 'Series' list is not catalogued.
+
+        Args:
+            subjID (str): subject ID
+
+        Returns:
+            dict: tags, or None if subject not in catalog
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT tags FROM subjects WHERE subjID = ?", (subjID,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+
+    def _checkIndexedTag(self, tagName):
+        if tagName not in INDEXED_TAGS:
+            raise ValueError(f"{tagName} is not an indexed catalog tag. Choose from: {INDEXED_TAGS}")
+
+
+    def findSubjIDs(self, tagName, value):
+        """Indexed lookup of all subject IDs where tagName == value
+
+        Args:
+            tagName (str): one of INDEXED_TAGS
+            value (ANY): value to match (compared as str)
+
+        Returns:
+            list: matching subject IDs
+        """
+        self._checkIndexedTag(tagName)
+        with self._connect() as conn:
+            return [i[0] for i in conn.execute(f"SELECT subjID FROM subjects WHERE {tagName} = ?", (str(value),))]
+
+
+    def findSubjIDsInRange(self, tagName, low, high):
+        """Indexed lookup of all subject IDs where low <= tagName <= high. 
+        Comparison is on the str value so only values of the same length as low are considered 
+        (e.g. YYYYMMDD dates).
+
+        Args:
+            tagName (str): one of INDEXED_TAGS
+            low (str): lower bound (inclusive)
+            high (str): upper bound (inclusive)
+
+        Returns:
+            list: matching subject IDs
+        """
+        self._checkIndexedTag(tagName)
+        low, high = str(low), str(high)
+        with self._connect() as conn:
+            return [i[0] for i in conn.execute(f"SELECT subjID FROM subjects WHERE {tagName} BETWEEN ? AND ? "
+                                                f"AND length({tagName}) = ?", (low, high, len(low)))]
+
+
+    def findSubjIDsMatchingStudyUID(self, studyUID):
+        """Lookup of subject IDs holding a StudyInstanceUID. 
+        Rows are kept current by AbstractSubject.buildDicomMeta and renameSubjID so only 
+        new / removed subject directories are synced here (no Tags files are re-read).
+
+        Args:
+            studyUID (str): StudyInstanceUID
+
+        Returns:
+            list: matching subject IDs
+        """
+        self.syncDirectories()
+        return self.findSubjIDs("StudyInstanceUID", studyUID)
+
+
+    def getTagValues(self, tagName, subjIDs=None):
+        """Get the value of an indexed tag for all (or given) subjects
+
+        Args:
+            tagName (str): one of INDEXED_TAGS
+            subjIDs (list, optional): restrict to these subject IDs. Defaults to None (all).
+
+        Returns:
+            dict: {subjID: value} - value is None if tag not set
+        """
+        self._checkIndexedTag(tagName)
+        with self._connect() as conn:
+            values = dict(conn.execute(f"SELECT subjID, {tagName} FROM subjects"))
+        if subjIDs is not None:
+            values = {i: values.get(i, None) for i in subjIDs}
+        return values
+
+
+    ### ----------------------------------------------------------------------------------------------------------------
+    ### Data frames
+    ### ----------------------------------------------------------------------------------------------------------------
+    def getFrameFile(self, level, ext=".parquet"):
+        return os.path.join(self.catalogDir, f"frame_{level}{ext}")
+
+
+    def _readFrame(self, level):
+        for ext, readFunc in [(".parquet", pd.read_parquet), (".pkl", pd.read_pickle)]:
+            frameFile = self.getFrameFile(level, ext)
+            if os.path.isfile(frameFile):
+                try:
+                    return readFunc(frameFile)
+                except Exception: # Unreadable cache (e.g. parquet engine missing or partial write) - rebuild
+                    pass
+        return None
+
+
+    def _writeFrame(self, df, level):
+        """Write cache as Parquet (requires pyarrow or fastparquet), fall back to pickle. 
+        Parquet also fails for columns of mixed type (e.g. numeric tags holding 'Unknown')."""
+        for ext in [".parquet", ".pkl"]:
+            if os.path.isfile(self.getFrameFile(level, ext)):
+                os.remove(self.getFrameFile(level, ext))
+        try:
+            df.to_parquet(self.getFrameFile(level, ".parquet"), index=False)
+            return
+        except (ImportError, ValueError, TypeError):
+            if os.path.isfile(self.getFrameFile(level, ".parquet")):
+                os.remove(self.getFrameFile(level, ".parquet"))
+        df.to_pickle(self.getFrameFile(level, ".pkl"))
+
+
+    def getDataFrame(self, level="study", subjIDs=None):
+        """Get a data frame of the meta data of all (or given) subjects. 
+        At 'study' level there is one row per subject, at 'series' level one row per series. 
+        The frame is cached in the catalog directory and rows are rebuilt only for subjects whose 
+        Tags file has changed since they were cached.
+
+        Args:
+            level (str, optional): 'study' or 'series'. Defaults to "study".
+            subjIDs (list, optional): restrict to these subject IDs. Defaults to None (all).
+
+        Returns:
+            pandas.DataFrame: meta data frame, sorted by SubjectID
+        """
+        if level not in FRAME_LEVELS:
+            raise ValueError(f"level must be one of {FRAME_LEVELS}")
+        self.refresh(subjIDs)
+        with self._connect() as conn:
+            mtimes = dict(conn.execute("SELECT subjID, tagsMtime FROM subjects WHERE tagsMtime IS NOT NULL"))
+        if subjIDs is not None:
+            mtimes = {i: mtimes[i] for i in subjIDs if i in mtimes}
+        cached = self._readFrame(level)
+        if (cached is None) or (FRAME_MTIME_COL not in cached.columns):
+            cached = pd.DataFrame(columns=['SubjectID', FRAME_MTIME_COL])
+        cachedMtimes = dict(zip(cached['SubjectID'], cached[FRAME_MTIME_COL]))
+        toBuild = [i for i in mtimes.keys() if cachedMtimes.get(i, None) != mtimes[i]]
+        toDrop = set(toBuild)
+        if subjIDs is None:
+            toDrop.update([i for i in cachedMtimes.keys() if i not in mtimes])
+        if len(toBuild) + len(toDrop) > 0:
+            newRows = []
+            for iSubjID in toBuild:
+                try:
+                    with open(self.getTagsFile(iSubjID), 'r') as fid:
+                        metaDict = json.load(fid)
+                except (OSError, ValueError):
+                    continue # Being written or corrupt - will be picked up again on next call
+                metaDict.setdefault('SubjectID', iSubjID)
+                for iRow in metaDictToFrameRows(metaDict, level):
+                    iRow['SubjectID'] = iSubjID
+                    iRow[FRAME_MTIME_COL] = mtimes[iSubjID]
+                    newRows.append(iRow)
+            parts = [cached[~cached['SubjectID'].isin(toDrop)], pd.DataFrame(newRows, dtype=object)]
+            cached = pd.concat([i for i in parts if len(i) > 0], ignore_index=True)
+            if len(cached) == 0:
+                cached = pd.DataFrame(columns=['SubjectID', FRAME_MTIME_COL])
+            cached = cached.sort_values('SubjectID', kind='stable', ignore_index=True)
+            self._writeFrame(cached, level)
+        df = cached[cached['SubjectID'].isin(mtimes.keys())]
+        return df.drop(columns=[FRAME_MTIME_COL]).reset_index(drop=True)
+
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM subjects").fetchone()[0]
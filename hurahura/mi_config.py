@@ -39,7 +39,12 @@ class _MIResearch_config():
         self._subject_prefix = ""
         self.subject_prefix = self.config.get("app", "subject_prefix", fallback="")
         self.stable_directory_age_sec = self.config.getint("app", "stable_directory_age_sec", fallback=60)
+        self.watch_workers = self.config.getint("app", "watch_workers", fallback=2)
+        self.watch_coalesce_sec = self.config.getint("app", "watch_coalesce_sec", fallback=10)
         self.default_pad_zeros = self.config.getint("app", "default_pad_zeros", fallback=6)
+        self.header_read_threads = self.config.getint("app", "header_read_threads", fallback=8)
+        self.copy_threads = self.config.getint("app", "copy_threads", fallback=8)
+        self.transfer_mode = self.config.get("app", "transfer_mode", fallback="copy")
         self.directory_structure = json.loads(self.config.get("app", "directories"))
 
         ## All parameters: 
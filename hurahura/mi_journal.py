@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+"""Write-ahead journal for subject loads
+
+An append-only json-lines file (META/LoadJournal.jsonl) per subject. A load records its job
+(source, anonName, transfer mode) before anything is written, then each series as it is completed and
+each post write step (meta, anon, postload) as it finishes. Every record is flushed to disk before
+the load moves on. The journal is removed once the load is complete - so a journal left behind marks
+a load interrupted part way and holds what is needed to resume it (see AbstractSubject.resumeLoad).
+"""
+
+import os
+import json
+import time
+
+
+JOURNAL_FILE = "LoadJournal.jsonl"
+# Steps (in order) run once all DICOMS of a load are written
+STEP_WRITE = "write"
+STEP_META = "meta"
+STEP_ANON = "anon"
+STEP_POSTLOAD = "postload"
+LOAD_STEPS = [STEP_WRITE, STEP_META, STEP_ANON, STEP_POSTLOAD]
+
+
+class LoadJournal(object):
+    """Journal of a single (the current) load to a subject
+
+    Args:
+        journalFile (str): path to journal file (normally subject META/LoadJournal.jsonl)
+    """
+    def __init__(self, journalFile):
+        self.journalFile = journalFile
+
+
+    def exists(self):
+        return os.path.isfile(self.journalFile)
+
+
+    def _append(self, record):
+        record["time"] = time.time()
+        with open(self.journalFile, "a") as fid:
+            fid.write(json.dumps(record) + "\n")
+            fid.flush()
+            os.fsync(fid.fileno())
+
+
+    def begin(self, source, anonName=None, transferMode=None, anonNameID=None):
+        """Start a new load job - replaces any existing journal
+
+        Args:
+            source (str): directory (or archive) being loaded
+            anonName (str, optional): anonName given to the load. Defaults to None.
+            transferMode (str, optional): transfer mode of the load. Defaults to None.
+            anonNameID (list, optional): [anonName, anonID] if DICOMS are anonymised as written. Defaults to None.
+        """
+        if self.exists():
+            os.remove(self.journalFile)
+        self._append({"event": "begin",
+                      "source": os.path.abspath(source) if source is not None else None,
+                      "anonName": anonName,
+                      "transferMode": transferMode,
+                      "anonNameID": list(anonNameID) if anonNameID is not None else None})
+
+
+    def recordSeriesWritten(self, seriesUID):
+        self._append({"event": "series", "SeriesInstanceUID": str(seriesUID)})
+
+
+    def recordStep(self, step):
+        if step not in LOAD_STEPS:
+            raise ValueError(f"Unknown load step {step} (expected one of {LOAD_STEPS})")
+        self._append({"event": "step", "step": step})
+
+
+    def end(self):
+        """Load complete - remove journal"""
+        if self.exists():
+            os.remove(self.journalFile)
+
+
+    def read(self):
+        """Read journal state
+
+        Returns:
+            dict: 'source', 'anonName', 'transferMode', 'anonNameID', 'seriesWritten' (set of SeriesInstanceUIDs),
+                    'stepsDone' (list of steps) - or None if no journal (or no begin record)
+        """
+        if not self.exists():
+            return None
+        state = None
+        with open(self.journalFile, "r") as fid:
+            for line in fid:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue # Torn final line - record was not complete
+                event = record.get("event", None)
+                if event == "begin":
+                    state = {i: record.get(i, None) for i in ["source", "anonName", "transferMode", "anonNameID"]}
+                    state["seriesWritten"], state["stepsDone"] = set(), []
+                elif state is None:
+                    continue
+                elif event == "series":
+                    state["seriesWritten"].add(record["SeriesInstanceUID"])
+                elif event == "step":
+                    state["stepsDone"].append(record["step"])
+        return state
+
+
+    def pendingSteps(self):
+        """Steps of the current load not yet done (all if no journal)"""
+        state = self.read()
+        stepsDone = [] if state is None else state["stepsDone"]
+        return [i for i in LOAD_STEPS if i not in stepsDone]
+
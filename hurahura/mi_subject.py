@@ -13,7 +13,10 @@ Adapted for general use from KMR project.
 
 
 import os
+import io
 import re
+import hashlib
+import tarfile
 from zipfile import ZipFile
 import numpy as np
 import datetime
@@ -21,6 +24,8 @@ import pandas as pd
 import shutil
 import subprocess
 import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from functools import wraps
 import importlib
 ##
@@ -30,8 +35,14 @@ from ngawari import fIO
 import inspect  
 
 from hurahura import mi_utils
+from hurahura import mi_catalog
+from hurahura import mi_journal
 
 
+# Study level tags reported by AbstractSubject.getInfoStr (and SubjectList.writeSummaryCSV)
+INFO_KEYS = ['SubjectID', 'SubjN', 'PatientBirthDate', 'PatientID', 'PatientName', 'PatientSex',
+            'StudyDate', 'StudyDescription', 'StudyInstanceUID', 'StudyID']
+
 _CACHED_SUBJECT_CLASS = None
 _SENTINEL_CLASS_NOT_CONFIGURED_OR_FAILED = object() # Sentinel for failed/no config
 
@@ -158,7 +169,6 @@ class AbstractSubject(object):
         else:
             padZeros = int(padZeros)
         self.padZeros = padZeros
-        self.DIRECTORY_STRUCTURE_TREE = mi_utils.buildDirectoryStructureTree()
         self.BUILD_DIR_IF_NEED = True
         self.dicomMetaTagListStudy = mi_utils.DEFAULT_DICOM_META_TAG_LIST_STUDY
         self.dicomMetaTagListSeries = mi_utils.DEFAULT_DICOM_META_TAG_LIST_SERIES
@@ -244,6 +254,19 @@ class AbstractSubject(object):
         return splitSubjID(self.subjID)[1]
     
 
+    @property
+    def DIRECTORY_STRUCTURE_TREE(self):
+        # Built on first use (not needed to list or query subjects)
+        if getattr(self, '_directoryStructureTree', None) is None:
+            self._directoryStructureTree = mi_utils.buildDirectoryStructureTree()
+        return self._directoryStructureTree
+
+
+    @DIRECTORY_STRUCTURE_TREE.setter
+    def DIRECTORY_STRUCTURE_TREE(self, directoryStructureTree):
+        self._directoryStructureTree = directoryStructureTree
+
+
     ### ----------------------------------------------------------------------------------------------------------------
     ### Logging
     ### ----------------------------------------------------------------------------------------------------------------
@@ -356,6 +379,7 @@ class AbstractSubject(object):
         if os.path.isdir(self.getTopDir()):
             self.logger.info(f"Study participant {self.subjID} exists at {self.getTopDir()}. Updating directory structure")
         os.makedirs(self.getTopDir(), exist_ok=True)
+        clearDataRootScan(self.dataRoot)
         for i in self.DIRECTORY_STRUCTURE_TREE:
             os.makedirs(os.path.join(self.getTopDir(), i.name), exist_ok=True)
             for j in i.childrenList:
@@ -368,52 +392,252 @@ class AbstractSubject(object):
 
 
     ### LOADING -------------------------------------------------------------------------------------------------------
-    def loadDicomsToSubject(self, dicomFolderToLoad, anonName=None, HIDE_PROGRESSBAR=False):
+    def loadDicomsToSubject(self, dicomFolderToLoad, anonName=None, HIDE_PROGRESSBAR=False, transferMode=None):
+        """Load DICOMS to subject (organised by study / series under RAW/DICOM)
+        The load is journalled (see mi_journal) - if a previous load of the same dicomFolderToLoad was interrupted 
+        it is resumed: series already written are skipped and only pending steps (meta, anon, post load) are run.
+
+        Args:
+            dicomFolderToLoad (str): directory of DICOMS to load
+            anonName (str, optional): anonymise name (or SOFT / HARD). Defaults to None - config anon_level.
+            HIDE_PROGRESSBAR (bool, optional): Set True to hide progress bar. Defaults to False.
+            transferMode (str, optional): How files are placed in subject: 'copy' (rewritten by spydcmtk), 'move', 
+                                    'hardlink' or 'reflink' (see mi_utils.transferFile). Defaults to None - config transfer_mode.
+        """
+        if transferMode is None:
+            transferMode = mi_utils.MIResearch_config.transfer_mode
         self.initDirectoryStructure()
         self.logger.info(f"LoadDicoms to {self.getDicomsDir()}") # Don't log source here as could be identifying
         self.logger.debug(f"LoadDicoms ({dicomFolderToLoad} ==> {self.getDicomsDir()}) & anon={anonName}") 
         d0, dI = self.countNumberOfDicoms(), mi_utils.countFilesInDir(dicomFolderToLoad)
-        study = spydcm.dcmTK.DicomStudy.setFromDirectory(dicomFolderToLoad, HIDE_PROGRESSBAR=HIDE_PROGRESSBAR)
-        res = study.writeToOrganisedFileStructure(self.getDicomsDir())
-        self._finalLoadSteps(d0, dI, anonName)
+        journal = self.getLoadJournal()
+        resumeState = journal.read()
+        if (resumeState is not None) and (resumeState['source'] != os.path.abspath(dicomFolderToLoad)):
+            self.logger.warning("LoadDicoms: previous load was interrupted - it is completed by the steps of this load")
+            resumeState = None
+        if (resumeState is not None) and (mi_journal.STEP_WRITE in resumeState['stepsDone']):
+            self.logger.info("LoadDicoms: resuming interrupted load - all DICOMS written")
+            self._finalLoadSteps(d0, dI, resumeState['anonName'], ANONYMISED_ON_WRITE=resumeState['anonNameID'] is not None)
+            return
+        # Headers read in parallel, pixel data read by writer per file
+        with mi_utils.timeLoadStage('scan'):
+            dsDict = readDicomHeaders(dicomFolderToLoad)
+            dsDict, nStored = self._removeStoredInstances(dsDict)
+            study = spydcm.dcmTK.DicomStudy.setFromDictionary(dsDict, OVERVIEW=True, HIDE_PROGRESSBAR=HIDE_PROGRESSBAR) \
+                        if len(dsDict) > 0 else []
+        if nStored > 0:
+            self.logger.info(f"LoadDicoms: skipping {nStored} instances already stored")
+            if (len(dsDict) == 0) and (resumeState is None):
+                return
+        if resumeState is None:
+            anonNameID = self._getAnonymiseOnWrite(anonName, study[0][0]) if len(study) > 0 else None
+            journal.begin(dicomFolderToLoad, anonName, transferMode, anonNameID)
+            seriesWritten = set()
+        else:
+            anonName, anonNameID, seriesWritten = [resumeState[i] for i in ['anonName', 'anonNameID', 'seriesWritten']]
+            self.logger.info(f"LoadDicoms: resuming interrupted load - {len(seriesWritten)} series already written")
+        with mi_utils.timeLoadStage('write'):
+            self._writeStudyToSubject(study, transferMode, anonNameID, seriesWritten, journal)
+        journal.recordStep(mi_journal.STEP_WRITE)
+        self._finalLoadSteps(d0, dI, anonName, ANONYMISED_ON_WRITE=anonNameID is not None)
+
+
+    def _writeStudyToSubject(self, study, transferMode, anonNameID=None, seriesWritten=(), journal=None):
+        """Write (OVERVIEW) study to subject DICOM directory one series at a time. 
+        Series in seriesWritten are skipped, each series written is recorded in journal.
+        """
+        if len(study) == 0:
+            return
+        if anonNameID is not None:
+            self.logger.info(f'Begin anonymise on load. New name: "{anonNameID[0]}", anonID: "{anonNameID[1]}"')
+        study.checkIfShouldUse_SAFE_NAMING()
+        studyOutputDir = study[0].getStudyOutputDir(self.getDicomsDir())
+        nByMode = {}
+        for iSeries in study:
+            seriesUID = str(iSeries.getTag('SeriesInstanceUID'))
+            if seriesUID in seriesWritten:
+                continue
+            if anonNameID is not None:
+                self._writeSeriesAnonymised(iSeries, *anonNameID, REMOVE_SOURCE=(transferMode == 'move'))
+            elif (transferMode == 'copy') or iSeries.isCompressed(): # Compressed series are written by spydcmtk (decompressed)
+                iSeries.writeToOrganisedFileStructure(studyOutputDir)
+            else:
+                for iMode in self._transferSeriesToSubject(iSeries, studyOutputDir, transferMode):
+                    nByMode[iMode] = nByMode.get(iMode, 0) + 1
+            if journal is not None:
+                journal.recordSeriesWritten(seriesUID)
+        if anonNameID is not None:
+            self.logger.info('End anonymise')
+        if len(nByMode) > 0:
+            self.logger.info(f"Transferred dicoms to {studyOutputDir}: {nByMode}")
+
+
+    def _getAnonymiseOnWrite(self, anonName, ds):
+        """Prepare to anonymise DICOMS as they are written (rather than write then anonymise in place). 
+        Only possible if subject has no DICOMS yet or is already anonymised. 
+        Sets meta (Age, encoded name) from the (not anonymised) header ds. See anonymise.
+
+        Args:
+            anonName (str): anonymise name (or SOFT / HARD). None - config anon_level.
+            ds (pydicom dataset): a header of the DICOMS to load
+
+        Returns:
+            tuple: (anonName, anonID) to write DICOMS with, or None if not to anonymise on write
+        """
+        if anonName is None: 
+            anonName = mi_utils.MIResearch_config.anon_level
+        if anonName is None:
+            return None
+        if (self.countNumberOfDicoms() > 0) and (not self.isAnonymised()):
+            return None
+        if self.isAnonymised():
+            name, firstNames = self.getName_FirstNames()
+        else:
+            name, firstNames = _splitDicomName(str(ds.get('PatientName', 'Name-Unknown')))
+        dsTags = {i: str(ds.get(i, '')) for i in ['PatientBirthDate', 'StudyDate', 'PatientAge']}
+        self.updateMetaFile({"Age": getAgeFromMetaDict({**{i: j for i, j in dsTags.items() if len(j) > 0}, 
+                                                        **self.getMetaDict()})})
+        return self._checkAnonName(anonName, name, firstNames, patientID=str(ds.get('PatientID', '')))
+
+
+    def _writeSeriesAnonymised(self, iSeries, anonName, anonID, REMOVE_SOURCE=False):
+        """Write (OVERVIEW) series to subject DICOM directory - each file read, anonymised and written once. 
+        Organised as spydcmtk anonymiseInPlace. 
+        """
+        IS_COMPRESSED = iSeries.isCompressed()
+        for ds in iSeries.yieldDataset():
+            self._writeDatasetAnonymised(ds, anonName, anonID, IS_COMPRESSED)
+            if REMOVE_SOURCE:
+                os.remove(ds.filename)
+
+
+    def _writeDatasetAnonymised(self, ds, anonName, anonID, IS_COMPRESSED=False):
+        if IS_COMPRESSED:
+            ds.decompress()
+        ds = spydcm.dcmTools.anonymiseDicomDS(ds, anonName=anonName, anonID=anonID, remove_private_tags=False)
+        destFile = spydcm.dcmTools.getSaveFileNameFor_ds(ds, self.getDicomsDir(), ANON=True)
+        os.makedirs(os.path.split(destFile)[0], exist_ok=True)
+        ds.save_as(destFile, enforce_file_format=True)
+        return destFile
+
+
+    def _transferSeriesToSubject(self, iSeries, studyOutputDir, transferMode):
+        """Place files of (OVERVIEW, not compressed) series in the organised structure under studyOutputDir 
+        without rewriting them (see mi_utils.transferFile). 
+
+        Returns:
+            list: mode used per file
+        """
+        seriesOutputDir = os.path.join(studyOutputDir, iSeries.getSeriesOutDirName())
+        os.makedirs(seriesOutputDir, exist_ok=True)
+        modes = []
+        for ds in iSeries:
+            destFile = os.path.join(seriesOutputDir, _getDicomSaveFileName(ds, iSeries.SAFE_NAME_MODE))
+            modes.append(mi_utils.transferFile(ds.filename, destFile, transferMode))
+        return modes
 
 
     def loadSpydcmStudyToSubject(self, spydcmData, anonName=None):
         self.initDirectoryStructure()
         self.logger.info(f"LoadDicoms (spydcmtk data ==> {self.getDicomsDir()})")
         d0, dI = self.countNumberOfDicoms(), spydcmData.getNumberOfDicoms()
-        spydcmData.writeToOrganisedFileStructure(self.getDicomsDir())
+        journal = self.getLoadJournal()
+        journal.begin(None, anonName)
+        with mi_utils.timeLoadStage('write'):
+            spydcmData.writeToOrganisedFileStructure(self.getDicomsDir())
+        journal.recordStep(mi_journal.STEP_WRITE)
         self._finalLoadSteps(d0, dI, anonName=anonName)
     
 
-    def _finalLoadSteps(self, initNumDicoms, numDicomsToLoad, anonName=None):
-        self.buildDicomMeta()
+    def _finalLoadSteps(self, initNumDicoms, numDicomsToLoad, anonName=None, ANONYMISED_ON_WRITE=False):
+        # Steps done (of an interrupted load being resumed) are skipped - load journal removed when complete
+        journal = self.getLoadJournal()
+        pendingSteps = journal.pendingSteps()
         if anonName is None: 
             anonName = mi_utils.MIResearch_config.anon_level
-        if anonName is not None:
-            self.anonymise(anonName=anonName)
+        if mi_journal.STEP_META in pendingSteps:
+            with mi_utils.timeLoadStage('meta'):
+                if ANONYMISED_ON_WRITE:
+                    self.setIsAnonymised()
+                    self.buildMeta()
+                elif anonName is not None:
+                    self.buildDicomMeta() # anonymise needs (pre-anonymisation) meta - and rebuilds all meta when complete
+                else:
+                    self.buildMeta()
+            journal.recordStep(mi_journal.STEP_META)
+        if (mi_journal.STEP_ANON in pendingSteps) and (not ANONYMISED_ON_WRITE) and (anonName is not None):
+            with mi_utils.timeLoadStage('anon'):
+                self.anonymise(anonName=anonName)
+            journal.recordStep(mi_journal.STEP_ANON)
         finalNumDicoms = self.countNumberOfDicoms()
         self.logger.info(f"Initial number of dicoms: {initNumDicoms}, number to load: {numDicomsToLoad}, final number dicoms: {finalNumDicoms}")
-        self.buildSeriesDataMetaCSV(FORCE=True)
-        self.runPostLoadPipeLine()
+        if mi_journal.STEP_POSTLOAD in pendingSteps:
+            with mi_utils.timeLoadStage('postload'):
+                self.runPostLoadPipeLine()
+            journal.recordStep(mi_journal.STEP_POSTLOAD)
+        journal.end()
+
+
+    def getLoadJournal(self):
+        return mi_journal.LoadJournal(os.path.join(self.getMetaDir(), mi_journal.JOURNAL_FILE))
+
+
+    def hasIncompleteLoad(self):
+        return self.getLoadJournal().exists()
+
+
+    def resumeLoad(self):
+        """Resume a load to this subject that was interrupted part way (load journal left in META - see mi_journal). 
+        If DICOMS were still being written and the source directory is available the load is run again 
+        (series already written are skipped). Otherwise the pending steps (meta, anon, post load) are run 
+        with the DICOMS written. 
+
+        Returns:
+            bool: True if an interrupted load was found and resumed
+        """
+        journal = self.getLoadJournal()
+        state = journal.read()
+        if state is None:
+            journal.end() # No begin record - nothing to resume
+            return False
+        self.logger.info(f"Resuming interrupted load (steps done: {state['stepsDone']})")
+        source = state['source']
+        if mi_journal.STEP_WRITE not in state['stepsDone']:
+            if (source is not None) and os.path.isdir(source):
+                self.loadDicomsToSubject(source, anonName=state['anonName'], HIDE_PROGRESSBAR=True, 
+                                         transferMode=state['transferMode'])
+                return True
+            self.logger.warning("Source of interrupted load not available - completing load with DICOMS written")
+            journal.recordStep(mi_journal.STEP_WRITE)
+        self._finalLoadSteps(self.countNumberOfDicoms(), 0, anonName=state['anonName'], 
+                             ANONYMISED_ON_WRITE=state['anonNameID'] is not None)
+        return True
 
 
     def addOtherData(self, directoryToLoad):
+        """Copy non-DICOM files (found recursively) from directoryToLoad to RAW/OTHER. 
+        Files are classified (mi_utils.isDicomFile) and copied (mi_utils.fastCopyFile) by a pool of threads.
+
+        Args:
+            directoryToLoad (str): directory (or single file) to load from
+        """
         self.logger.info(f"Adding other data (non-dicoms) ")
         count = 0
         if os.path.isfile(directoryToLoad):
             shutil.copy(directoryToLoad, os.path.join(self.getRawDirOther(), os.path.basename(directoryToLoad)))
             count += 1
         else:
+            filesToCheck = []
             for root, _, files in os.walk(directoryToLoad):
-                for file in files:
-                    if file.endswith('.dcm'): # quickly skip dicoms - but still run check below
-                        continue
-                    try:
-                        _ = spydcm.dcmTools.dicom.dcmread(os.path.join(root, file), stop_before_pixels=True, force=False)
-                    except spydcm.dcmTools.dicom.filereader.InvalidDicomError:
-                        shutil.copy(os.path.join(root, file), os.path.join(self.getRawDirOther(), file))
-                        count += 1
+                filesToCheck += [os.path.join(root, file) for file in files if not file.endswith('.dcm')] # quickly skip dicoms
+            nThreads = max(1, mi_utils.MIResearch_config.copy_threads)
+            with ThreadPoolExecutor(max_workers=nThreads) as executor:
+                IS_DICOM = list(executor.map(mi_utils.isDicomFile, filesToCheck))
+                # Flat copy to RAW/OTHER - last found file of a name is kept
+                filesToCopy = {os.path.join(self.getRawDirOther(), os.path.basename(iFile)): iFile 
+                                    for iFile, iDicom in zip(filesToCheck, IS_DICOM) if not iDicom}
+                list(executor.map(mi_utils.fastCopyFile, filesToCopy.values(), filesToCopy.keys()))
+            count = len(filesToCopy)
         self.logger.info(f"Added {count} files to {self.getRawDirOther()}")
         if count > 0:
             self.runPostLoadPipeLine()
@@ -487,16 +711,145 @@ class AbstractSubject(object):
         if os.path.isdir(newName):
             shutil.rmtree(newName)
         os.rename(self.getTopDir(), newName)
+        clearDataRootScan(self.dataRoot)
+        try:
+            mi_catalog.getCatalog(self.dataRoot).removeSubject(oldID)
+        except mi_catalog.CATALOG_ERRORS as e:
+            self.logger.warning(f"Could not remove {oldID} from catalog: {e}")
         self.subjectPrefix = newSubjID
         self._subjN = None
         self._renameLogger()
         self.logger.warning(f"New logger after subjID changed from {oldID} to {self.subjID}")
         self.logger.warning(" *** THIS WILL LIKELY HAVE BREAKING CONSEQUENCES ***")        
-        self.buildDicomMeta()
-        self.buildSeriesDataMetaCSV(FORCE=True)
+        self.buildMeta(INCREMENTAL=False)
 
 
     ### META STUFF -----------------------------------------------------------------------------------------------------
+    def _readDicomStudies(self, dirName=None):
+        """Read DICOM headers (not pixel data) of all DICOMS of this subject
+
+        Args:
+            dirName (str, optional): directory to read. Defaults to None - subject DICOM directory.
+
+        Returns:
+            ListOfDicomStudies: spydcmtk studies
+        """
+        if dirName is None:
+            dirName = self.getDicomsDir()
+        return spydcm.dcmTK.ListOfDicomStudies.setFromDirectory(dirName, OVERVIEW=True, HIDE_PROGRESSBAR=True)
+
+
+    def buildMeta(self, FORCE=True, INCREMENTAL=True):
+        """Build all meta data (Tags json file, series index and ScanSeriesInfo.csv) from a single read of 
+        the DICOM headers. 
+        If INCREMENTAL then only series directories whose fingerprint (number of files, newest mtime) has changed 
+        since the last build are read, unchanged series are kept from the existing meta. 
+
+        Args:
+            FORCE (bool, optional): Set False to keep existing ScanSeriesInfo.csv. Defaults to True.
+            INCREMENTAL (bool, optional): Set False to read all DICOMS. Defaults to True.
+        """
+        fingerprints = self._getSeriesDirFingerprints()
+        if INCREMENTAL:
+            changedDirs = self._getChangedSeriesDirs(fingerprints)
+            if (changedDirs is not None) and self._buildMetaIncremental(changedDirs, fingerprints):
+                return
+        dcmStudies = self._readDicomStudies()
+        self.buildDicomMeta(dcmStudies=dcmStudies, fingerprints=fingerprints)
+        self.buildSeriesDataMetaCSV(FORCE=FORCE, dcmStudies=dcmStudies)
+
+
+    def _buildMetaIncremental(self, changedDirs, fingerprints):
+        """Update meta for changed series directories only (see buildMeta)
+
+        Returns:
+            bool: True if meta updated, False if a full build is needed (series can not be unambiguously merged)
+        """
+        indexDict = fIO.parseJsonToDictionary(self.getSeriesIndexFile())
+        removedDirs = [i for i in indexDict['Fingerprints'].keys() if i not in fingerprints]
+        if (len(changedDirs) == 0) and (len(removedDirs) == 0):
+            self.logger.info('buildMeta: no changed series')
+            return True
+        keepDirs = set(fingerprints.keys()).difference(changedDirs)
+        seriesIndex = [i for i in indexDict['Series'] if i['Directory'] in keepDirs]
+        keptSeNums = [i['SeriesNumber'] for i in seriesIndex]
+        if len(keptSeNums) != len(set(keptSeNums)):
+            return False
+        dropSeNums = set([i['SeriesNumber'] for i in indexDict['Series']]).difference(keptSeNums)
+        seriesList = [i for i in self.getMetaDict().get('Series', []) if self._getSeriesMetaDictDir(i) in keepDirs]
+        storedDigests, storedDirs = self._readSOPInstanceUIDFile()
+        IS_KEPT = np.isin(storedDirs, list(keepDirs))
+        sopUIDDigests, sopUIDDirs = list(storedDigests[IS_KEPT]), list(storedDirs[IS_KEPT])
+        seInfoList = []
+        for iDir in changedDirs:
+            for iDcmStudy in self._readDicomStudies(os.path.join(self.getTopDir(), iDir)):
+                for iSeries in iDcmStudy:
+                    seriesIndex.append(self._getSeriesIndexEntry(iDcmStudy, iSeries))
+                    seriesList.append(self._getSeriesMetaDict(iSeries))
+                    seInfoList.append(self._getSeriesCSVDict(iSeries))
+                    self._appendSOPInstanceUIDs(iSeries, sopUIDDigests, sopUIDDirs)
+        if any([i['SeriesNumber'] in keptSeNums for i in seInfoList]):
+            return False
+        self.updateMetaFile({'Series': seriesList})
+        self._writeSeriesIndex(seriesIndex, fingerprints)
+        self._writeSOPInstanceUIDFile(sopUIDDigests, sopUIDDirs)
+        df = self.getSeriesMetaAsDataFrame()
+        df = df.loc[~df['SeriesNumber'].isin(dropSeNums), [i for i in df.columns if not i.startswith('Unnamed')]]
+        df = pd.concat([df, pd.DataFrame(data=seInfoList)], ignore_index=True)
+        df.to_csv(self.getSeriesMetaCSV())
+        self._updateCatalog()
+        self.logger.info(f'buildMeta: updated {len(changedDirs)} changed and {len(removedDirs)} removed series directories')
+        return True
+
+
+    def _getSeriesDirFingerprints(self):
+        """Fingerprint each directory holding DICOMS by number of files and newest mtime (of files and directory)
+
+        Returns:
+            dict: {directory relative to subject top dir: [number of files, newest mtime (ns)]}
+        """
+        fingerprints = {}
+        dirsToScan = [self.getDicomsDir()]
+        while len(dirsToScan) > 0:
+            iDir = dirsToScan.pop()
+            nFiles = 0
+            try:
+                mtime = os.stat(iDir).st_mtime_ns
+                with os.scandir(iDir) as entries:
+                    for iEntry in entries:
+                        if iEntry.is_dir(follow_symlinks=False):
+                            dirsToScan.append(iEntry.path)
+                        elif iEntry.is_file():
+                            nFiles += 1
+                            mtime = max(mtime, iEntry.stat().st_mtime_ns)
+            except FileNotFoundError:
+                continue
+            if nFiles > 0:
+                fingerprints[os.path.relpath(iDir, self.getTopDir())] = [nFiles, mtime]
+        return fingerprints
+
+
+    def _getChangedSeriesDirs(self, fingerprints):
+        """Compare series directory fingerprints to those stored in the series index
+
+        Returns:
+            list: changed or new directories, or None if a full build is needed
+        """
+        if not all([os.path.isfile(i) for i in [self.getSeriesIndexFile(), self.getSeriesMetaCSV(), self.getSOPInstanceUIDFile()]]):
+            return None
+        if 'StudyInstanceUID' not in self.getMetaDict().keys():
+            return None
+        oldFingerprints = fIO.parseJsonToDictionary(self.getSeriesIndexFile()).get('Fingerprints', None)
+        if oldFingerprints is None:
+            return None
+        changedDirs = [i for i in fingerprints.keys() if oldFingerprints.get(i, None) != fingerprints[i]]
+        if len(changedDirs) == len(fingerprints):
+            return None
+        for iDir in changedDirs: # a series is read recursively - so must not hold other series directories
+            if any([i.startswith(iDir+os.sep) for i in fingerprints.keys()]):
+                return None
+        return changedDirs
+
     def getSeriesMetaCSV(self):
         return os.path.join(self.getMetaDir(), 'ScanSeriesInfo.csv')
 
@@ -505,21 +858,25 @@ class AbstractSubject(object):
         return pd.read_csv(self.getSeriesMetaCSV(),  encoding="ISO-8859-1")
 
 
-    def buildSeriesDataMetaCSV(self, FORCE=False):
+    def _getSeriesCSVDict(self, dcmSE):
+        return dcmSE.getSeriesInfoDict(extraTags=["SeriesNumber", 
+                                                "SeriesDescription", 
+                                                "StudyDate", 
+                                                "AcquisitionTime",
+                                                "InPlanePhaseEncodingDirection", 
+                                                "PixelBandwidth",
+                                                ])
+
+
+    def buildSeriesDataMetaCSV(self, FORCE=False, dcmStudies=None):
         if os.path.isfile(self.getSeriesMetaCSV()) and (not FORCE):
             return 
         seInfoList = []
-        dcmStudies = spydcm.dcmTK.ListOfDicomStudies.setFromDirectory(self.getDicomsDir(), HIDE_PROGRESSBAR=True)
+        if dcmStudies is None:
+            dcmStudies = self._readDicomStudies()
         for dcmStudy in dcmStudies:
             for dcmSE in dcmStudy:
-                iSerDict = dcmSE.getSeriesInfoDict(extraTags=["SeriesNumber", 
-                                                            "SeriesDescription", 
-                                                            "StudyDate", 
-                                                            "AcquisitionTime",
-                                                            "InPlanePhaseEncodingDirection", 
-                                                            "PixelBandwidth",
-                                                            ])
-                seInfoList.append(iSerDict)
+                seInfoList.append(self._getSeriesCSVDict(dcmSE))
         df = pd.DataFrame(data=seInfoList)
         df.to_csv(self.getSeriesMetaCSV())
         self.logger.info('buildSeriesDataMetaCSV')
@@ -711,7 +1068,7 @@ class AbstractSubject(object):
         return metaFile
 
 
-    def buildDicomMeta(self):
+    def buildDicomMeta(self, dcmStudies=None, fingerprints=None):
         """Builds a JSON file comprised of DICOM tags and some derived values. 
         All data is taken from DICOM files - StudyDate, PatientID, MagneticFieldStrength etc
         A 'Series' tag is populated with a list of all series with series information (same as found in ScanSeriesInfo.csv)
@@ -721,10 +1078,20 @@ class AbstractSubject(object):
         E.g.: the subject got off the table and then resummed the study later. 
         miresearch will account for this by recording tags from the first found 'study' at the study level and 
         from ALL found series to populate the list of series. 
+
+        Args:
+            dcmStudies (ListOfDicomStudies, optional): already read DICOM studies of this subject (see buildMeta). 
+                                                    Defaults to None - read from subject DICOM directory.
+            fingerprints (dict, optional): series directory fingerprints taken before dcmStudies were read 
+                                                    (see buildMeta). Defaults to None - taken now.
         """
         # this uses pydicom - so tag names are different.
         ddFull = {'SubjectID': self.subjID, 'SubjN': self._subjN, 'Series': []}
-        dcmStudies = spydcm.dcmTK.ListOfDicomStudies.setFromDirectory(self.getDicomsDir(), HIDE_PROGRESSBAR=True)
+        if fingerprints is None:
+            fingerprints = self._getSeriesDirFingerprints()
+        if dcmStudies is None:
+            dcmStudies = self._readDicomStudies()
+        seriesIndex, sopUIDDigests, sopUIDDirs = [], [], []
         try:
             dcmDict = dcmStudies[0].getStudySummaryDict(extraTags=self.dicomMetaTagListStudy)
             dcmDict.pop('Series') # Get more detailed series information
@@ -732,12 +1099,135 @@ class AbstractSubject(object):
             # 
             for iDcmStudy in dcmStudies:
                 for iSeries in iDcmStudy:
-                    serDict = iSeries.getSeriesInfoDict(extraTags=self.dicomMetaTagListSeries)
-                    serDict['DicomFileName'] = iSeries.getDicomFullFileName().replace(self.getTopDir(), "")
-                    ddFull['Series'].append(serDict)
+                    ddFull['Series'].append(self._getSeriesMetaDict(iSeries))
+                    seriesIndex.append(self._getSeriesIndexEntry(iDcmStudy, iSeries))
+                    self._appendSOPInstanceUIDs(iSeries, sopUIDDigests, sopUIDDirs)
         except IndexError:
             pass # Found no Dicoms
         self.updateMetaFile(ddFull)
+        self._writeSeriesIndex(seriesIndex, fingerprints)
+        self._writeSOPInstanceUIDFile(sopUIDDigests, sopUIDDirs)
+        self._updateCatalog()
+
+
+    def _getSeriesMetaDict(self, iSeries):
+        serDict = iSeries.getSeriesInfoDict(extraTags=self.dicomMetaTagListSeries)
+        serDict['DicomFileName'] = iSeries.getDicomFullFileName().replace(self.getTopDir(), "")
+        return serDict
+
+
+    @staticmethod
+    def _getSeriesMetaDictDir(serDict):
+        return os.path.dirname(serDict['DicomFileName']).lstrip('/')
+
+
+    ### SERIES INDEX ---------------------------------------------------------------------------------------------------
+    def getSeriesIndexFile(self):
+        return os.path.join(self.getMetaDir(), 'SeriesIndex.json')
+
+
+    def _getSeriesIndexEntry(self, iDcmStudy, iSeries):
+        return {'SeriesInstanceUID': iSeries.getTag('SeriesInstanceUID', ifNotFound=None), 
+                'SeriesNumber': iSeries.getTag('SeriesNumber', ifNotFound=None), 
+                'StudyInstanceUID': iDcmStudy.getTag('StudyInstanceUID', ifNotFound=None), 
+                'Directory': os.path.relpath(iSeries.getRootDir(), self.getTopDir()), 
+                'NumberOfInstances': len(iSeries)}
+
+
+    def _writeSeriesIndex(self, seriesIndex, fingerprints):
+        """Write index of series directories: SeriesInstanceUID, SeriesNumber, Directory (relative to subject top dir) 
+        and NumberOfInstances, together with series directory fingerprints (see buildMeta). 
+        Written by buildDicomMeta and used to resolve series without reading the DICOM tree.
+        """
+        fIO.writeDictionaryToJSON(self.getSeriesIndexFile(), {'Series': seriesIndex, 'Fingerprints': fingerprints})
+
+
+    ### STORED INSTANCES -----------------------------------------------------------------------------------------------
+    def getSOPInstanceUIDFile(self):
+        return os.path.join(self.getMetaDir(), 'SOPInstanceUIDs.npz')
+
+
+    def _readSOPInstanceUIDFile(self):
+        """Read stored SOPInstanceUIDs (see getSOPInstanceUIDDigest) and their directories (relative to subject top dir)
+
+        Returns:
+            tuple: digests (uint64 array), directories (str array). Empty if not built.
+        """
+        try:
+            with np.load(self.getSOPInstanceUIDFile()) as dd:
+                return dd['digests'], dd['directories']
+        except FileNotFoundError:
+            return np.array([], dtype=np.uint64), np.array([], dtype=str)
+
+
+    def _writeSOPInstanceUIDFile(self, digests, directories):
+        """Written by buildDicomMeta (and incremental buildMeta) from the DICOMS stored in subject"""
+        np.savez(self.getSOPInstanceUIDFile(), digests=np.array(digests, dtype=np.uint64), 
+                 directories=np.array(directories, dtype=str))
+
+
+    def _appendSOPInstanceUIDs(self, iSeries, digests, directories):
+        for ds in iSeries:
+            iDigest = getSOPInstanceUIDDigest(ds)
+            if iDigest is not None:
+                digests.append(iDigest)
+                directories.append(os.path.relpath(os.path.dirname(ds.filename), self.getTopDir()))
+
+
+    def getStoredSOPInstanceUIDDigests(self):
+        """Get set of SOPInstanceUID digests of instances stored in subject (see getSOPInstanceUIDDigest)
+
+        Returns:
+            set: SOPInstanceUID digests (int)
+        """
+        return set(self._readSOPInstanceUIDFile()[0].tolist())
+
+
+    def _removeStoredInstances(self, dsDict):
+        """Remove datasets of instances already stored in subject from dsDict (see readDicomHeaders)
+
+        Returns:
+            tuple: dsDict of instances not stored, number of instances removed
+        """
+        storedDigests = self.getStoredSOPInstanceUIDDigests()
+        if len(storedDigests) == 0:
+            return dsDict, 0
+        dsDictNew, nRemoved = {}, 0
+        for iStudyUID, iStudyDict in dsDict.items():
+            for iSeriesUID, iDsList in iStudyDict.items():
+                dsListNew = [ds for ds in iDsList if getSOPInstanceUIDDigest(ds) not in storedDigests]
+                nRemoved += len(iDsList) - len(dsListNew)
+                if len(dsListNew) > 0:
+                    dsDictNew.setdefault(iStudyUID, {})[iSeriesUID] = dsListNew
+        return dsDictNew, nRemoved
+
+
+    def getSeriesIndex(self):
+        """Get the series index (see _writeSeriesIndex)
+
+        Returns:
+            list: list of series dictionaries, or None if index not built (run buildDicomMeta)
+        """
+        ff = self.getSeriesIndexFile()
+        if not os.path.isfile(ff):
+            return None
+        return fIO.parseJsonToDictionary(ff)['Series']
+
+
+    def _getSeriesIndexSortedBySeNum(self):
+        seriesIndex = self.getSeriesIndex()
+        if seriesIndex is None:
+            return None
+        seriesIndex = [i for i in seriesIndex if i['SeriesNumber'] is not None]
+        return sorted(seriesIndex, key=lambda x: int(x['SeriesNumber']))
+
+
+    def _updateCatalog(self):
+        """Update this subject's row in the dataRoot catalog (holds StudyInstanceUID for ingest matching)"""
+        try:
+            mi_catalog.getCatalog(self.dataRoot).updateSubject(self.subjID)
+        except mi_catalog.CATALOG_ERRORS as e:
+            self.logger.warning(f"Could not update catalog: {e}")
 
 
     def countNumberOfDicoms(self):
@@ -781,11 +1271,24 @@ class AbstractSubject(object):
 
 
     def getDicomSeriesDir(self, seriesNum, seriesUID=None):
+        for iSeries in (self.getSeriesIndex() or []):
+            if seriesUID is not None:
+                MATCH = iSeries['SeriesInstanceUID'] == seriesUID
+            else:
+                try:
+                    MATCH = int(iSeries['SeriesNumber']) == int(seriesNum)
+                except TypeError:
+                    MATCH = False
+            if MATCH:
+                dirName = os.path.join(self.getTopDir(), iSeries['Directory'])
+                if os.path.isdir(dirName):
+                    return dirName
+                break # Index out of date - fall back to reading DICOM tree
         dcmStudies = spydcm.dcmTK.ListOfDicomStudies.setFromDirectory(self.getDicomsDir(), ONE_FILE_PER_DIR=True, HIDE_PROGRESSBAR=True)
         dcmSeries = None
         if seriesUID is not None:
             for dcmStudy in dcmStudies:
-                dcmSeries = dcmStudy.getSeriesByUID()
+                dcmSeries = dcmStudy.getSeriesByUID(seriesUID)
                 if dcmSeries is not None:
                     break
             if dcmSeries is None:
@@ -820,6 +1323,14 @@ class AbstractSubject(object):
 
 
     def getDicomFoldersListStr(self, FULL=True, excludeSeNums=None):
+        seriesIndex = self._getSeriesIndexSortedBySeNum()
+        if seriesIndex is not None:
+            if not FULL:
+                return [os.path.split(i['Directory'])[1] for i in seriesIndex]
+            if excludeSeNums is None:
+                excludeSeNums = []
+            return [os.path.join(self.getTopDir(), i['Directory']) for i in seriesIndex 
+                        if int(i['SeriesNumber']) not in excludeSeNums]
         dFolders = []
         dcmStudies = spydcm.dcmTK.ListOfDicomStudies.setFromDirectory(self.getDicomsDir(), ONE_FILE_PER_DIR=True, HIDE_PROGRESSBAR=True)
         for dcmStudy in dcmStudies:
@@ -844,6 +1355,9 @@ class AbstractSubject(object):
 
 
     def getListOfSeNums(self):
+        seriesIndex = self._getSeriesIndexSortedBySeNum()
+        if seriesIndex is not None:
+            return [int(i['SeriesNumber']) for i in seriesIndex]
         se = []
         for ff in self.getDicomFoldersListStr(FULL=False):
             try:
@@ -876,8 +1390,7 @@ class AbstractSubject(object):
         # Return values_list, info_keys:
         #   list of values for info keys (+ age). 
         #   header keys
-        infoKeys = ['SubjectID', 'SubjN', 'PatientBirthDate', 'PatientID', 'PatientName', 'PatientSex',
-                    'StudyDate', 'StudyDescription', 'StudyInstanceUID', 'StudyID'] + extraKeys
+        infoKeys = INFO_KEYS + extraKeys
         mm = self.getMetaDict()
         aa = f"{self.getAge():5.2f}"
         nDCM = f"{self.countNumberOfDicoms()}"
@@ -917,20 +1430,23 @@ class AbstractSubject(object):
         spydcm.anonymiseInPlace(self.getDicomsDir(), anonName=anonName, anonID=anonID, QUIET=QUIET)
         self.logger.info('End anonymise')
         self.setIsAnonymised()
-        self.buildDicomMeta()
+        self.buildMeta(INCREMENTAL=False)
 
 
-    def _checkAnonName(self, anonName, name="", firstNames=""):
+    def _checkAnonName(self, anonName, name="", firstNames="", patientID=None):
         """
         Check if anonName is valid and return anonName and anonID
         If anonName = SOFT then set an encoded name in meta file and retain PatientID - anonymise DICOMS
         If anonName = HARD then set encoded name in meta file to "Unknown" - anonymise DICOMS
         If anonName is None then anonymise DICOMS
         Else anonymise DICOMS with anonName for Name and PatientID
+        patientID (retained for SOFT) is taken from meta if not given
         """
         if anonName == "SOFT":
             self.setEncodedName(NAME=name, FIRST_NAMES=firstNames)
-            return "", self.getMetaTagValue("PatientID")
+            if patientID is None:
+                patientID = self.getMetaTagValue("PatientID")
+            return "", patientID
         elif anonName == "HARD":
             self.setEncodedName(NAME='Name-Unknown', FIRST_NAMES='FirstNames-Unknown')
             return "", ""
@@ -971,13 +1487,7 @@ class AbstractSubject(object):
             except TypeError:
                 pass
             
-        name = self.getName()
-        parts = name.split("^")
-        if len(parts) == 1:
-            return parts[0], ""
-        name = parts[0]
-        firstNames = "_".join(parts[1:])
-        return spydcm.dcmTools.cleanString(name), spydcm.dcmTools.cleanString(firstNames)
+        return _splitDicomName(self.getName())
 
 
     # ------------------------------------------------------------------------------------------
@@ -1013,37 +1523,7 @@ class AbstractSubject(object):
             return age
         except (KeyError, ValueError):
             # This may be case if pre-anonymisation has removed DOB but left PatientAge
-            try:
-                ageStr = dd['PatientAge']
-            except KeyError: # Found no tags to provide age information
-                return np.nan
-        age = np.nan
-        try:
-            age = float(ageStr)
-        except ValueError:
-            ageStrL = ageStr.lower()
-            if "y" in ageStrL:
-                factor = 1.0
-                ageC = ageStrL.replace('y', '')
-            elif "m" in ageStrL:
-                factor = 1/12.0
-                ageC = ageStrL.replace('m', '')
-            elif "w" in ageStrL:
-                factor = 1/52.0
-                ageC = ageStrL.replace('w', '')
-            elif "d" in ageStrL:
-                factor = 1 / 365.0
-                ageC = ageStrL.replace('d', '')
-            elif "h" in ageStrL:
-                factor = 1 / (365.0 * 24.0)
-                ageC = ageStrL.replace('h', '')
-            # Now have a cleaned age string and a factor to convert to years (as decimal)
-            try:
-                age = float(ageC) * factor
-            except: # Probably ValueError or UnboundLocalError (ageC not set) but catch all in case
-                # failed so return nan
-                return np.nan
-        return age
+            return getAgeFromMetaDict(dd)
 
 
     def getGender(self):
@@ -1186,23 +1666,76 @@ class AbstractSubject(object):
         dcmdir = self.getDicomSeriesDir(seNumber)
         return spydcm.dcmTK.DicomSeries.setFromDirectory(dcmdir)
 
+# ====================================================================================================
+#       SUBJECT HANDLE CLASS
+# ====================================================================================================
+class SubjectHandle(object):
+    """
+    Lightweight reference to a subject (subjID, dataRoot, sort key) held by SubjectList. 
+    The full subject object is only built (by SubjectList) when it is accessed. 
+    """
+    __slots__ = ('subjID', 'dataRoot', 'subjectPrefix', 'SubjClass', 'sortKey')
+
+    def __init__(self, subjID, dataRoot, subjectPrefix, SubjClass) -> None:
+        self.subjID = subjID
+        self.dataRoot = dataRoot
+        self.subjectPrefix = subjectPrefix
+        self.SubjClass = SubjClass
+        try:
+            self.sortKey = (splitSubjID(subjID)[1], subjID)
+        except (IndexError, ValueError):
+            self.sortKey = (-1, subjID)
+
+    def build(self):
+        return self.SubjClass(self.subjID, dataRoot=self.dataRoot, subjectPrefix=self.subjectPrefix)
+
+    @property
+    def subjN(self):
+        return self.sortKey[0]
+
+    def getPrefix_Number(self):
+        return splitSubjID(self.subjID)
+
+    def exists(self):
+        return os.path.isdir(os.path.join(self.dataRoot, self.subjID))
+
+    def __hash__(self):
+        return hash((self.subjID, self.dataRoot))
+
+    def __eq__(self, other):
+        try:
+            return (self.subjID == other.subjID) & \
+                   (self.dataRoot == other.dataRoot)
+        except AttributeError:
+            return False
+
+    def __ne__(self, other):
+        return not (self == other)
+
+    def __lt__(self, other):
+        return self.subjN < other.subjN
+
+    def __str__(self):
+        return f"{self.subjID} at {self.dataRoot}"
+
+
 # ====================================================================================================
 #       LIST OF SUBJECTS CLASS
 # ====================================================================================================
 class SubjectList(list):
     """
-    Container for a list of subjects
+    Container for a list of subjects. 
+    May hold SubjectHandles - these are replaced by full subject objects when accessed.
     """
     def __init__(self, subjList=[]):
-        super().__init__(i for i in subjList)
+        super().__init__(i for i in _iterRaw(subjList))
 
 
     @classmethod
     def setByDirectory(cls, dataRoot, subjectPrefix=None, SubjClass=None):
         if SubjClass is None:
             SubjClass = get_configured_subject_class()
-        listOfSubjects = getAllSubjects(dataRoot, subjectPrefix, SubjClass=SubjClass)
-        return cls(listOfSubjects)
+        return cls(_getAllSubjectHandles(dataRoot, subjectPrefix, SubjClass=SubjClass))
 
 
     @classmethod
@@ -1213,40 +1746,124 @@ class SubjectList(list):
         return cls(subjList)
 
 
+    ### Lazy access -----------------------------------------------------------------------------------------------------
+    def _getSubject(self, index):
+        item = list.__getitem__(self, index)
+        if isinstance(item, SubjectHandle):
+            item = item.build()
+            list.__setitem__(self, index, item)
+        return item
+
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return SubjectList(list.__getitem__(self, index))
+        if index < 0:
+            index += len(self)
+        return self._getSubject(index)
+
+
+    def __iter__(self):
+        k = 0
+        while k < len(self):
+            yield self._getSubject(k)
+            k += 1
+
+
+    def __reversed__(self):
+        for k in range(len(self)-1, -1, -1):
+            yield self._getSubject(k)
+
+
+    def __add__(self, other):
+        return SubjectList(list(_iterRaw(self)) + list(_iterRaw(other)))
+
+
+    def pop(self, index=-1):
+        item = self[index]
+        list.pop(self, index)
+        return item
+
+
     @property
     def subjIDs(self):
-        return [i.subjID for i in self]
+        return [i.subjID for i in _iterRaw(self)]
     
 
     @property
     def subjNs(self):
-        return [i.subjN for i in self]
+        return [i.subjN for i in _iterRaw(self)]
 
 
     def __str__(self) -> str:
-        return f"{len(self)} subjects of {self[0].subjectPrefix} at {self[0].dataRoot}"
+        item0 = list.__getitem__(self, 0)
+        return f"{len(self)} subjects of {item0.subjectPrefix} at {item0.dataRoot}"
 
 
     def reduceToExist(self, VERBOSE=False):
         toRemove = []
-        for i in self:
+        for i in _iterRaw(self):
             if not i.exists():
                 toRemove.append(i)
         if VERBOSE:
-            print(f"Removing non-existant subjects: {toRemove}")
+            print(f"Removing non-existant subjects: {[str(i) for i in toRemove]}")
         for i in toRemove:
             self.remove(i)
 
 
     def reduceToSet(self):
         toRemove = []
-        for k1 in range(len(self)):
-            if self[k1] in self[k1+1:]:
-                toRemove.append(self[k1])
+        items = list(_iterRaw(self))
+        for k1 in range(len(items)):
+            if items[k1] in items[k1+1:]:
+                toRemove.append(items[k1])
         for i in toRemove:
             self.remove(i)
 
 
+    ### Catalog backed queries ------------------------------------------------------------------------------------------
+    def _refreshCatalogs(self):
+        """Refresh the dataRoot catalog(s) for the subjects in this list
+
+        Returns:
+            dict: {dataRoot: SubjectCatalog}
+        """
+        subjIDsByRoot = {}
+        for iSubj in _iterRaw(self):
+            subjIDsByRoot.setdefault(iSubj.dataRoot, []).append(iSubj.subjID)
+        catalogs = {}
+        for iRoot, iSubjIDs in subjIDsByRoot.items():
+            catalogs[iRoot] = mi_catalog.getCatalog(iRoot)
+            catalogs[iRoot].refresh(iSubjIDs)
+        return catalogs
+
+
+    def _catalogFilter(self, matchFunc):
+        """Reduce to subjects whose ID is returned by matchFunc(catalog). List order is kept.
+
+        Args:
+            matchFunc (callable): takes a SubjectCatalog, returns list of matching subject IDs
+
+        Returns:
+            SubjectList: matching subjects
+        """
+        matching = {iRoot: set(matchFunc(iCatalog)) for iRoot, iCatalog in self._refreshCatalogs().items()}
+        return SubjectList([i for i in _iterRaw(self) if i.subjID in matching[i.dataRoot]])
+
+
+    def _catalogTagValues(self, tagName):
+        """Get values of an indexed catalog tag for each subject in list (None if not set)
+
+        Args:
+            tagName (str): tag name - one of mi_catalog.INDEXED_TAGS
+
+        Returns:
+            list: tag values in list order
+        """
+        values = {iRoot: iCatalog.getTagValues(tagName) for iRoot, iCatalog in self._refreshCatalogs().items()}
+        return [values[i.dataRoot].get(i.subjID, None) for i in _iterRaw(self)]
+
+
     def filterSubjectListByDOS(self, dateOfScan_YYYYMMDD, dateEnd_YYYYMMDD=None): #TODO
         """
         Take list, return only those that match DOS or between start and end (inclusive) if dateEnd given
@@ -1255,19 +1872,14 @@ class SubjectList(list):
         :param dateEnd_YYYYMMDD: str - optional 
         :return:
         """
-        filteredMatchList = []
-        for iSubj in self:
-            iDOS = iSubj.getTagValue('StudyDate')
-            try:
-                if dateEnd_YYYYMMDD is None:
-                    if iDOS == dateOfScan_YYYYMMDD:
-                        filteredMatchList.append(iSubj)
-                else:
-                    if (int(iDOS) >= int(dateOfScan_YYYYMMDD)) and (int(iDOS) <= int(dateEnd_YYYYMMDD)):
-                        filteredMatchList.append(iSubj)
-            except ValueError: # maybe don't have tag, or wrong format
-                continue
-        return SubjectList(filteredMatchList)
+        studyDates = self.getStudyDates()
+        dateStart = studyDatesToDatetime64([dateOfScan_YYYYMMDD])[0]
+        if dateEnd_YYYYMMDD is None:
+            keep = studyDates == dateStart
+        else:
+            dateEnd = studyDatesToDatetime64([dateEnd_YYYYMMDD])[0]
+            keep = (studyDates >= dateStart) & (studyDates <= dateEnd)
+        return SubjectList([i for i, tf in zip(_iterRaw(self), keep) if tf])
 
 
     def findSubjMatching_SubjN(self, subjN):
@@ -1289,6 +1901,16 @@ class SubjectList(list):
         :param studyID (or examID): int
         :return: mi_subject
         """
+        try:
+            for k, iStudyID in enumerate(self._catalogTagValues("StudyID")):
+                try:
+                    if int(iStudyID) == studyID:
+                        return self[k]
+                except (TypeError, ValueError):
+                    pass
+            return None
+        except mi_catalog.CATALOG_ERRORS:
+            pass # Fall back to reading each subject
         for iSubj in self:
             try:
                 if int(iSubj.getTagValue("StudyID")) == studyID:
@@ -1299,6 +1921,11 @@ class SubjectList(list):
     
 
     def findSubjMatchingStudyUID(self, studyUID):
+        try:
+            matchList = self._catalogFilter(lambda catalog: catalog.findSubjIDs("StudyInstanceUID", studyUID))
+            return matchList[0] if len(matchList) > 0 else None
+        except mi_catalog.CATALOG_ERRORS:
+            pass # Fall back to reading each subject
         for iSubj in self:
             try:
                 if iSubj.getTagValue("StudyInstanceUID") == studyUID:
@@ -1317,14 +1944,65 @@ class SubjectList(list):
         A_less_than_B = check to force subjDateOfScan <= dateOfScan query
         Return: subjList length one
         """
-        dateDiffs = [_getDateDiff_days(iSubj.getTagValue('StudyDate'), dateOfScan_YYYY_MM_DD) for iSubj in self]
+        dateDiffs = (self.getStudyDates() - studyDatesToDatetime64([dateOfScan_YYYY_MM_DD])[0]) / np.timedelta64(1, 'D')
         if A_less_than_B: 
-            minDiff = min(dateDiffs)
-            dateDiffs = [i if i <=0 else (minDiff-999) for i in dateDiffs]
+            minDiff = np.nanmin(dateDiffs)
+            dateDiffs = np.where(dateDiffs <= 0, dateDiffs, minDiff-999)
+        dateDiffs[np.isnan(dateDiffs)] = -np.inf # No valid StudyDate
         indexKeep = np.argmax(dateDiffs)
         return [self[indexKeep]]
 
 
+    def getStudyDates(self):
+        """Get StudyDate of all subjects in list
+
+        Returns:
+            numpy.ndarray: datetime64[D] array in list order (NaT where StudyDate not valid)
+        """
+        try:
+            studyDates = self._catalogTagValues("StudyDate")
+        except mi_catalog.CATALOG_ERRORS:
+            studyDates = [iSubj.getTagValue("StudyDate", None) for iSubj in self]
+        return studyDatesToDatetime64(studyDates)
+
+
+    def matchPatientIDsAndDates(self, patientIDs, dates_YYYYMMDD, tolerance_days=0):
+        """Batch linkage of external records to subjects. 
+        For each record find the subject with matching PatientID and nearest StudyDate (within tolerance_days). 
+
+        Args:
+            patientIDs (list): PatientID of each record
+            dates_YYYYMMDD (list): date (YYYYMMDD) of each record
+            tolerance_days (int, optional): maximum days between record date and StudyDate. 
+                                            None for no limit. Defaults to 0 (same day).
+
+        Returns:
+            list: subjID matching each record (None where no match found)
+        """
+        if len(patientIDs) != len(dates_YYYYMMDD):
+            raise ValueError("patientIDs and dates_YYYYMMDD must be same length")
+        try:
+            subjPatientIDs = self._catalogTagValues("PatientID")
+        except mi_catalog.CATALOG_ERRORS:
+            subjPatientIDs = [iSubj.getTagValue("PatientID", None) for iSubj in self]
+        cohort = pd.DataFrame({'PatientID': pd.Series(subjPatientIDs, dtype=object), 
+                               'Date': self.getStudyDates(), 
+                               'SubjectID': self.subjIDs})
+        cohort = cohort[cohort['PatientID'].notna() & cohort['Date'].notna()]
+        cohort = cohort.astype({'PatientID': str}).sort_values('Date', kind='stable')
+        records = pd.DataFrame({'PatientID': [str(i) for i in patientIDs], 
+                                'Date': studyDatesToDatetime64(dates_YYYYMMDD), 
+                                'RecordIndex': np.arange(len(patientIDs))})
+        records = records[records['Date'].notna()].sort_values('Date', kind='stable')
+        tolerance = None if tolerance_days is None else pd.Timedelta(days=tolerance_days)
+        matched = pd.merge_asof(records, cohort, on='Date', by='PatientID', direction='nearest', tolerance=tolerance)
+        matchingSubjIDs = [None] * len(patientIDs)
+        for iRecord, iSubjID in zip(matched['RecordIndex'], matched['SubjectID']):
+            if isinstance(iSubjID, str):
+                matchingSubjIDs[iRecord] = iSubjID
+        return matchingSubjIDs
+
+
     def findSubjMatchingPatientID(self, patientID, dateOfScan_YYYYMMDD=None, tolerance_days=0):
         """
         :param patientID:
@@ -1332,13 +2010,16 @@ class SubjectList(list):
         :return: SubjectList
         """
         patientID = str(patientID)
-        matchList = SubjectList()
-        for iSubj in self:
-            try:
-                if iSubj.getTagValue("PatientID") == patientID:
-                    matchList.append(iSubj)
-            except ValueError:
-                pass
+        try:
+            matchList = self._catalogFilter(lambda catalog: catalog.findSubjIDs("PatientID", patientID))
+        except mi_catalog.CATALOG_ERRORS:
+            matchList = SubjectList()
+            for iSubj in self:
+                try:
+                    if iSubj.getTagValue("PatientID") == patientID:
+                        matchList.append(iSubj)
+                except ValueError:
+                    pass
         if (len(matchList)>1) & (dateOfScan_YYYYMMDD is not None):
             dataEnd = None
             if tolerance_days > 0:
@@ -1356,8 +2037,11 @@ class SubjectList(list):
         """
         nameStr_l = nameStr.lower()
         matchList = SubjectList()
-        for iSubj in self:
-            iName = iSubj.getTagValue("NAME", mi_utils.UNKNOWN)
+        try:
+            names = [mi_utils.UNKNOWN if i is None else i for i in self._catalogTagValues("NAME")]
+        except mi_catalog.CATALOG_ERRORS:
+            names = [iSubj.getTagValue("NAME", mi_utils.UNKNOWN) for iSubj in self]
+        for iSubj, iName in zip(_iterRaw(self), names):
             if decodePassword == "SubjID":
                 iName = mi_utils.decodeString(iName, iSubj.subjID).lower()
             elif decodePassword is not None:
@@ -1372,14 +2056,61 @@ class SubjectList(list):
         return matchList
 
 
+    def toDataFrame(self, level='study'):
+        """Get meta data of all subjects in list as a pandas DataFrame. 
+        Built from each subject's Tags json file and cached per dataRoot (rebuilt only for changed subjects). 
+
+        Args:
+            level (str, optional): 'study' (one row per subject) or 'series' (one row per series). Defaults to 'study'.
+
+        Returns:
+            pandas.DataFrame: meta data frame, ordered as this list
+        """
+        subjIDsByRoot = {}
+        for iSubj in _iterRaw(self):
+            subjIDsByRoot.setdefault(iSubj.dataRoot, []).append(iSubj.subjID)
+        frames = []
+        for iRoot, iSubjIDs in subjIDsByRoot.items():
+            try:
+                iDF = mi_catalog.getCatalog(iRoot).getDataFrame(level, iSubjIDs)
+            except mi_catalog.CATALOG_ERRORS:
+                rows = []
+                for iSubj in self:
+                    if iSubj.dataRoot == iRoot:
+                        rows += mi_catalog.metaDictToFrameRows(iSubj.getMetaDict(), level)
+                iDF = pd.DataFrame(rows, dtype=object)
+            iDF['_dataRoot'] = iRoot
+            frames.append(iDF)
+        if len(frames) == 0:
+            return pd.DataFrame(columns=['SubjectID'])
+        df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        order = {(iSubj.dataRoot, iSubj.subjID): k for k, iSubj in enumerate(_iterRaw(self))}
+        df['_order'] = [order.get(i, -1) for i in zip(df['_dataRoot'], df['SubjectID'])]
+        df = df.sort_values('_order', kind='stable').drop(columns=['_order', '_dataRoot'])
+        return df.reset_index(drop=True)
+
+
+    def _getInfoStrList(self):
+        # getInfoStr for each subject - taken from the cached study data frame unless getInfoStr is overridden
+        if any([_getSubjClass(iSubj).getInfoStr is not AbstractSubject.getInfoStr for iSubj in _iterRaw(self)]):
+            return [iSubj.getInfoStr() for iSubj in self]
+        df = self.toDataFrame('study')
+        rowsBySubjID = {i['SubjectID']: i for i in df.to_dict('records')}
+        infoList = []
+        for iSubj in _iterRaw(self):
+            mm = {k: v for k, v in rowsBySubjID.get(iSubj.subjID, {}).items() if not pd.isna(v)}
+            ss = [mm.get(i, "Unknown") for i in INFO_KEYS] + [f"{getAgeFromMetaDict(mm):5.2f}", f"{mm.get('TotalDicoms', 0)}"]
+            infoList.append((ss, INFO_KEYS + ['Age', 'TotalDicoms']))
+        return infoList
+
+
     def writeSummaryCSV(self, outputFileName_csv, extra_series_tags=[]):
         data, header = [], []
-        for k0, isubj in enumerate(self):
-            ss, hh = isubj.getInfoStr()
+        for k0, (ss, hh) in enumerate(self._getInfoStrList()):
             if k0 == 0:
                 header = hh
             for k1, iSeriesTag in enumerate(extra_series_tags):
-                seList = isubj.getDicomSeriesMeta(seriesDescription=iSeriesTag)
+                seList = self[k0].getDicomSeriesMeta(seriesDescription=iSeriesTag)
                 for seDict in seList:
                     if k1 == 0:
                         kkS = sorted(seDict.keys())
@@ -1393,28 +2124,45 @@ class SubjectList(list):
 ### ====================================================================================================================
 ###  Helper functions for subject list
 ### ====================================================================================================================
-def _getAllSubjects(dataRootDir, subjectPrefix=None, SubjClass=None, RETURN_N=False):
+def _iterRaw(subjList):
+    # Iterate items without building subjects from SubjectHandles
+    if isinstance(subjList, SubjectList):
+        return list.__iter__(subjList)
+    return iter(subjList)
+
+
+def _getSubjClass(item):
+    if isinstance(item, SubjectHandle):
+        return item.SubjClass
+    return type(item)
+
+
+def _getAllSubjectHandles(dataRootDir, subjectPrefix=None, SubjClass=None):
     if SubjClass is None:
         SubjClass = get_configured_subject_class()
     if subjectPrefix is None:
         subjectPrefix = guessSubjectPrefix(dataRootDir)
-    allDir = os.listdir(dataRootDir)
-    allDir = [i for i in allDir if i.startswith(subjectPrefix)]
-    allDir = [i for i in allDir if os.path.isdir(os.path.join(dataRootDir, i))]
+    allDir = _getAllSubjIDs(dataRootDir, subjectPrefix)
+    return sorted([SubjectHandle(i, dataRootDir, subjectPrefix, SubjClass) for i in allDir], key=lambda x: x.sortKey)
+
+
+def _getAllSubjects(dataRootDir, subjectPrefix=None, SubjClass=None, RETURN_N=False):
+    subjHandles = _getAllSubjectHandles(dataRootDir, subjectPrefix, SubjClass)
+    if RETURN_N:
+        return [i.subjN for i in subjHandles]
     subjObjList = []
-    for i in allDir:
+    for i in subjHandles:
         try:
-            iSubjObj = SubjClass(i, dataRoot=dataRootDir, subjectPrefix=subjectPrefix)
+            subjObjList.append(i.build())
         except ValueError:
-            print(f"WARNING: {i} at {dataRootDir} not valid subject")
-        if iSubjObj.exists():
-            if RETURN_N:
-                subjObjList.append(iSubjObj.subjN)
-            else:
-                subjObjList.append(iSubjObj)
-        else:
-            print(f"WARNING: {i} at {dataRootDir} not valid subject")
-    return sorted(subjObjList)
+            print(f"WARNING: {i.subjID} at {dataRootDir} not valid subject")
+    return subjObjList
+
+
+def _getAllSubjIDs(dataRootDir, subjectPrefix):
+    """Get all subject directory names in dataRootDir starting with subjectPrefix (from cached dataRoot listing)
+    """
+    return scanDataRoot(dataRootDir).getSubjectDirNames(subjectPrefix)
 
 
 def getAllSubjects(dataRootDir, subjectPrefix=None, SubjClass=None):
@@ -1464,6 +2212,81 @@ def _getDateDiff_days(dateA, dateB):
     return (dateA - dateB).days
 
 
+def studyDatesToDatetime64(dates_YYYYMMDD):
+    """Convert DICOM dates (YYYYMMDD) to a numpy datetime64[D] array
+
+    Args:
+        dates_YYYYMMDD (list): dates as str or int (None or invalid allowed)
+
+    Returns:
+        numpy.ndarray: datetime64[D] array (NaT where date not valid)
+    """
+    dd = pd.Series(list(dates_YYYYMMDD), dtype=object).astype(str)
+    return pd.to_datetime(dd, format='%Y%m%d', errors='coerce').to_numpy().astype('datetime64[D]')
+
+
+def _splitDicomName(name):
+    """Split DICOM PatientName (Family^Given^Middle) to name, firstNames"""
+    parts = name.split("^")
+    if len(parts) == 1:
+        return parts[0], ""
+    name = parts[0]
+    firstNames = "_".join(parts[1:])
+    return spydcm.dcmTools.cleanString(name), spydcm.dcmTools.cleanString(firstNames)
+
+
+def getAgeFromMetaDict(metaDict):
+    """Get age (years) from a subject meta dictionary. 
+    Uses (in order): 'Age', PatientBirthDate and StudyDate, PatientAge (DICOM age string e.g. 045Y).
+    See AbstractSubject.getAge
+
+    Args:
+        metaDict (dict): subject meta dictionary
+
+    Returns:
+        float: age in years (nan if not found)
+    """
+    dd = metaDict
+    if "Age" in dd:
+        return float(dd["Age"])
+    try:
+        birth = dd["PatientBirthDate"]
+        study = dd["StudyDate"]
+        return (spydcm.dcmTools.dbDateToDateTime(study) - spydcm.dcmTools.dbDateToDateTime(birth)).days / 365.0
+    except (KeyError, ValueError):
+        try:
+            ageStr = dd['PatientAge']
+        except KeyError: # Found no tags to provide age information
+            return np.nan
+    age = np.nan
+    try:
+        age = float(ageStr)
+    except ValueError:
+        ageStrL = ageStr.lower()
+        if "y" in ageStrL:
+            factor = 1.0
+            ageC = ageStrL.replace('y', '')
+        elif "m" in ageStrL:
+            factor = 1/12.0
+            ageC = ageStrL.replace('m', '')
+        elif "w" in ageStrL:
+            factor = 1/52.0
+            ageC = ageStrL.replace('w', '')
+        elif "d" in ageStrL:
+            factor = 1 / 365.0
+            ageC = ageStrL.replace('d', '')
+        elif "h" in ageStrL:
+            factor = 1 / (365.0 * 24.0)
+            ageC = ageStrL.replace('h', '')
+        # Now have a cleaned age string and a factor to convert to years (as decimal)
+        try:
+            age = float(ageC) * factor
+        except: # Probably ValueError or UnboundLocalError (ageC not set) but catch all in case
+            # failed so return nan
+            return np.nan
+    return age
+
+
 def doDatesMatch(dateA, dateB, tolerance_days=1):
     dateDiff_days = _getDateDiff_days(dateA, dateB)
     return abs(dateDiff_days) < tolerance_days
@@ -1480,8 +2303,85 @@ def findSubjMatchingDicomStudyUID(dicomDir_OrData, dataRoot, subjPrefix=None, Su
         queryUID = dicomDir_OrData.getTag('StudyInstanceUID', ifNotFound=None)
     if queryUID is None: 
         return None
-    SubjList = SubjectList.setByDirectory(dataRoot=dataRoot, subjectPrefix=subjPrefix, SubjClass=SubjClass)
-    return SubjList.findSubjMatchingStudyUID(queryUID)
+    try:
+        matchingIDs = mi_catalog.getCatalog(dataRoot).findSubjIDsMatchingStudyUID(queryUID)
+    except mi_catalog.CATALOG_ERRORS:
+        SubjList = SubjectList.setByDirectory(dataRoot=dataRoot, subjectPrefix=subjPrefix, SubjClass=SubjClass)
+        return SubjList.findSubjMatchingStudyUID(queryUID)
+    if len(matchingIDs) == 0:
+        return None
+    if subjPrefix is None:
+        subjPrefix = guessSubjectPrefix(dataRoot)
+    for iSubjID in sorted(matchingIDs):
+        if (not iSubjID.startswith(subjPrefix)) or (not os.path.isdir(os.path.join(dataRoot, iSubjID))):
+            continue
+        try:
+            return SubjClass(iSubjID, dataRoot=dataRoot, subjectPrefix=subjPrefix)
+        except ValueError:
+            continue
+    return None
+
+
+def _getSubjIDsWithIncompleteLoad(dataRoot, subjPrefix):
+    return sorted([i for i in _getAllSubjIDs(dataRoot, subjPrefix) 
+                   if os.path.isfile(os.path.join(dataRoot, i, 'META', mi_journal.JOURNAL_FILE))])
+
+
+def findSubjWithIncompleteLoad(source, dataRoot, subjPrefix=None, SubjClass=None):
+    """Find subject with an interrupted load (see mi_journal) of source
+
+    Args:
+        source (str): directory (or archive) of the load
+        dataRoot (str): path to root directory of subject filesystem database
+        subjPrefix (str, optional): subject prefix. Defaults to None - guess from dataRoot.
+        SubjClass (subclass of AbstractSubject, optional): Defaults to None - configured subject class.
+
+    Returns:
+        AbstractSubject: subject with interrupted load of source or None
+    """
+    if SubjClass is None:
+        SubjClass = get_configured_subject_class()
+    try:
+        if subjPrefix is None:
+            subjPrefix = guessSubjectPrefix(dataRoot, QUIET=True)
+    except mi_utils.SubjPrefixError:
+        return None # Empty dataRoot
+    source = os.path.abspath(source)
+    for iSubjID in _getSubjIDsWithIncompleteLoad(dataRoot, subjPrefix):
+        try:
+            iSubj = SubjClass(iSubjID, dataRoot=dataRoot, subjectPrefix=subjPrefix)
+        except ValueError:
+            continue
+        state = iSubj.getLoadJournal().read()
+        if (state is not None) and (state['source'] == source):
+            return iSubj
+    return None
+
+
+def resumeIncompleteLoads(dataRoot, subjPrefix=None, SubjClass=None):
+    """Resume all interrupted loads in dataRoot (subjects with a load journal - see AbstractSubject.resumeLoad)
+
+    Args:
+        dataRoot (str): path to root directory of subject filesystem database
+        subjPrefix (str, optional): subject prefix. Defaults to None - guess from dataRoot.
+        SubjClass (subclass of AbstractSubject, optional): Defaults to None - configured subject class.
+
+    Returns:
+        list: subjects resumed
+    """
+    if SubjClass is None:
+        SubjClass = get_configured_subject_class()
+    try:
+        if subjPrefix is None:
+            subjPrefix = guessSubjectPrefix(dataRoot, QUIET=True)
+    except mi_utils.SubjPrefixError:
+        return [] # Empty dataRoot
+    resumed = []
+    for iSubjID in _getSubjIDsWithIncompleteLoad(dataRoot, subjPrefix):
+        iSubj = SubjClass(iSubjID, dataRoot=dataRoot, subjectPrefix=subjPrefix)
+        if iSubj.resumeLoad():
+            resumed.append(iSubj)
+    return resumed
 
 
 ### ====================================================================================================================
@@ -1514,6 +2414,80 @@ def findZeroPadding(subjID):
         return 0  # If no number found, return 0
 
 
+# ====================================================================================================
+#       DATAROOT LISTING
+# ====================================================================================================
+DATAROOT_SCAN_TTL_SEC = 2.0 # Listing reused while dataRoot unchanged (by mtime) and younger than this
+_DATAROOT_SCANS = {}
+
+class DataRootScan(object):
+    """
+    Single os.scandir listing of a dataRoot. Holds the set of directory names and, 
+    for names splitting to prefix + number (see splitSubjID), the number of directories and highest 
+    number per prefix. 
+    """
+    def __init__(self, dataRootDir) -> None:
+        self.dataRoot = dataRootDir
+        self.rootMtime = os.stat(dataRootDir).st_mtime_ns
+        self.scanTime = time.monotonic()
+        self.dirNames = set()
+        self.subjNs = {} # dirName: number
+        self.prefixCounts = {}
+        self.prefixMaxN = {}
+        with os.scandir(dataRootDir) as it:
+            for entry in it:
+                if not entry.is_dir():
+                    continue
+                self.dirNames.add(entry.name)
+                try:
+                    prefix_N_suffix = splitSubjID(entry.name)
+                    prefix = prefix_N_suffix[0]
+                    N = prefix_N_suffix[1]
+                except (ValueError, IndexError): 
+                    continue # directory not correct format - could not split to integer
+                self.subjNs[entry.name] = N
+                self.prefixCounts[prefix] = self.prefixCounts.get(prefix, 0) + 1
+                self.prefixMaxN[prefix] = max(self.prefixMaxN.get(prefix, N), N)
+
+
+    def isCurrent(self):
+        try:
+            return ((time.monotonic() - self.scanTime) < DATAROOT_SCAN_TTL_SEC) and \
+                    (os.stat(self.dataRoot).st_mtime_ns == self.rootMtime)
+        except OSError:
+            return False
+
+
+    def getSubjectDirNames(self, subjectPrefix):
+        return [i for i in self.dirNames if i.startswith(subjectPrefix)]
+
+
+    def getMaxSubjN(self, subjectPrefix):
+        """Highest number of directories starting with subjectPrefix (0 if none)"""
+        return max([N for i, N in self.subjNs.items() if i.startswith(subjectPrefix)], default=0)
+
+
+def scanDataRoot(dataRootDir):
+    """Get (cached) listing of dataRoot - see DataRootScan
+
+    Args:
+        dataRootDir (str): path to root directory of subject filesystem database
+
+    Returns:
+        DataRootScan: listing of dataRoot
+    """
+    key = os.path.abspath(dataRootDir)
+    scan = _DATAROOT_SCANS.get(key, None)
+    if (scan is None) or (not scan.isCurrent()):
+        scan = DataRootScan(key)
+        _DATAROOT_SCANS[key] = scan
+    return scan
+
+
+def clearDataRootScan(dataRootDir):
+    _DATAROOT_SCANS.pop(os.path.abspath(dataRootDir), None)
+
+
 def guessSubjectPrefix(dataRootDir, QUIET=False):
     """Guess the subject prefix by looking for common names in the dataRootDir
 
@@ -1527,20 +2501,11 @@ def guessSubjectPrefix(dataRootDir, QUIET=False):
     Exception:
         mi_utils.SubjPrefixError: is ambiguous
     """
-    allDir = [i for i in os.listdir(dataRootDir) if os.path.isdir(os.path.join(dataRootDir, i))]
-    allDir_subj = {}
-    for i in allDir:
-        try:
-            prefix_N_suffix = splitSubjID(i)
-            prefix = prefix_N_suffix[0]
-            N = prefix_N_suffix[1]
-        except (ValueError, IndexError): 
-            continue # directory not correct format - could not split to integer
-        allDir_subj.setdefault(prefix, []).append(N)
-    options = list(allDir_subj.keys())
+    prefixCounts = scanDataRoot(dataRootDir).prefixCounts
+    options = list(prefixCounts.keys())
     if len(options) == 0:
         raise mi_utils.SubjPrefixError("Error guessing subject prefix - ambiguous - please provide")
-    counts = [len(allDir_subj[i]) for i in options]
+    counts = [prefixCounts[i] for i in options]
     maxCount = np.argmax(counts)
     if options.count(options[maxCount]) != 1:
         raise mi_utils.SubjPrefixError("Error guessing subject prefix - ambiguous - please provide")
@@ -1552,6 +2517,62 @@ def guessSubjectPrefix(dataRootDir, QUIET=False):
 ### ====================================================================================================================
 ###  Helper functions for building new or adding to subjects
 ### ====================================================================================================================
+def readDicomHeaders(dirName, nThreads=None):
+    """Read DICOM headers (stop_before_pixels) of all files under dirName using a bounded thread pool. 
+    Each read is dominated by open / read latency on network storage (NFS / SMB), so reads are overlapped. 
+
+    Args:
+        dirName (str): directory to search for DICOMS
+        nThreads (int, optional): number of reader threads. Defaults to None - config header_read_threads.
+
+    Returns:
+        dict: {StudyInstanceUID: {SeriesInstanceUID: [pydicom datasets]}} - as spydcmtk organiseDicomHeirarchyByUIDs 
+    """
+    if nThreads is None:
+        nThreads = mi_utils.MIResearch_config.header_read_threads
+    filesToRead = [i for i in spydcm.dcmTools.walkdir(dirName) 
+                        if ('dicomdir' not in os.path.split(i)[1].lower()) and (not i.endswith('json'))]
+    dsDict = {}
+    with ThreadPoolExecutor(max_workers=max(1, nThreads)) as executor:
+        for iDict in executor.map(_readDicomHeader, filesToRead):
+            for iStudyUID, iStudyDict in iDict.items():
+                for iSeriesUID, iDsList in iStudyDict.items():
+                    dsDict.setdefault(iStudyUID, {}).setdefault(iSeriesUID, []).extend(iDsList)
+    return dsDict
+
+
+def getSOPInstanceUIDDigest(ds):
+    """Compact (64 bit) digest of a dataset's SOPInstanceUID - used to record instances stored in a subject
+
+    Args:
+        ds (pydicom dataset): DICOM dataset (header)
+
+    Returns:
+        int: digest (None if no SOPInstanceUID)
+    """
+    sopInstanceUID = ds.get('SOPInstanceUID', None)
+    if sopInstanceUID is None:
+        return None
+    return int.from_bytes(hashlib.blake2b(str(sopInstanceUID).encode(), digest_size=8).digest(), 'little')
+
+
+def _getDicomSaveFileName(ds, SAFE_NAMING):
+    """DICOM file name as given by spydcmtk organised writer"""
+    if not SAFE_NAMING:
+        try:
+            return 'IM-%05d-%05d.dcm'%(int(ds.SeriesNumber), int(ds.InstanceNumber))
+        except (TypeError, KeyError, AttributeError):
+            pass
+    return 'IM-%s.dcm'%(ds.SOPInstanceUID)
+
+
+def _readDicomHeader(fileName):
+    try:
+        return spydcm.dcmTools.readDicomFile_intoDict(fileName, {}, OVERVIEW=True)
+    except (spydcm.dcmTools.dicom.filereader.InvalidDicomError, AttributeError):
+        return {}
+
+
 def buildSubjectID(subjN, subjectPrefix, padZeros=None, suffix=''):
     if subjN is None:
         return subjectPrefix
@@ -1563,11 +2584,7 @@ def buildSubjectID(subjN, subjectPrefix, padZeros=None, suffix=''):
 def getNextSubjN(dataRootDir, subjectPrefix=None):
     if subjectPrefix is None:
         subjectPrefix = guessSubjectPrefix(dataRootDir)
-    allNums = [getNumberFromSubjID(i) for i in os.listdir(dataRootDir) if (os.path.isdir(os.path.join(dataRootDir, i)) and  i.startswith(subjectPrefix))]
-    try:
-        return max(allNums)+1
-    except ValueError:
-        return 1
+    return scanDataRoot(dataRootDir).getMaxSubjN(subjectPrefix) + 1
 
 
 def doesSubjectExist(subjN, dataRootDir, subjectPrefix=None, padZeros=None, suffix=""):
@@ -1575,7 +2592,30 @@ def doesSubjectExist(subjN, dataRootDir, subjectPrefix=None, padZeros=None, suff
         subjectPrefix = guessSubjectPrefix(dataRootDir)
     if padZeros is None:
         padZeros = mi_utils.MIResearch_config.default_pad_zeros
-    return os.path.isdir(os.path.join(dataRootDir, buildSubjectID(subjN, subjectPrefix, padZeros=padZeros, suffix=suffix)))
+    return buildSubjectID(subjN, subjectPrefix, padZeros=padZeros, suffix=suffix) in scanDataRoot(dataRootDir).dirNames
+
+
+def reserveSubjN(dataRootDir, subjectPrefix=None):
+    """Reserve the next available subject number by creating its (empty) subject directory. 
+    Directory creation is atomic so concurrent loaders can never be given the same number.
+
+    Args:
+        dataRootDir (str): path to root directory of subject filesystem database
+        subjectPrefix (str, optional): subject prefix. Defaults to None - guess from dataRootDir.
+
+    Returns:
+        int: reserved subject number
+    """
+    if subjectPrefix is None:
+        subjectPrefix = guessSubjectPrefix(dataRootDir)
+    subjN = getNextSubjN(dataRootDir, subjectPrefix)
+    while True:
+        try:
+            os.mkdir(os.path.join(dataRootDir, buildSubjectID(subjN, subjectPrefix)))
+            clearDataRootScan(dataRootDir)
+            return subjN
+        except FileExistsError:
+            subjN += 1
 
 
 def getNextSubjID(dataRootDir, subjectPrefix=None):
@@ -1584,12 +2624,16 @@ def getNextSubjID(dataRootDir, subjectPrefix=None):
     return buildSubjectID(getNextSubjN(dataRootDir, subjectPrefix), subjectPrefix)
 
 
-def _createSubjectHelper(dicomDir_orData, SubjClass, subjNumber, dataRoot, subjPrefix, anonName, QUIET, FORCE_NEW_SUBJ=False):
+def _getSubjectForDicoms(dicomDir_orData, SubjClass, subjNumber, dataRoot, subjPrefix, QUIET, FORCE_NEW_SUBJ=False, 
+                         source=None):
     if FORCE_NEW_SUBJ:
         newSubj = None
     else:
         # Check if a subject already exists with dicom data matching input
         newSubj = findSubjMatchingDicomStudyUID(dicomDir_orData, dataRoot, subjPrefix, SubjClass)
+    if (newSubj is None) and (source is not None):
+        # Or has an interrupted load of this source (meta not yet built) - load resumes
+        newSubj = findSubjWithIncompleteLoad(source, dataRoot, subjPrefix, SubjClass)
     if newSubj is not None:
         # Subject exists - so check nothing conflicting from inputs
         if subjNumber is not None:
@@ -1597,39 +2641,126 @@ def _createSubjectHelper(dicomDir_orData, SubjClass, subjNumber, dataRoot, subjP
                 raise ValueError(f"You supplied subject number {subjNumber} but a different subject matching your input dicom study exists at {newSubj.subjN}")
         print(f"Found existing subject {newSubj.subjID} at {dataRoot} - adding to")
     
-    # If no subject exists matching the inputs - define a new subject (increment subjN from current in root directory)
+    # If no subject exists matching the inputs - define a new subject (next subjN in root directory - reserved so 
+    # concurrent loads can not be given the same number)
     if newSubj is None: 
+        RESERVED = subjNumber is None
         subjNumber = _subjNumberHelper(dataRoot=dataRoot, subjNumber=subjNumber, subjPrefix=subjPrefix)
         newSubj = SubjClass(subjNumber, dataRoot, subjectPrefix=subjPrefix)
+        reservedDir = os.path.join(dataRoot, buildSubjectID(subjNumber, newSubj.subjectPrefix))
+        if RESERVED and (os.path.abspath(newSubj.getTopDir()) != os.path.abspath(reservedDir)):
+            try: # Subject class naming differs (e.g. suffix) - release reserved directory
+                os.rmdir(reservedDir)
+            except OSError:
+                pass
     newSubj.QUIET = QUIET
+    return newSubj
+
 
+def _createSubjectHelper(dicomDir_orData, SubjClass, subjNumber, dataRoot, subjPrefix, anonName, QUIET, FORCE_NEW_SUBJ=False, 
+                         transferMode=None):
+    newSubj = _getSubjectForDicoms(dicomDir_orData, SubjClass, subjNumber=subjNumber, dataRoot=dataRoot, 
+                                   subjPrefix=subjPrefix, QUIET=QUIET, FORCE_NEW_SUBJ=FORCE_NEW_SUBJ, 
+                                   source=dicomDir_orData if isinstance(dicomDir_orData, (str, Path)) else None)
     # Now have a subject - either newly created or existing and matching dicom data - load dicoms to subject:
     if isinstance(dicomDir_orData, (str, Path)):
-        newSubj.loadDicomsToSubject(dicomDir_orData, anonName=anonName, HIDE_PROGRESSBAR=QUIET)
+        newSubj.loadDicomsToSubject(dicomDir_orData, anonName=anonName, HIDE_PROGRESSBAR=QUIET, transferMode=transferMode)
     else:
         newSubj.loadSpydcmStudyToSubject(dicomDir_orData, anonName=anonName)
     #
     return newSubj
 
 
-def _createNewSubject_Compressed(compressedFile, dataRoot, SubjClass=None, 
-                                subjNumber=None, subjPrefix=None, anonName=None, QUIET=False):
-    if SubjClass is None:
-        SubjClass = get_configured_subject_class()
+def _iterArchiveMembers(compressedFile):
+    """Yield (member name, member bytes) for each file in a zip, tar or tar.gz archive - one member at a time"""
     if compressedFile.endswith('zip'):
-        listOfSubjects = spydcm.dcmTK.ListOfDicomStudies.setFromZip(compressedFile, HIDE_PROGRESSBAR=QUIET)
+        with ZipFile(compressedFile) as zf:
+            for iInfo in zf.infolist():
+                if not iInfo.is_dir():
+                    yield iInfo.filename, zf.read(iInfo)
     elif compressedFile.endswith('tar') or compressedFile.endswith('tar.gz'):
-        listOfSubjects = spydcm.dcmTK.ListOfDicomStudies.setFromTar(compressedFile, HIDE_PROGRESSBAR=QUIET)
+        with tarfile.open(compressedFile, 'r|*') as tf: # stream mode - members read sequentially
+            for iMember in tf:
+                if iMember.isfile():
+                    yield iMember.name, tf.extractfile(iMember).read()
     else: 
         raise ValueError("Currently only supporting .zip, .tar and .tar.gz compressed files")
-    if len(listOfSubjects) > 1:
-        if subjNumber is not None:
-            raise ValueError(f"More than one study in {compressedFile} - can not supply subjNumber")
+
+
+def _createNewSubject_Compressed(compressedFile, dataRoot, SubjClass=None, 
+                                subjNumber=None, subjPrefix=None, anonName=None, QUIET=False):
+    """Load DICOMS from a zip, tar or tar.gz archive - one subject per study. 
+    Archive members are streamed: each is read, its header parsed and written to its organised destination 
+    (as spydcmtk organised writer, or anonymised as written) before the next, so memory use does not grow with archive size.
+    """
+    if SubjClass is None:
+        SubjClass = get_configured_subject_class()
+    dicom = spydcm.dcmTools.dicom
+    loadsByStudyUID = {} # StudyInstanceUID: [subject, initial number dicoms, number loaded, anonymise (name, ID), stored SOPInstanceUID digests]
+    seriesOutputs, writtenFiles = {}, set()
+    with mi_utils.timeLoadStage('write'): # Archive members are read and written in one pass
+        for memberName, memberBytes in _iterArchiveMembers(compressedFile):
+            if 'dicomdir' in os.path.split(memberName)[1].lower():
+                continue
+            try:
+                ds = dicom.dcmread(io.BytesIO(memberBytes), stop_before_pixels=True)
+                studyUID, seriesUID = str(ds.StudyInstanceUID), str(ds.SeriesInstanceUID)
+            except (dicom.filereader.InvalidDicomError, AttributeError):
+                continue
+            if studyUID not in loadsByStudyUID:
+                if (subjNumber is not None) and (len(loadsByStudyUID) > 0):
+                    raise ValueError(f"More than one study in {compressedFile} - can not supply subjNumber")
+                iSubj = _getSubjectForDicoms(spydcm.dcmTK.DicomSeries([ds], OVERVIEW=True), SubjClass, subjNumber=subjNumber, 
+                                             dataRoot=dataRoot, subjPrefix=subjPrefix, QUIET=QUIET, source=compressedFile)
+                iSubj.initDirectoryStructure()
+                iSubj.logger.info(f"LoadDicoms (archive stream ==> {iSubj.getDicomsDir()})")
+                journal = iSubj.getLoadJournal()
+                resumeState = journal.read()
+                if (resumeState is not None) and (resumeState['source'] == os.path.abspath(compressedFile)):
+                    iSubj.logger.info("LoadDicoms: resuming interrupted archive load")
+                    anonNameID = resumeState['anonNameID']
+                else:
+                    anonNameID = iSubj._getAnonymiseOnWrite(anonName, ds)
+                    journal.begin(compressedFile, anonName, None, anonNameID)
+                loadsByStudyUID[studyUID] = [iSubj, iSubj.countNumberOfDicoms(), 0, anonNameID, 
+                                             iSubj.getStoredSOPInstanceUIDDigests()]
+            iSubj, anonNameID, storedDigests = [loadsByStudyUID[studyUID][i] for i in [0, 3, 4]]
+            if getSOPInstanceUIDDigest(ds) in storedDigests:
+                continue
+            if anonNameID is not None:
+                iSubj._writeDatasetAnonymised(dicom.dcmread(io.BytesIO(memberBytes)), *anonNameID, 
+                                              IS_COMPRESSED=spydcm.dcmTK.DicomSeries([ds]).isCompressed())
+                loadsByStudyUID[studyUID][2] += 1
+                continue
+            if seriesUID not in seriesOutputs:
+                dcmSeries = spydcm.dcmTK.DicomSeries([ds], OVERVIEW=True)
+                seriesOutputDir = os.path.join(dcmSeries.getStudyOutputDir(iSubj.getDicomsDir()), 
+                                               dcmSeries.getSeriesOutDirName())
+                os.makedirs(seriesOutputDir, exist_ok=True)
+                seriesOutputs[seriesUID] = (seriesOutputDir, dcmSeries.isCompressed())
+            seriesOutputDir, IS_COMPRESSED = seriesOutputs[seriesUID]
+            destFile = os.path.join(seriesOutputDir, _getDicomSaveFileName(ds, False))
+            if destFile in writtenFiles: # SeriesNumber, InstanceNumber not unique - use SOPInstanceUID
+                destFile = os.path.join(seriesOutputDir, _getDicomSaveFileName(ds, True))
+            writtenFiles.add(destFile)
+            if IS_COMPRESSED:
+                ds = dicom.dcmread(io.BytesIO(memberBytes))
+                ds.decompress()
+                ds.save_as(destFile, enforce_file_format=True)
+            else:
+                with open(destFile, 'wb') as fid:
+                    fid.write(memberBytes)
+            loadsByStudyUID[studyUID][2] += 1
     newSubjList = []
-    for i in listOfSubjects:
-        newSubj = _createSubjectHelper(i, SubjClass, subjNumber=subjNumber, dataRoot=dataRoot, 
-                                        subjPrefix=subjPrefix, anonName=anonName, QUIET=QUIET)
-        newSubjList.append(newSubj)
+    for iSubj, d0, dI, anonNameID, _ in loadsByStudyUID.values():
+        journal = iSubj.getLoadJournal()
+        if (dI == 0) and (journal.pendingSteps() == mi_journal.LOAD_STEPS):
+            iSubj.logger.info("LoadDicoms: all instances already stored - nothing loaded")
+            journal.end()
+        else:
+            journal.recordStep(mi_journal.STEP_WRITE)
+            iSubj._finalLoadSteps(d0, dI, anonName=anonName, ANONYMISED_ON_WRITE=anonNameID is not None)
+        newSubjList.append(iSubj)
     if len(newSubjList) == 1:
         return newSubjList[0]
     return newSubjList
@@ -1637,7 +2768,7 @@ def _createNewSubject_Compressed(compressedFile, dataRoot, SubjClass=None,
 
 def _subjNumberHelper(dataRoot, subjNumber, subjPrefix):
     if subjNumber is None:
-        subjNumber = getNextSubjN(dataRoot, subjPrefix)
+        subjNumber = reserveSubjN(dataRoot, subjPrefix)
     else:
         if doesSubjectExist(subjNumber, dataRoot, subjPrefix):
             raise ValueError("Subject already exists - use loadDicomsToSubject method to add data to existing subject.")
@@ -1646,7 +2777,7 @@ def _subjNumberHelper(dataRoot, subjNumber, subjPrefix):
 
 def _createNew_OrAddTo_Subject(dicomDirToLoad, dataRoot, SubjClass=None, 
                      subjNumber=None, subjPrefix=None, anonName=None, QUIET=False, IGNORE_UIDS=False,
-                     OTHER_DATA_DIR=None):
+                     OTHER_DATA_DIR=None, transferMode=None):
     if SubjClass is None:
         SubjClass = get_configured_subject_class()
     if not os.path.isdir(dataRoot):
@@ -1662,7 +2793,7 @@ def _createNew_OrAddTo_Subject(dicomDirToLoad, dataRoot, SubjClass=None,
         raise IOError(f"Can not find valid dicoms under {dicomDirToLoad}")
     newSubj = _createSubjectHelper(dicomDirToLoad, SubjClass, subjNumber=subjNumber, dataRoot=dataRoot, 
                                     subjPrefix=subjPrefix, anonName=anonName, QUIET=QUIET, 
-                                    FORCE_NEW_SUBJ=IGNORE_UIDS)
+                                    FORCE_NEW_SUBJ=IGNORE_UIDS, transferMode=transferMode)
     if OTHER_DATA_DIR is not None:
         newSubj.addOtherData(OTHER_DATA_DIR)
     #
@@ -1672,7 +2803,7 @@ def _createNew_OrAddTo_Subject(dicomDirToLoad, dataRoot, SubjClass=None,
 def _createNew_OrAddTo_Subjects_Multi(multiDicomDirToLoad, dataRoot, 
                                        SubjClass=None, subjPrefix=None, 
                                        anonName=None, 
-                                       IGNORE_UIDS=False, QUIET=False):
+                                       IGNORE_UIDS=False, QUIET=False, workers=1, transferMode=None):
     if SubjClass is None:
         SubjClass = get_configured_subject_class()
     if anonName not in [None, "SOFT", "HARD"]:
@@ -1691,6 +2822,11 @@ def _createNew_OrAddTo_Subjects_Multi(multiDicomDirToLoad, dataRoot,
             print(f"WARNING: No valid dicoms found under {iDir}")
     if len(dirsToLoad_checked) == 0:
         raise IOError(f"Can not find valid dicoms under {multiDicomDirToLoad}")
+    if workers > 1:
+        return _createNew_OrAddTo_Subjects_Parallel(dirsToLoad_checked, dataRoot=dataRoot, SubjClass=SubjClass, 
+                                                     subjPrefix=subjPrefix, anonName=anonName, 
+                                                     IGNORE_UIDS=IGNORE_UIDS, QUIET=QUIET, workers=workers, 
+                                                     transferMode=transferMode)
     newSubjsList = []
     for iDir in dirsToLoad_checked:
         newSubj = _createNew_OrAddTo_Subject(iDir, 
@@ -1699,17 +2835,98 @@ def _createNew_OrAddTo_Subjects_Multi(multiDicomDirToLoad, dataRoot,
                                              subjPrefix=subjPrefix,
                                              anonName=anonName,
                                              QUIET=QUIET,
-                                             IGNORE_UIDS=IGNORE_UIDS)
+                                             IGNORE_UIDS=IGNORE_UIDS,
+                                             transferMode=transferMode)
         print(f"Loaded {iDir} to {newSubj}")
         newSubjsList.append(newSubj)
     return newSubjsList
 
 
+def _createNew_OrAddTo_Subjects_Parallel(dirsToLoad, dataRoot, SubjClass, subjPrefix, anonName, IGNORE_UIDS, QUIET, workers, 
+                                         transferMode=None):
+    """Load each directory to a subject using a pool of worker processes. 
+    Subject numbers are assigned up front: directories sharing a StudyInstanceUID go to the same subject 
+    (existing subject if matched in dataRoot, else a number reserved by reserveSubjN) and are loaded by one worker.
+
+    Returns:
+        list: subject objects in order of dirsToLoad
+
+    Raises:
+        mi_utils.MultiLoadError: if any directory fails to load (holds all results in order of dirsToLoad)
+    """
+    if subjPrefix is None:
+        subjPrefix = guessSubjectPrefix(dataRoot)
+    dirsBySubjN, subjNs, reservedNs, studyUIDToSubjN = {}, [], [], {}
+    for iDir in dirsToLoad:
+        studyUID = None if IGNORE_UIDS else spydcm.returnFirstDicomFound(iDir).get('StudyInstanceUID', None)
+        if studyUID in studyUIDToSubjN:
+            subjN = studyUIDToSubjN[studyUID]
+        else:
+            existingSubj = None if IGNORE_UIDS else findSubjMatchingDicomStudyUID(iDir, dataRoot, subjPrefix, SubjClass)
+            if existingSubj is not None:
+                subjN = existingSubj.subjN
+            else:
+                subjN = reserveSubjN(dataRoot, subjPrefix)
+                reservedNs.append(subjN)
+            if studyUID is not None:
+                studyUIDToSubjN[studyUID] = subjN
+        dirsBySubjN.setdefault(subjN, []).append(iDir)
+        subjNs.append(subjN)
+    #
+    resultsByDir = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {subjN: executor.submit(_loadDirsToSubjN, iDirs, subjN, dataRoot, SubjClass, subjPrefix, anonName, QUIET, transferMode) 
+                                                    for subjN, iDirs in dirsBySubjN.items()}
+        for subjN, iFuture in futures.items():
+            try:
+                resultsByDir.update(zip(dirsBySubjN[subjN], iFuture.result()))
+            except Exception as e: # worker process failed
+                resultsByDir.update({iDir: f"{type(e).__name__}: {e}" for iDir in dirsBySubjN[subjN]})
+    clearDataRootScan(dataRoot)
+    for subjN in reservedNs: # Release numbers not used (directory still empty)
+        try:
+            os.rmdir(os.path.join(dataRoot, buildSubjectID(subjN, subjPrefix)))
+        except OSError:
+            pass
+    #
+    results, errors = [], []
+    for iDir, subjN in zip(dirsToLoad, subjNs):
+        if resultsByDir[iDir] is None:
+            newSubj = SubjClass(subjN, dataRoot, subjectPrefix=subjPrefix)
+            print(f"Loaded {iDir} to {newSubj}")
+            results.append(newSubj)
+        else:
+            print(f"ERROR loading {iDir}: {resultsByDir[iDir]}")
+            results.append(resultsByDir[iDir])
+            errors.append(f"{iDir}: {resultsByDir[iDir]}")
+    if len(errors) > 0:
+        raise mi_utils.MultiLoadError(results, errors)
+    return results
+
+
+def _loadDirsToSubjN(dirsToLoad, subjN, dataRoot, SubjClass, subjPrefix, anonName, QUIET, transferMode=None):
+    """Worker for _createNew_OrAddTo_Subjects_Parallel: load directories (in order) to subject number subjN
+
+    Returns:
+        list: None (loaded) or error message for each directory
+    """
+    errors = []
+    for iDir in dirsToLoad:
+        try:
+            iSubj = SubjClass(subjN, dataRoot, subjectPrefix=subjPrefix)
+            iSubj.QUIET = QUIET
+            iSubj.loadDicomsToSubject(iDir, anonName=anonName, HIDE_PROGRESSBAR=True, transferMode=transferMode)
+            errors.append(None)
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+    return errors
+
+
 ### ====================================================================================================================
 def createNew_OrAddTo_Subject(loadDirectory, dataRoot, SubjClass=None, 
                            subjNumber=None, subjPrefix=None, anonName=None, 
                            LOAD_MULTI=False, IGNORE_UIDS=False, QUIET=False,
-                           OTHER_DATA_DIR=None):
+                           OTHER_DATA_DIR=None, workers=1, transferMode=None):
     """Used to create a new subject (or add data to already existing subject) from an input directory (or compressed file).
     Current compressed file tpyes supported: zip, tar, tar.gz
 
@@ -1724,8 +2941,12 @@ def createNew_OrAddTo_Subject(loadDirectory, dataRoot, SubjClass=None,
         IGNORE_UIDS (bool, optional): If true then ignore dicom UIDs and each sub-directory in "loadDirectory" will DEFINITLY be a new subject. Defaults to False.
         QUIET (bool, optional): If true will supress output. Defaults to False.
         OTHER_DATA_DIR (str, optional): If given then add other data (non-dicoms) from this directory to the subject. Defaults to None.
+        workers (int, optional): Number of processes to load sub-directories in parallel (with LOAD_MULTI). Defaults to 1.
+        transferMode (str, optional): How DICOMS are placed in subject: copy, move, hardlink or reflink 
+                                    (see AbstractSubject.loadDicomsToSubject). Defaults to None - config transfer_mode.
     Raises:
         ValueError: If incompatible arguments given (can not give subjNumber if LOAD_MULTI is given)
+        mi_utils.MultiLoadError: If any sub-directory fails to load in parallel (workers > 1)
 
     Returns:
         list: list of Subject Objects added to or created
@@ -1741,7 +2962,9 @@ def createNew_OrAddTo_Subject(loadDirectory, dataRoot, SubjClass=None,
                                        subjPrefix=subjPrefix, 
                                        IGNORE_UIDS=IGNORE_UIDS,
                                        anonName=anonName,
-                                       QUIET=QUIET)) 
+                                       QUIET=QUIET,
+                                       workers=workers,
+                                       transferMode=transferMode)) 
     else:
         return SubjectList([_createNew_OrAddTo_Subject(loadDirectory, 
                                 dataRoot=dataRoot,
@@ -1750,7 +2973,8 @@ def createNew_OrAddTo_Subject(loadDirectory, dataRoot, SubjClass=None,
                                 subjPrefix=subjPrefix, 
                                 anonName=anonName, 
                                 QUIET=QUIET,
-                                OTHER_DATA_DIR=OTHER_DATA_DIR)])
+                                OTHER_DATA_DIR=OTHER_DATA_DIR,
+                                transferMode=transferMode)])
     
 ### ====================================================================================================================
 ### ====================================================================================================================
\ No newline at end of file
@@ -2,6 +2,14 @@ import os
 import base64
 import csv
 import datetime
+import shutil
+import time
+import threading
+from contextlib import contextmanager
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
 
 from hurahura.mi_config import MIResearch_config
 
@@ -61,6 +69,9 @@ DEFAULT_DICOM_META_TAG_LIST_SERIES = [
 DEFAULT_DICOM_TIME_FORMAT = "%H%M%S" # TODO to config (and above) - or from spydcmtk
 
 abcList = 'abcdefghijklmnopqrstuvwxyz'
+TRANSFER_MODES = ['copy', 'move', 'hardlink', 'reflink']
+FICLONE = 0x40049409 # linux ioctl: share extents of source file (btrfs, xfs, ...)
+LOAD_STAGES = ['scan', 'write', 'meta', 'anon', 'postload'] # Timed by timeLoadStage
 UNKNOWN = 'UNKNOWN'
 META = "META"
 RAW = "RAW"
@@ -164,6 +175,234 @@ def countFilesInDir(dirName):
             N += len(filenames)
     return N
 
+def countFilesAndBytes(path):
+    """Number of files and total size (bytes) of a directory (recursive) or single file (e.g. an archive)"""
+    if os.path.isfile(path):
+        return 1, os.path.getsize(path)
+    nFiles, nBytes = 0, 0
+    for foldername, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                nBytes += os.path.getsize(os.path.join(foldername, filename))
+                nFiles += 1
+            except OSError:
+                pass
+    return nFiles, nBytes
+
+#==================================================================
+class DirectoryFingerprinter(object):
+    """Incremental fingerprint of directory trees - (latest mtime, number of directories, files, bytes). 
+    Each directory's own mtime and entries (files: count, bytes, latest mtime; subdirectories) are cached from 
+    os.scandir. On later calls every cached directory is stat-ed but only those whose own mtime changed 
+    (an entry added, removed or renamed) are scanned again - so a poll of a deep tree (e.g. patient / study / 
+    series / instance) costs a stat per directory plus a scan of the changed ones, not a stat per file. 
+    NOTE: a file rewritten in place does not change its directory mtime so is not seen until that directory 
+    is next scanned.
+
+    Args:
+        racyWindow (float, optional): seconds - a directory modified within this time of being scanned is 
+            scanned again on the next call (entries added in the same mtime tick as the scan would otherwise 
+            be missed). Defaults to 2.0 (coarsest common mtime resolution - FAT).
+    """
+    def __init__(self, racyWindow=2.0) -> None:
+        self.racyWindow = racyWindow
+        self._cache = {} # path: {'mtime', 'nEntries', 'racy', 'subdirs', 'nFiles', 'nBytes', 'maxMtime'}
+        self.nScanned = 0 # Directories scanned by last fingerprint call
+
+    def _scanDirectory(self, path, mtime):
+        scanStart = time.time_ns()
+        subdirs, nFiles, nBytes, maxMtime = [], 0, 0, mtime
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    else:
+                        st = entry.stat(follow_symlinks=False)
+                        nFiles += 1
+                        nBytes += st.st_size
+                        maxMtime = max(maxMtime, st.st_mtime_ns)
+                except OSError: # Removed while scanning
+                    continue
+        self.nScanned += 1
+        return {'mtime': mtime, 'nEntries': len(subdirs)+nFiles, 'racy': mtime >= scanStart - int(self.racyWindow*1e9),
+                'subdirs': subdirs, 'nFiles': nFiles, 'nBytes': nBytes, 'maxMtime': maxMtime}
+
+    def _update(self, path):
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            self.forget(path)
+            return None
+        record = self._cache.get(path, None)
+        if (record is None) or record['racy'] or (record['mtime'] != mtime):
+            try:
+                newRecord = self._scanDirectory(path, mtime)
+            except OSError:
+                self.forget(path)
+                return None
+            if record is not None:
+                for iSubdir in set(record['subdirs']).difference(newRecord['subdirs']):
+                    self.forget(iSubdir)
+            record = self._cache[path] = newRecord
+        maxMtime, nDirs, nFiles, nBytes = record['maxMtime'], 1, record['nFiles'], record['nBytes']
+        for iSubdir in record['subdirs']:
+            subFingerprint = self._update(iSubdir)
+            if subFingerprint is None:
+                continue
+            maxMtime = max(maxMtime, subFingerprint[0])
+            nDirs += subFingerprint[1]
+            nFiles += subFingerprint[2]
+            nBytes += subFingerprint[3]
+        return maxMtime, nDirs, nFiles, nBytes
+
+    def fingerprint(self, directory):
+        """Fingerprint of a directory tree - scanning only directories changed since the last call
+
+        Args:
+            directory (str): directory to fingerprint
+
+        Returns:
+            tuple: latest mtime (ns) of directories and files, number of directories, files, total bytes - 
+                    None if directory does not exist
+        """
+        self.nScanned = 0
+        return self._update(os.path.abspath(directory))
+
+    def getModifiedTime(self, directory):
+        """Latest modification time (seconds) of a directory tree (directories and files) - None if not exist"""
+        fingerprint = self.fingerprint(directory)
+        return None if fingerprint is None else fingerprint[0] / 1e9
+
+    def forget(self, directory):
+        """Drop cached records of a directory tree"""
+        record = self._cache.pop(os.path.abspath(directory), None)
+        if record is not None:
+            for iSubdir in record['subdirs']:
+                self.forget(iSubdir)
+
+#==================================================================
+# Per process accumulated time (seconds) of each load stage (see LOAD_STAGES)
+_LOAD_STAGE_TIMES = {}
+_LOAD_STAGE_LOCK = threading.Lock()
+
+@contextmanager
+def timeLoadStage(stage):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _LOAD_STAGE_LOCK:
+            _LOAD_STAGE_TIMES[stage] = _LOAD_STAGE_TIMES.get(stage, 0.0) + (time.perf_counter() - t0)
+
+def getLoadStageTimes(RESET=False):
+    """Get time (seconds) accumulated in each load stage by this process
+
+    Args:
+        RESET (bool, optional): Set True to reset accumulated times to zero. Defaults to False.
+
+    Returns:
+        dict: stage: seconds for each of LOAD_STAGES
+    """
+    with _LOAD_STAGE_LOCK:
+        stageTimes = {i: _LOAD_STAGE_TIMES.get(i, 0.0) for i in LOAD_STAGES}
+        if RESET:
+            _LOAD_STAGE_TIMES.clear()
+    return stageTimes
+
+#==================================================================
+def transferFile(srcFile, destFile, transferMode='copy'):
+    """Place srcFile at destFile (overwrite if exists) by:
+        - copy: copy bytes
+        - move: rename (metadata only if on same file system)
+        - hardlink: new link to same inode (NOTE: later in place changes to either file are seen by both)
+        - reflink: copy on write clone (file system support needed, e.g. btrfs, xfs)
+    move, hardlink and reflink fall back to copy if not possible (e.g. across file systems).
+
+    Args:
+        srcFile (str): source file
+        destFile (str): destination file
+        transferMode (str, optional): one of TRANSFER_MODES. Defaults to 'copy'.
+
+    Returns:
+        str: transfer mode used
+    """
+    if transferMode not in TRANSFER_MODES:
+        raise ValueError(f"transferMode must be one of {TRANSFER_MODES}")
+    if transferMode == 'move':
+        shutil.move(srcFile, destFile) # rename if possible, else copy and remove
+        return transferMode
+    try:
+        if transferMode == 'hardlink':
+            if os.path.lexists(destFile):
+                os.remove(destFile)
+            os.link(srcFile, destFile)
+            return transferMode
+        if transferMode == 'reflink':
+            if fcntl is None:
+                raise OSError("reflink not supported on this platform")
+            with open(srcFile, 'rb') as fidSrc, open(destFile, 'wb') as fidDest:
+                fcntl.ioctl(fidDest.fileno(), FICLONE, fidSrc.fileno())
+            return transferMode
+    except OSError:
+        pass
+    shutil.copy2(srcFile, destFile)
+    return 'copy'
+
+def isDicomFile(fileName):
+    """Quick check if file is DICOM (reads first 132 bytes only): 
+    128 byte preamble followed by 'DICM', else (no preamble) file starts with a group 0002 or 0008 data element 
+    with an explicit VR or a plausible (implicit VR) value length.
+
+    Args:
+        fileName (str): file to check
+
+    Returns:
+        bool: True if file looks to be DICOM
+    """
+    try:
+        with open(fileName, 'rb') as fid:
+            header = fid.read(132)
+    except OSError:
+        return False
+    if header[128:132] == b'DICM':
+        return True
+    if len(header) < 8:
+        return False
+    if int.from_bytes(header[0:2], 'little') not in (0x0002, 0x0008):
+        return False
+    vr = header[4:6]
+    if vr.isalpha() and vr.isupper():
+        return True
+    return int.from_bytes(header[4:8], 'little') < 1024
+
+
+def fastCopyFile(srcFile, destFile):
+    """Copy file contents in kernel (copy_file_range - may be server side on network file systems, else sendfile), 
+    falling back to shutil.copyfile. File mode bits are copied (as shutil.copy).
+
+    Args:
+        srcFile (str): source file
+        destFile (str): destination file
+    """
+    try:
+        with open(srcFile, 'rb') as fidSrc, open(destFile, 'wb') as fidDest:
+            nBytes = os.fstat(fidSrc.fileno()).st_size
+            copyFunc = os.copy_file_range if hasattr(os, 'copy_file_range') else os.sendfile
+            while nBytes > 0:
+                if copyFunc is os.sendfile:
+                    nCopied = os.sendfile(fidDest.fileno(), fidSrc.fileno(), None, nBytes)
+                else:
+                    nCopied = os.copy_file_range(fidSrc.fileno(), fidDest.fileno(), nBytes)
+                if nCopied == 0:
+                    break
+                nBytes -= nCopied
+        if nBytes > 0: # File changed size while copying
+            raise OSError(f"Incomplete copy of {srcFile}")
+    except (OSError, AttributeError):
+        shutil.copyfile(srcFile, destFile)
+    shutil.copymode(srcFile, destFile)
+
 def datetimeToStrTime(dateTimeVal, strFormat=DEFAULT_DICOM_TIME_FORMAT):
     return dateTimeVal.strftime(strFormat)
 
@@ -238,3 +477,13 @@ class SubjPrefixError(Exception):
         self.msg = 'SubjPrefixError: please provide as imput.' + '\n' + msg2
     def __str__(self):
         return self.msg
+
+class MultiLoadError(Exception):
+    ''' MultiLoadError
+            If one or more directories fail in a parallel multi-load. 
+            results: list (in input order) of loaded subject or error message '''
+    def __init__(self, results, errors):
+        self.results = results
+        self.msg = 'MultiLoadError: failed to load:' + '\n' + '\n'.join(errors)
+    def __str__(self):
+        return self.msg
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+
+"""Persistent job queue for the watchdog
+
+A small SQLite database (MIResearch-PROCESSING/mi_watcher_jobs.sqlite) holding one row per arrival
+(top level directory or archive dropped in the watched directory) and the state of its ingest:
+    arrived     - seen, waiting to become stable
+    stable      - stable, queued for an ingest worker
+    processing  - moved to the processing directory (processPath) and being loaded
+    done        - loaded (and removed from the processing directory)
+    error       - load failed (moved to the error directory) or arrival lost
+As the state is on disk a restarted watcher can reconcile the watched and processing directories
+against it (see MIResearch_SubdirectoryHandler.resume_processing) and catch up without intervention.
+"""
+
+import os
+import time
+import sqlite3
+from contextlib import contextmanager
+
+
+JOBS_FILE = "mi_watcher_jobs.sqlite"
+JOBS_VERSION = 1
+STATE_ARRIVED = "arrived"
+STATE_STABLE = "stable"
+STATE_PROCESSING = "processing"
+STATE_DONE = "done"
+STATE_ERROR = "error"
+JOB_STATES = [STATE_ARRIVED, STATE_STABLE, STATE_PROCESSING, STATE_DONE, STATE_ERROR]
+# States of a job not yet finished - and of those whose arrival is still in the watched directory
+OPEN_STATES = [STATE_ARRIVED, STATE_STABLE, STATE_PROCESSING]
+WAITING_STATES = [STATE_ARRIVED, STATE_STABLE]
+
+
+class WatchJobs(object):
+    """
+    SQLite backed record of watchdog ingest jobs.
+    A new connection is opened per operation so the record may be shared between the watcher and worker threads.
+
+    Args:
+        jobsFile (str): path to database file (normally MIResearch-PROCESSING/mi_watcher_jobs.sqlite)
+    """
+    def __init__(self, jobsFile) -> None:
+        self.jobsFile = jobsFile
+        self._schemaChecked = False
+
+
+    def __str__(self):
+        return f"WatchJobs at {self.jobsFile}"
+
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.jobsFile, timeout=30)
+        try:
+            if not self._schemaChecked:
+                self._buildSchema(conn)
+                self._schemaChecked = True
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+
+    def _buildSchema(self, conn):
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, JOBS_VERSION):
+            raise sqlite3.DatabaseError(f"{self.jobsFile} has unknown version {version} (expected {JOBS_VERSION})")
+        conn.execute("CREATE TABLE IF NOT EXISTS jobs (jobID INTEGER PRIMARY KEY AUTOINCREMENT, "
+                        "arrivalPath TEXT, processPath TEXT, state TEXT, arrived REAL, updated REAL, message TEXT)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_state ON jobs (state)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_arrivalPath ON jobs (arrivalPath)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_processPath ON jobs (processPath)")
+        conn.execute(f"PRAGMA user_version = {JOBS_VERSION}")
+
+
+    def _setState(self, column, path, state, fromStates=None, message=None, processPath=None):
+        if state not in JOB_STATES:
+            raise ValueError(f"Unknown job state {state} (expected one of {JOB_STATES})")
+        fromStates = OPEN_STATES if fromStates is None else fromStates
+        sets, values = ["state = ?", "updated = ?", "message = ?"], [state, time.time(), message]
+        if processPath is not None:
+            sets.append("processPath = ?")
+            values.append(processPath)
+        with self._connect() as conn:
+            cur = conn.execute(f"UPDATE jobs SET {', '.join(sets)} WHERE {column} = ? "
+                                f"AND state IN ({', '.join(['?']*len(fromStates))})",
+                                values + [path] + list(fromStates))
+            return cur.rowcount
+
+
+    ### ----------------------------------------------------------------------------------------------------------------
+    ### State changes
+    ### ----------------------------------------------------------------------------------------------------------------
+    def recordArrived(self, arrivalPath):
+        """Record a new arrival - no new job if arrivalPath already has a job waiting (arrived or stable)
+
+        Args:
+            arrivalPath (str): arrival (top level directory or archive in the watched directory)
+
+        Returns:
+            bool: True if a new job was recorded
+        """
+        with self._connect() as conn:
+            if self._getWaitingJob(conn, arrivalPath) is not None:
+                return False
+            now = time.time()
+            conn.execute("INSERT INTO jobs (arrivalPath, state, arrived, updated) VALUES (?, ?, ?, ?)",
+                            (arrivalPath, STATE_ARRIVED, now, now))
+        return True
+
+
+    def recordStable(self, arrivalPath):
+        return self._setState("arrivalPath", arrivalPath, STATE_STABLE, fromStates=WAITING_STATES)
+
+
+    def recordInterrupted(self, arrivalPath):
+        """Return a processing job whose arrival was never moved for processing to stable (to be queued again)"""
+        return self._setState("arrivalPath", arrivalPath, STATE_STABLE, fromStates=[STATE_PROCESSING])
+
+
+    def recordProcessing(self, arrivalPath, processPath):
+        """Record arrival being moved to processPath for loading. Records a new job if arrivalPath has no waiting job.
+
+        Args:
+            arrivalPath (str): arrival (in the watched directory)
+            processPath (str): where arrival is moved to be loaded (in the processing directory)
+        """
+        self.recordArrived(arrivalPath)
+        self._setState("arrivalPath", arrivalPath, STATE_PROCESSING, fromStates=WAITING_STATES, processPath=processPath)
+
+
+    def recordDone(self, processPath):
+        return self._setState("processPath", processPath, STATE_DONE)
+
+
+    def recordError(self, processPath, message=None):
+        return self._setState("processPath", processPath, STATE_ERROR, message=message)
+
+
+    def recordArrivalError(self, arrivalPath, message=None):
+        """Close the open job of an arrival (e.g. removed, or lost before being processed) as error"""
+        return self._setState("arrivalPath", arrivalPath, STATE_ERROR, message=message)
+
+
+    def removeArrival(self, arrivalPath):
+        """Forget an arrival not yet processed (e.g. removed before stable)"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM jobs WHERE arrivalPath = ? AND state IN (?, ?)", [arrivalPath] + WAITING_STATES)
+
+
+    ### ----------------------------------------------------------------------------------------------------------------
+    ### Reading
+    ### ----------------------------------------------------------------------------------------------------------------
+    def _getWaitingJob(self, conn, arrivalPath):
+        return conn.execute("SELECT jobID FROM jobs WHERE arrivalPath = ? AND state IN (?, ?)",
+                            [arrivalPath] + WAITING_STATES).fetchone()
+
+
+    def getJobs(self, states=None):
+        """Get jobs (all, or in given states), oldest first
+
+        Args:
+            states (list, optional): states to return. Defaults to None - all.
+
+        Returns:
+            list: job dictionaries - jobID, arrivalPath, processPath, state, arrived, updated, message
+        """
+        cols = ["jobID", "arrivalPath", "processPath", "state", "arrived", "updated", "message"]
+        sql = f"SELECT {', '.join(cols)} FROM jobs"
+        values = []
+        if states is not None:
+            sql += f" WHERE state IN ({', '.join(['?']*len(states))})"
+            values = list(states)
+        with self._connect() as conn:
+            return [dict(zip(cols, i)) for i in conn.execute(sql + " ORDER BY jobID", values)]
+
+
+    def getState(self, path):
+        """State of the latest job for an arrival or process path - None if not known"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT state FROM jobs WHERE arrivalPath = ? OR processPath = ? "
+                                "ORDER BY jobID DESC LIMIT 1", (path, path)).fetchone()
+        return None if row is None else row[0]
+
+
+    def isKnownProcessPath(self, processPath):
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM jobs WHERE processPath = ?", (processPath,)).fetchone() is not None
+
+
+    def getStateCounts(self):
+        """Number of jobs in each state
+
+        Returns:
+            dict: {state: count}
+        """
+        counts = {i: 0 for i in JOB_STATES}
+        with self._connect() as conn:
+            counts.update(dict(conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state")))
+        return counts
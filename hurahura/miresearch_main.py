@@ -10,6 +10,7 @@ import traceback
 
 from hurahura import mi_utils
 from hurahura import mi_subject
+from hurahura import mi_batch
 from hurahura import miresearch_watchdog
 from hurahura.mi_config import MIResearch_config
 
@@ -65,6 +66,9 @@ groupLoad.add_argument('-Build', dest='build',
 groupLoad.add_argument('-Load', dest='loadPath', 
                     help='Path to load data from (file / directory / tar / tar.gz / zip)', 
                     type=str, default=None)
+groupLoad.add_argument('-LoadBatch', dest='loadBatch', 
+                    help='Path to manifest CSV of sources to load (columns: source, subjNumber, anonName) - reports throughput', 
+                    type=str, default=None)
 groupLoad.add_argument('-LoadOther', dest='loadPathOther', 
                     help='Path to load other data from directory (non-DICOM)', 
                     type=str, default=None)
@@ -74,6 +78,12 @@ groupLoad.add_argument('-LOAD_MULTI', dest='LoadMulti',
 groupLoad.add_argument('-LOAD_MULTI_FORCE', dest='LoadMultiForce', 
                     help='Combine with "Load": Force to ignore studyUIDs and load new ID per subdirectory', 
                     action='store_true')
+groupLoad.add_argument('-TransferMode', dest='transferMode', 
+                    help='Combine with "Load": How DICOMS are placed in subject [default None -> from config file (copy)]', 
+                    type=str, choices=mi_utils.TRANSFER_MODES, default=None)
+groupLoad.add_argument('-j', dest='workers', 
+                    help='Combine with "LOAD_MULTI" or "LoadBatch": Number of processes to load in parallel [default 1]', 
+                    type=int, default=1)
 
 # SUBJECT LEVEL
 groupSubj = ParentAP.add_argument_group('Subject Level Actions')
@@ -159,6 +169,8 @@ def checkArgs(args, class_obj=None):
         print(f'Running MIRESEARCH with dataRoot {MIResearch_config.data_root_dir}')
     if args.loadPath is not None:
         args.loadPath = os.path.abspath(args.loadPath)
+    if args.loadBatch is not None:
+        args.loadBatch = os.path.abspath(args.loadBatch)
     if args.LoadMultiForce:
         args.LoadMulti = True
     
@@ -209,9 +221,26 @@ def runActions(args, extra_runActions=None):
                                              SubjClass=MIResearch_config.class_obj,
                                              IGNORE_UIDS=args.LoadMultiForce,
                                              OTHER_DATA_DIR=args.loadPathOther,
-                                             QUIET=args.QUIET)
+                                             QUIET=args.QUIET,
+                                             workers=args.workers,
+                                             transferMode=args.transferMode)
         args.subjNList = [iSubj.subjN for iSubj in subjList]
 
+    # --- LOAD BATCH ---
+    elif args.loadBatch is not None:
+        if not args.QUIET:
+            print(f'Running MIRESEARCH with loadBatch {args.loadBatch}')
+        report = mi_batch.loadBatch(args.loadBatch, 
+                                    dataRoot=MIResearch_config.data_root_dir,
+                                    SubjClass=MIResearch_config.class_obj,
+                                    subjPrefix=MIResearch_config.subject_prefix,
+                                    anonName=args.anonName,
+                                    workers=args.workers,
+                                    transferMode=args.transferMode,
+                                    QUIET=args.QUIET)
+        print(report)
+        args.subjNList = report.subjNs
+
     # SPECIAL ACTION - BUILD EMPTY SUBJECT(S)
     elif args.build:
         try:    
@@ -275,8 +304,8 @@ def runActions(args, extra_runActions=None):
                 print(iSubj.info())
 
         if args.qExamID:
-            subList = subjList.findSubjMatchingStudyID(args.qExamID)
-            for iSubj in subList:
+            iSubj = subjList.findSubjMatchingStudyID(int(args.qExamID))
+            if iSubj is not None:
                 print(iSubj.info())
 
         if len(args.qDate) == 2:
@@ -304,8 +333,7 @@ def runActions(args, extra_runActions=None):
             for iSubj in subjList:
                 if not args.QUIET:
                     print(f"Meta pipeline: {iSubj.subjID}...")
-                iSubj.buildDicomMeta()
-                iSubj.buildSeriesDataMetaCSV(FORCE=args.FORCE)
+                iSubj.buildMeta(FORCE=args.FORCE, INCREMENTAL=not args.FORCE)
 
         # --- PRINT INFO ---
         elif args.subjInfo:
@@ -338,6 +366,10 @@ def runActions(args, extra_runActions=None):
             if not args.QUIET:
                 print(f"Info: summary for {len(args.subjNList)} subjects at {MIResearch_config.data_root_dir}")
             print(subjList)
+            df = subjList.toDataFrame('study')
+            summaryCols = [i for i in ['SubjectID', 'PatientID', 'StudyDate', 'StudyDescription', 
+                                       'NumberOfSeries', 'TotalDicoms'] if i in df.columns]
+            print(df[summaryCols].to_string(index=False))
 
     ## WATCH DIRECTORY ##
     elif args.WatchDirectory is not None:
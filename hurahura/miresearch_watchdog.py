@@ -1,13 +1,19 @@
 
 import os
+import io
 import time
 import shutil
 import uuid
 import logging
+import queue
+import sqlite3
+import threading
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 #
 from hurahura import mi_subject
+from hurahura import mi_utils
+from hurahura import mi_watchjobs
 from hurahura.mi_config import MIResearch_config
 
 
@@ -36,12 +42,14 @@ class MIResearch_WatchDog(object):
                  dataStorageRoot,
                  subjectPrefix,
                  SubjClass=mi_subject.AbstractSubject,
-                 DEBUG=False) -> None:
+                 DEBUG=False,
+                 workers=None) -> None:
         self.directoryToWatch = directoryToWatch
         self.dataStorageRoot = dataStorageRoot
         self.subjectPrefix = subjectPrefix
         self.SubjClass = SubjClass
-        self.recursive = False
+        self.recursive = True # Events from within arrivals mark activity (see MIResearch_SubdirectoryHandler.is_stable)
+        self.workers = MIResearch_config.watch_workers if workers is None else workers
         self.DEBUG = DEBUG
         #
         self.processDir = os.path.join(self.directoryToWatch, 'MIResearch-PROCESSING')
@@ -65,6 +73,7 @@ class MIResearch_WatchDog(object):
                                                             self.DEBUG)
         self.event_handler.processDir = self.processDir
         self.event_handler.errorDir = self.errorDir
+        self.event_handler.jobs = mi_watchjobs.WatchJobs(os.path.join(self.processDir, mi_watchjobs.JOBS_FILE))
         # self.event_handler.completeDir = self.completeDir
 
 
@@ -76,28 +85,37 @@ class MIResearch_WatchDog(object):
         self.logger.info(f" storage destination: {self.dataStorageRoot}")
         self.logger.info(f" subject prefix: {self.subjectPrefix}")
         self.logger.info(f" SubjectClass: {self.SubjClass}")
+        self.logger.info(f" ingest workers: {self.workers}")
         self.logger.debug(f" RUNNING IN DEBUG MODE")
+        self.event_handler.resume_processing()
+        self.event_handler.startWorkers(self.workers)
         observer.start()
         self.logger.info(f" -------------- OBSERVER STARTED --------------")
         try:
             while True:
-                time.sleep(5)
+                # Observer thread records events - stable arrivals are queued here for the ingest workers
+                self.event_handler.queueStableArrivals()
+                if self.event_handler.stopRequested:
+                    raise KeyboardInterrupt
+                time.sleep(self.event_handler.pollDelay)
         except KeyboardInterrupt:
             self.logger.info(f"MIResearch_WatchDog watching {self.directoryToWatch} killed.")
-            self.logger.info("Closing cleanly. ")
+            self.logger.info("Closing cleanly (finishing running and queued loads). ")
             observer.stop()
         observer.join()
+        self.event_handler.stopWorkers()
+
 
+_FINGERPRINTER = mi_utils.DirectoryFingerprinter()
 
 def get_directory_modified_time(directory_path):
-    modified_time = os.path.getmtime(directory_path)
-    # Walk through the directory and its subdirectories
-    for foldername, _, filenames in os.walk(directory_path):
-        for filename in filenames:
-            file_path = os.path.join(foldername, filename)
-            file_modified_time = os.path.getmtime(file_path)
-            modified_time = max(modified_time, file_modified_time)
-    return modified_time
+    """Latest modification time of directory_path and everything within it. 
+    Incremental: only directories changed since the last call are scanned (see mi_utils.DirectoryFingerprinter)"""
+    if os.path.isfile(directory_path):
+        return os.path.getmtime(directory_path)
+    return _FINGERPRINTER.getModifiedTime(directory_path)
+
+ARCHIVE_EXTNS = ('.zip', '.tar', '.tar.gz')
 
 class MIResearch_SubdirectoryHandler(FileSystemEventHandler):
     def __init__(self, directoryToWatch, 
@@ -119,110 +137,222 @@ class MIResearch_SubdirectoryHandler(FileSystemEventHandler):
         self.pollDelay = 5 # seconds
         self.pollStable = max([MIResearch_config.stable_directory_age_sec, self.pollDelay+1])
         self.pollTimeOut = 10*self.pollStable
+        # Arrivals (top level directories / archives in directoryToWatch) waiting to become stable: 
+        #   path: {'first': time first seen, 'last': time of last event within arrival}
+        self.arrivals = {}
+        self._arrivalsLock = threading.Lock()
+        self.stopRequested = False
+        # Stability is confirmed by an unchanged fingerprint between polls (guards against missed events)
+        self.fingerprinter = mi_utils.DirectoryFingerprinter()
+        # Coalescing: stable arrivals of the same study (StudyInstanceUID) wait coalesceWindow seconds (from the 
+        # latest) for others then are queued as one job - so an exam sent in parts is loaded once
+        #   studyKey (StudyInstanceUID, or arrival path if not known): {'arrivals': [paths], 'last': time latest added}
+        self.coalesceWindow = MIResearch_config.watch_coalesce_sec
+        self.pendingStudies = {}
+        # Ingest workers: jobs (studyKey, [arrival paths]) are queued (queueStableArrivals) and loaded by a pool of 
+        # worker threads. A study is not queued again until its queued / running job is finished.
+        self.jobQueue = queue.Queue()
+        self._workerThreads = []
+        self.studiesInFlight = set()
+        self._jobLock = threading.Lock()
+        # Persistent record of jobs (mi_watchjobs.WatchJobs) - None: not recorded
+        self.jobs = None
         # NOTE:
-        # self.processDir and self.errorDir are set on the FileSystemEventHandler by the MIResearch_WatchDog class
+        # self.processDir, self.errorDir and self.jobs are set on the FileSystemEventHandler by the MIResearch_WatchDog class
 
     def on_moved(self, event):
-        if event.is_directory:
-            self.logger.info(f"Directory moved/renamed: {event.dest_path}")
-            try:
-                self._action(event.dest_path)
-            except Exception as e:
-                self.logger.error(f"    _action processing interrupted : {e}")
+        self._recordActivity(event.dest_path)
 
     def on_created(self, event):
-        if event.is_directory:
-            self.logger.info(f"Directory created: {event.src_path}")
-            try:
-                self._action(event.src_path)
-            except Exception as e:
-                self.logger.error(f"    _action processing interrupted : {e}")
-
-        elif event.src_path.endswith('.zip') or \
-                event.src_path.endswith('.tar') or \
-                event.src_path.endswith('.tar.gz'):
-            self.logger.info(f"Archive created: {event.src_path}") # Note other archives are not handled
-            try:
-                self._action(event.src_path)
-            except Exception as e:
-                if self.DEBUG:
-                    raise e
-                self.logger.error(f"    _action processing interrupted : {e}")
-        
-        elif event.src_path.endswith('kill_watcher'):
+        if (not event.is_directory) and event.src_path.endswith('kill_watcher'):
             os.unlink(event.src_path)
-            raise KeyboardInterrupt
+            self.stopRequested = True
+            return
+        self._recordActivity(event.src_path)
+
+    def on_modified(self, event):
+        self._recordActivity(event.src_path)
 
     def on_deleted(self, event):
-        self.logger.info(f"deleted: {event.src_path}")
-        pass
-    # def on_modified(self, event):
-    #     pass
+        self.logger.debug(f"deleted: {event.src_path}")
+        self._recordActivity(event.src_path)
 
-    def _action(self, new_subdirectory_full):
-        self.logger.info(f"New subdirectory detected: {new_subdirectory_full}")
-        subdirectory = os.path.split(new_subdirectory_full)[1]
+    def _getArrivalPath(self, path):
+        """Top level entry of directoryToWatch holding path. None if path is directoryToWatch, 
+        not within it or matches ignore_pattern"""
+        relPath = os.path.relpath(path, self.directoryToWatch)
+        if (relPath == '.') or relPath.startswith('..'):
+            return None
+        topName = relPath.split(os.sep)[0]
+        if self.matches_ignore_pattern(topName):
+            return None
+        return os.path.join(self.directoryToWatch, topName)
 
-        if self.ignore_pattern and self.matches_ignore_pattern(subdirectory):
-            self.logger.info(f"Ignoring subdirectory: {new_subdirectory_full}")
+    def _recordActivity(self, path):
+        """Mark activity (now) for the arrival holding path - registers a new arrival if a directory or archive"""
+        arrivalPath = self._getArrivalPath(path)
+        if arrivalPath is None:
             return
+        now = time.time()
+        with self._arrivalsLock:
+            if arrivalPath in self.arrivals:
+                self.arrivals[arrivalPath]['last'] = now
+                return
+            if not (os.path.isdir(arrivalPath) or arrivalPath.endswith(ARCHIVE_EXTNS)):
+                return # Note other archives / files are not handled
+            self.arrivals[arrivalPath] = {'first': now, 'last': now}
+        self.logger.info(f"New subdirectory detected: {arrivalPath}")
+        self._recordJob('recordArrived', arrivalPath)
+
+    def _recordJob(self, method, *args):
+        """Record job state change (WatchJobs method) - failure is logged, not raised, so loading carries on"""
+        if self.jobs is None:
+            return None
+        try:
+            return getattr(self.jobs, method)(*args)
+        except sqlite3.Error as e:
+            self.logger.error(f"Failed to record job state ({method} {args}): {e}")
+            return None
 
-        if self.is_stable(new_subdirectory_full):
-            self.logger.info(f"STABLE: {new_subdirectory_full}")
-            # Want to process a directory - but if already being processed then need to deal with that first. 
-            matchingProcessing = self.findMatchingProcessingDirs(subdirectory)
-            if len(matchingProcessing) > 0:
-                for already_exec_directory in matchingProcessing:
-                    self.logger.warning(f"Found already executing directory: {already_exec_directory}")
-                    self.logger.warning(f"DELETING {already_exec_directory}")
-                    try: 
-                        shutil.rmtree(already_exec_directory)
-                    except NotADirectoryError: # MAY BE A zip or tar file
-                        os.unlink(already_exec_directory)
-                    except FileNotFoundError:
-                        self.logger.error(f"Error: Directory '{already_exec_directory}' does not exist - maybe just finished.")
-                    except Exception as e:
-                        self.logger.error(f"An error occurred: {e}")
-            ## 
-            self.execute_loadDirectory(new_subdirectory_full)
-
-
-    def findMatchingProcessingDirs(self, src_path):
-        matchingProcessing = []
-        self.logger.debug(f"DEBUG: check {self.processDir} for matching {src_path}")
-        for iDir in os.listdir(self.processDir):
-            if src_path in iDir:
-                matchingProcessing.append(os.path.join(self.processDir, iDir))
-        return matchingProcessing
-
-    def is_stable(self, directory_path):
-        """Check if this new directory is stable (no change in modified time)
+    def _fingerprintArrival(self, arrivalPath):
+        if os.path.isdir(arrivalPath):
+            return self.fingerprinter.fingerprint(arrivalPath)
+        st = os.stat(arrivalPath)
+        return st.st_mtime_ns, st.st_size
 
-        Args:
-            directory_path (str): the directory to check for stability
+    def _checkFingerprint(self, arrivalPath, info, now):
+        """Fingerprint arrival - a change since the previous poll counts as activity (e.g. network filesystems, 
+        or events dropped by the observer)"""
+        try:
+            fingerprint = self._fingerprintArrival(arrivalPath)
+        except OSError:
+            return
+        if ('fingerprint' in info) and (fingerprint != info['fingerprint']):
+            self.logger.debug(f"Change without event seen in {arrivalPath}")
+            info['last'] = now
+        info['fingerprint'] = fingerprint
+
+    def getStableArrivals(self):
+        """Remove and return arrivals that are stable (see is_stable). 
+        Each waiting arrival is also fingerprinted per call (incremental - see mi_utils.DirectoryFingerprinter) 
+        and a change since the previous call resets its last activity time.
 
         Returns:
-            bool: True if stable AND not already being processed. 
+            list: paths of stable arrivals (in order first seen)
         """
-        start_time = time.time()
-        stable_start_time = None
+        now = time.time()
+        stableArrivals = []
+        with self._arrivalsLock:
+            for arrivalPath, info in sorted(self.arrivals.items(), key=lambda x: x[1]['first']):
+                if not os.path.exists(arrivalPath):
+                    self.logger.info(f"Arrival removed before stable: {arrivalPath}")
+                    self.arrivals.pop(arrivalPath)
+                    self.fingerprinter.forget(arrivalPath)
+                    self._recordJob('removeArrival', arrivalPath)
+                    continue
+                self._checkFingerprint(arrivalPath, info, now)
+                if self.is_stable(arrivalPath, now):
+                    stableArrivals.append(arrivalPath)
+                    self.arrivals.pop(arrivalPath)
+                    self.fingerprinter.forget(arrivalPath)
+                elif ((now - info['first']) > self.pollTimeOut) and (not info.get('warned', False)):
+                    self.logger.warning(f"Arrival not stable after {self.pollTimeOut} seconds - still waiting: {arrivalPath}")
+                    info['warned'] = True
+        return stableArrivals
+
+    def _addPendingArrival(self, arrivalPath, now):
+        studyUID = getArrivalStudyUID(arrivalPath)
+        studyKey = arrivalPath if studyUID is None else studyUID
+        pending = self.pendingStudies.setdefault(studyKey, {'arrivals': [], 'last': now})
+        pending['arrivals'].append(arrivalPath)
+        pending['last'] = now
+        if len(pending['arrivals']) > 1:
+            self.logger.info(f"COALESCE: {arrivalPath} with {pending['arrivals'][:-1]} (StudyInstanceUID {studyUID})")
+
+    def queueStableArrivals(self, now=None):
+        """Add stable arrivals to pendingStudies and queue (for the ingest workers) each study whose latest arrival is 
+        at least coalesceWindow seconds old - as one job of all its arrivals - unless that study is already in flight
+
+        Args:
+            now (float, optional): time to check at. Defaults to None - time.time()
+        """
+        if now is None:
+            now = time.time()
+        for arrivalPath in self.getStableArrivals():
+            self.logger.info(f"STABLE: {arrivalPath}")
+            self._recordJob('recordStable', arrivalPath)
+            self._addPendingArrival(arrivalPath, now)
+        for studyKey, pending in list(self.pendingStudies.items()):
+            if (now - pending['last']) < self.coalesceWindow:
+                continue
+            with self._jobLock:
+                if studyKey in self.studiesInFlight:
+                    continue
+                self.studiesInFlight.add(studyKey)
+            self.pendingStudies.pop(studyKey)
+            self.logger.info(f"QUEUED: {pending['arrivals']} ({self.jobQueue.qsize()} waiting)")
+            self.jobQueue.put((studyKey, pending['arrivals']))
+
+    def startWorkers(self, nWorkers):
+        """Start nWorkers ingest worker threads - at most nWorkers arrivals are loaded at once"""
+        for k in range(max(int(nWorkers), 1)):
+            iThread = threading.Thread(target=self._worker, name=f"MIResearch-ingest-{k}", daemon=True)
+            iThread.start()
+            self._workerThreads.append(iThread)
+
+    def stopWorkers(self):
+        """Stop ingest workers once queued arrivals are loaded"""
+        for _ in self._workerThreads:
+            self.jobQueue.put(None)
+        for iThread in self._workerThreads:
+            iThread.join()
+        self._workerThreads = []
 
+    def _worker(self):
         while True:
-            current_time = time.time()
-            # Check if the timeout has been reached
-            if (current_time - start_time) > (self.pollTimeOut): 
-                break
-            if stable_start_time is None:
-                # Initialize stable_start_time on the first iteration
-                stable_start_time = current_time
-            modified_time = get_directory_modified_time(directory_path)
-            if modified_time > stable_start_time: 
-                stable_start_time = modified_time
-            if current_time - stable_start_time >= self.pollStable:
-                self.logger.debug(f"Directory has remained stable for {self.pollStable} seconds.")
-                return True
-            time.sleep(self.pollDelay)
-        return False
+            job = self.jobQueue.get()
+            try:
+                if job is None:
+                    return
+                self._action(*job)
+            except Exception as e:
+                self.logger.error(f"    _action processing interrupted : {e}")
+            finally:
+                self.jobQueue.task_done()
+
+    def _action(self, studyKey, arrivalPaths):
+        try:
+            self._loadArrivals(arrivalPaths)
+        finally:
+            with self._jobLock:
+                self.studiesInFlight.discard(studyKey)
+
+    def _loadArrivals(self, arrivalPaths):
+        arrivalPaths = [i for i in arrivalPaths if os.path.exists(i)]
+        if len(arrivalPaths) == 0:
+            return
+        if len(arrivalPaths) == 1:
+            self.execute_loadDirectory(arrivalPaths[0])
+        else:
+            self.execute_loadArrivals(arrivalPaths)
+
+    def is_stable(self, arrivalPath, now=None):
+        """Check if this arrival is stable: no filesystem event within it (recursive) for pollStable seconds. 
+        Uses last activity times recorded from events (and fingerprint changes seen by getStableArrivals).
+
+        Args:
+            arrivalPath (str): the arrival (top level directory or archive) to check for stability
+            now (float, optional): time to check at. Defaults to None - time.time()
+
+        Returns:
+            bool: True if stable 
+        """
+        if now is None:
+            now = time.time()
+        info = self.arrivals.get(arrivalPath, None)
+        if info is None:
+            return False
+        return (now - info['last']) >= self.pollStable
 
     def matches_ignore_pattern(self, subdirectory):
         # Check if the subdirectory matches the ignore pattern
@@ -231,20 +361,97 @@ class MIResearch_SubdirectoryHandler(FileSystemEventHandler):
                 return True
         return False
 
+    def resume_processing(self):
+        """Resume work interrupted by a crash or kill of the watcher (or missed while not running). 
+        The watched and processing directories are reconciled against the job record (self.jobs): 
+            - directories (or archives) left in processDir are loaded again - loads interrupted part way resume 
+                from their journal (see mi_journal)
+            - jobs interrupted before their arrival was moved to processDir, and stable arrivals, are queued
+            - other entries in directoryToWatch (including those arriving while not running) are registered as 
+                arrivals and queued once stable
+        Then any other interrupted loads in the storage root are completed.
+        """
+        if self.jobs is not None:
+            for iJob in self._recordJob('getJobs', [mi_watchjobs.STATE_PROCESSING]) or []:
+                if os.path.exists(iJob['processPath']):
+                    continue # Loaded again below
+                if os.path.exists(iJob['arrivalPath']):
+                    self.logger.warning(f"Found interrupted job (not yet moved for processing): {iJob['arrivalPath']}")
+                    self._recordJob('recordInterrupted', iJob['arrivalPath'])
+                else:
+                    self.logger.error(f"Lost job: {iJob['arrivalPath']} not found in watched or processing directory")
+                    self._recordJob('recordArrivalError', iJob['arrivalPath'], "Lost - not found on restart")
+        for iName in sorted(os.listdir(self.processDir)):
+            iPath = os.path.join(self.processDir, iName)
+            if os.path.isdir(iPath) or iName.endswith(ARCHIVE_EXTNS):
+                self.logger.warning(f"Found interrupted processing: {iPath} - resuming")
+                if not self._recordJob('isKnownProcessPath', iPath):
+                    self._recordJob('recordProcessing', _getArrivalPathFromProcessPath(iPath, self.directoryToWatch), iPath)
+                self.process_loadDirectory(iPath)
+        queued = set()
+        if self.jobs is not None:
+            for iJob in self._recordJob('getJobs', [mi_watchjobs.STATE_STABLE]) or []:
+                if os.path.exists(iJob['arrivalPath']):
+                    self.logger.info(f"STABLE (from job record): {iJob['arrivalPath']}")
+                    self._addPendingArrival(iJob['arrivalPath'], time.time())
+                    queued.add(iJob['arrivalPath'])
+                else:
+                    self._recordJob('recordArrivalError', iJob['arrivalPath'], "Removed before processing")
+            for iJob in self._recordJob('getJobs', [mi_watchjobs.STATE_ARRIVED]) or []:
+                if not os.path.exists(iJob['arrivalPath']):
+                    self._recordJob('removeArrival', iJob['arrivalPath'])
+        for iName in sorted(os.listdir(self.directoryToWatch)):
+            iPath = os.path.join(self.directoryToWatch, iName)
+            if iPath not in queued:
+                self._recordActivity(iPath) # Registered as arrival (waits to be stable) - ignored entries skipped
+        if self.jobs is not None:
+            self.logger.info(f"Job record: {self._recordJob('getStateCounts')}")
+        try:
+            resumed = mi_subject.resumeIncompleteLoads(self.dataStorageRoot, self.subjectPrefix, self.SubjClass)
+        except Exception as e:
+            self.logger.error(f"An error occurred while resuming interrupted loads: {str(e)}")
+            return
+        for iSubj in resumed:
+            self.logger.warning(f"Completed interrupted load to {iSubj.subjID}")
+
     def execute_loadDirectory(self, directoryToLoad):
         uid = uuid.uuid4().hex
         src_path = os.path.split(directoryToLoad)[1]
-        directoryToLoad_process = shutil.move(directoryToLoad, os.path.join(self.processDir, uid+"_"+src_path))
+        directoryToLoad_process = os.path.join(self.processDir, uid+"_"+src_path)
+        self._recordJob('recordProcessing', directoryToLoad, directoryToLoad_process)
+        shutil.move(directoryToLoad, directoryToLoad_process)
+        self.process_loadDirectory(directoryToLoad_process)
+
+    def execute_loadArrivals(self, arrivalPaths):
+        """Load several arrivals (of one study) as one job: each is moved (archives unpacked) into a single 
+        processing directory which is then loaded - one scan, meta build and post load for the study"""
+        uid = uuid.uuid4().hex
+        directoryToLoad_process = os.path.join(self.processDir, uid+"_"+os.path.split(arrivalPaths[0])[1])
+        os.makedirs(directoryToLoad_process)
+        for arrivalPath in arrivalPaths:
+            arrivalName = os.path.split(arrivalPath)[1]
+            self._recordJob('recordProcessing', arrivalPath, directoryToLoad_process)
+            if os.path.isdir(arrivalPath):
+                shutil.move(arrivalPath, os.path.join(directoryToLoad_process, arrivalName))
+            else:
+                shutil.unpack_archive(arrivalPath, os.path.join(directoryToLoad_process, arrivalName.replace('.', '_')))
+                os.unlink(arrivalPath)
+        self.logger.info(f"Merged {len(arrivalPaths)} arrivals to {directoryToLoad_process}")
+        self.process_loadDirectory(directoryToLoad_process)
+
+    def process_loadDirectory(self, directoryToLoad_process):
         try:
             self.logger.info(f"*** BEGIN PROCESSING {directoryToLoad_process} ***")
             newSubjList = mi_subject.createNew_OrAddTo_Subject(directoryToLoad_process,
                                                 dataRoot=self.dataStorageRoot,
                                                 SubjClass=self.SubjClass,
                                                 subjPrefix=self.subjectPrefix,
-                                                OTHER_DATA_DIR=directoryToLoad_process)
+                                                OTHER_DATA_DIR=directoryToLoad_process,
+                                                transferMode='hardlink')
 
         except Exception as e:
             self.logger.error(f"An error occurred while loading subject: {str(e)} ")
+            self._recordJob('recordError', directoryToLoad_process, str(e))
             if self.DEBUG:
                 raise e
             else:
@@ -257,6 +464,7 @@ class MIResearch_SubdirectoryHandler(FileSystemEventHandler):
                 self.logger.error(f"An error occurred while loading subject: {str(e)} data moved to {self.errorDir}")
                 return
         self.logger.info(f"   FINISHED LOADING {directoryToLoad_process} ===")
+        self._recordJob('recordDone', directoryToLoad_process)
         try:
             shutil.rmtree(directoryToLoad_process)
             self.logger.info(f"   DELETED {directoryToLoad_process} ===")
@@ -269,6 +477,33 @@ class MIResearch_SubdirectoryHandler(FileSystemEventHandler):
         self.logger.info(f"=== FINISHED PROCESSING {directoryToLoad_process} ===")
 
 
+def _getArrivalPathFromProcessPath(processPath, directoryToWatch):
+    # processDir entries are named {uuid hex}_{arrival name} (see execute_loadDirectory)
+    processName = os.path.split(processPath)[1]
+    prefix, _, arrivalName = processName.partition("_")
+    if (len(prefix) != 32) or (arrivalName == ""):
+        arrivalName = processName
+    return os.path.join(directoryToWatch, arrivalName)
+
+
+def getArrivalStudyUID(arrivalPath):
+    """StudyInstanceUID of the first DICOM found in an arrival (directory or archive) - None if not found"""
+    try:
+        if os.path.isdir(arrivalPath):
+            ds = mi_subject.spydcm.returnFirstDicomFound(arrivalPath)
+            studyUID = None if ds is None else ds.get('StudyInstanceUID', None)
+            return None if studyUID is None else str(studyUID)
+        dicom = mi_subject.spydcm.dcmTools.dicom
+        for _, memberBytes in mi_subject._iterArchiveMembers(arrivalPath):
+            try:
+                return str(dicom.dcmread(io.BytesIO(memberBytes), stop_before_pixels=True).StudyInstanceUID)
+            except (dicom.filereader.InvalidDicomError, AttributeError):
+                continue
+    except Exception: # Unreadable - loaded alone (any error reported by load)
+        return None
+    return None
+
+
 ### ====================================================================================================================
 class MIResearchWatchDogError(Exception):
     """A custom error class."""
@@ -11,8 +11,19 @@ except ImportError:
 
 import unittest
 import shutil
+import time
+import logging
+import threading
+import pandas as pd
 
 from hurahura import mi_subject
+from hurahura import mi_catalog
+from hurahura import mi_utils
+from hurahura import mi_batch
+from hurahura.benchmarks import synthetic_dicom
+from hurahura import miresearch_watchdog
+from hurahura import mi_watchjobs
+from watchdog import events as watchdog_events
 from hurahura.mi_config import MIResearch_config
 
 
@@ -56,6 +67,241 @@ class TestSubject(unittest.TestCase):
         nSE_dict = self.newSubj.getSeriesNumbersMatchingDescriptionStr('RVLA')
         self.assertEqual(int(list(nSE_dict.keys())[0]), 41, msg="Error finding se matching SeriesDescription")
 
+    def test_reloadStored(self):
+        self.assertEqual(len(self.newSubj.getStoredSOPInstanceUIDDigests()), 2)
+        dcmFile = os.path.join(self.newSubj.getDicomSeriesDir(41), os.listdir(self.newSubj.getDicomSeriesDir(41))[0])
+        mtime = os.stat(dcmFile).st_mtime_ns
+        self.newSubj.loadDicomsToSubject(P1, HIDE_PROGRESSBAR=True)
+        self.assertEqual(os.stat(dcmFile).st_mtime_ns, mtime, msg="Stored instance should not be rewritten")
+        self.assertEqual(self.newSubj.countNumberOfDicoms(), 2)
+
+    def test_seriesIndex(self):
+        seriesIndex = self.newSubj.getSeriesIndex()
+        self.assertEqual(len(seriesIndex), 1)
+        self.assertEqual(seriesIndex[0]['NumberOfInstances'], 2)
+        self.assertEqual(self.newSubj.getListOfSeNums(), [41])
+        seDir = self.newSubj.getDicomSeriesDir(41)
+        self.assertEqual(seDir, os.path.join(self.newSubj.getTopDir(), seriesIndex[0]['Directory']))
+        self.assertEqual(self.newSubj.getDicomSeriesDir(None, seriesUID=seriesIndex[0]['SeriesInstanceUID']), seDir)
+        self.assertEqual(self.newSubj.getDicomFoldersListStr(), [seDir])
+        with self.assertRaises(ValueError):
+            self.newSubj.getDicomSeriesDir(999)
+
+    def test_readDicomHeaders(self):
+        dsDict = mi_subject.readDicomHeaders(P2, nThreads=4)
+        dsDictSerial = mi_subject.spydcm.dcmTools.organiseDicomHeirarchyByUIDs(P2, HIDE_PROGRESSBAR=True, OVERVIEW=True)
+        self.assertEqual(list(dsDict.keys()), list(dsDictSerial.keys()))
+        for iStudyUID in dsDict.keys():
+            self.assertEqual(list(dsDict[iStudyUID].keys()), list(dsDictSerial[iStudyUID].keys()))
+            for iSeriesUID in dsDict[iStudyUID].keys():
+                self.assertEqual([i.filename for i in dsDict[iStudyUID][iSeriesUID]], 
+                                 [i.filename for i in dsDictSerial[iStudyUID][iSeriesUID]])
+                self.assertNotIn('PixelData', dsDict[iStudyUID][iSeriesUID][0])
+
+    def test_buildMeta(self):
+        os.remove(self.newSubj.getSeriesMetaCSV())
+        self.newSubj.buildMeta()
+        self.assertTrue(os.path.isfile(self.newSubj.getSeriesMetaCSV()))
+        df = pd.read_csv(self.newSubj.getSeriesMetaCSV())
+        self.assertEqual(len(df), 1)
+        self.assertEqual(df['SeriesNumber'].tolist(), self.newSubj.getListOfSeNums())
+        self.assertEqual(df['StudyDate'].tolist()[0], int(self.newSubj.getMetaDict()['StudyDate']))
+
+    @classmethod
+    def tearDownClass(cls, OVERRIDE=False):
+        if (not DEBUG) or OVERRIDE:
+            shutil.rmtree(cls.tmpDir)
+
+class TestIncrementalMeta(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpDir = os.path.join(this_dir, 'TestIncrementalMeta')
+        if os.path.isdir(cls.tmpDir):
+            cls.tearDownClass(True)
+        os.makedirs(cls.tmpDir)
+        cls.newSubj = mi_subject.AbstractSubject(1, subjectPrefix='MIM', dataRoot=cls.tmpDir)
+        cls.newSubj.QUIET = True
+        cls.newSubj.loadDicomsToSubject(P1, HIDE_PROGRESSBAR=True)
+
+    def test_incrementalMeta(self):
+        dirsRead = []
+        readDicomStudies = self.newSubj._readDicomStudies
+        def _readDicomStudies(dirName=None):
+            dirsRead.append(dirName)
+            return readDicomStudies(dirName)
+        self.newSubj._readDicomStudies = _readDicomStudies
+        p1Dir = self.newSubj.getSeriesIndex()[0]['Directory']
+        # No change - nothing read
+        self.newSubj.buildMeta()
+        self.assertEqual(dirsRead, [])
+        # New series - only new series directory read
+        self.newSubj.loadDicomsToSubject(P2, HIDE_PROGRESSBAR=True)
+        self.assertEqual(len(dirsRead), 1)
+        self.assertNotIn(p1Dir, dirsRead[0])
+        self.assertEqual(sorted(self.newSubj.getListOfSeNums()), [2, 41])
+        self.assertEqual(len(self.newSubj.getDicomSeriesMetaList()), 2)
+        self.assertEqual(len(self.newSubj.getSeriesMetaAsDataFrame()), 2)
+        self.assertEqual(self.newSubj.getMetaTagValue('StudyDate'), "20140409")
+        # Removed series
+        shutil.rmtree(self.newSubj.getDicomSeriesDir(2))
+        self.newSubj.buildMeta()
+        self.assertEqual(self.newSubj.getListOfSeNums(), [41])
+        self.assertEqual(len(self.newSubj.getDicomSeriesMetaList()), 1)
+        self.assertEqual(self.newSubj.getSeriesMetaAsDataFrame()['SeriesNumber'].tolist(), [41])
+
+    @classmethod
+    def tearDownClass(cls, OVERRIDE=False):
+        if (not DEBUG) or OVERRIDE:
+            shutil.rmtree(cls.tmpDir)
+
+class TestLoadJournal(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpDir = os.path.join(this_dir, 'TestLoadJournal')
+        if os.path.isdir(cls.tmpDir):
+            cls.tearDownClass(True)
+        os.makedirs(cls.tmpDir)
+
+    def _interruptedLoad(self, subjN, source):
+        # Load killed after DICOMS written, before meta
+        iSubj = mi_subject.AbstractSubject(subjN, subjectPrefix='MIJ', dataRoot=self.tmpDir)
+        iSubj.QUIET = True
+        def buildMeta(*args, **kwargs):
+            raise RuntimeError("Interrupted")
+        iSubj.buildMeta = buildMeta
+        with self.assertRaises(RuntimeError):
+            iSubj.loadDicomsToSubject(source, HIDE_PROGRESSBAR=True)
+        self.assertTrue(iSubj.hasIncompleteLoad())
+        return iSubj
+
+    def test_resumeLoad(self):
+        iSubj = self._interruptedLoad(1, P2)
+        state = iSubj.getLoadJournal().read()
+        self.assertEqual(state['source'], os.path.abspath(P2))
+        self.assertEqual(state['stepsDone'], ['write'])
+        self.assertEqual(len(state['seriesWritten']), 1)
+        self.assertFalse(os.path.isfile(iSubj.getSeriesIndexFile()))
+        # Loading same source again resumes load to same subject
+        subjList = mi_subject.createNew_OrAddTo_Subject(P2, dataRoot=self.tmpDir, subjPrefix='MIJ', 
+                                                        SubjClass=mi_subject.AbstractSubject, QUIET=True)
+        self.assertEqual(subjList[0].subjID, iSubj.subjID)
+        self.assertFalse(iSubj.hasIncompleteLoad())
+        self.assertEqual(iSubj.getListOfSeNums(), [2])
+        self.assertEqual(iSubj.countNumberOfDicoms(), 2)
+
+    def test_resumeIncompleteLoads(self):
+        srcDir = os.path.join(self.tmpDir, 'SOURCE_P1')
+        shutil.copytree(P1, srcDir)
+        iSubj = self._interruptedLoad(2, srcDir)
+        shutil.rmtree(srcDir)
+        with open(iSubj.getLoadJournal().journalFile, 'a') as fid:
+            fid.write('{"event": "st') # Torn record
+        resumed = mi_subject.resumeIncompleteLoads(self.tmpDir, 'MIJ', mi_subject.AbstractSubject)
+        self.assertEqual([i.subjID for i in resumed], [iSubj.subjID])
+        self.assertFalse(iSubj.hasIncompleteLoad())
+        self.assertEqual(iSubj.getListOfSeNums(), [41])
+        self.assertEqual(mi_subject.resumeIncompleteLoads(self.tmpDir, 'MIJ', mi_subject.AbstractSubject), [])
+
+    @classmethod
+    def tearDownClass(cls, OVERRIDE=False):
+        if (not DEBUG) or OVERRIDE:
+            shutil.rmtree(cls.tmpDir)
+
+class TestTransferModes(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpDir = os.path.join(this_dir, 'TestTransferModes')
+        if os.path.isdir(cls.tmpDir):
+            cls.tearDownClass(True)
+        os.makedirs(cls.tmpDir)
+        cls.dataRoot = os.path.join(cls.tmpDir, 'dataRoot')
+        os.makedirs(cls.dataRoot)
+
+    def _loadCopyOfP2(self, subjN, transferMode):
+        srcDir = os.path.join(self.tmpDir, f'src_{transferMode}')
+        shutil.copytree(P2, srcDir)
+        iSubj = mi_subject.AbstractSubject(subjN, subjectPrefix='MIX', dataRoot=self.dataRoot)
+        iSubj.QUIET = True
+        iSubj.loadDicomsToSubject(srcDir, HIDE_PROGRESSBAR=True, transferMode=transferMode)
+        return iSubj, srcDir
+
+    def test_transferModes(self):
+        subjCopy, _ = self._loadCopyOfP2(1, 'copy')
+        subjMove, srcMove = self._loadCopyOfP2(2, 'move')
+        subjLink, srcLink = self._loadCopyOfP2(3, 'hardlink')
+        filesCopy = sorted(os.listdir(subjCopy.getDicomSeriesDir(2)))
+        self.assertEqual(sorted(os.listdir(subjMove.getDicomSeriesDir(2))), filesCopy)
+        self.assertEqual(sorted(os.listdir(subjLink.getDicomSeriesDir(2))), filesCopy)
+        self.assertEqual(mi_utils.countFilesInDir(srcMove), 0)
+        self.assertEqual(mi_utils.countFilesInDir(srcLink), 2)
+        self.assertEqual(os.stat(os.path.join(subjLink.getDicomSeriesDir(2), filesCopy[0])).st_nlink, 2)
+        self.assertEqual(subjMove.getMetaTagValue('StudyInstanceUID'), subjCopy.getMetaTagValue('StudyInstanceUID'))
+
+    def test_addOtherData(self):
+        otherDir = os.path.join(self.tmpDir, 'other')
+        os.makedirs(os.path.join(otherDir, 'physio'))
+        with open(os.path.join(otherDir, 'physio', 'log.txt'), 'w') as fid:
+            fid.write('ECG 1 2 3')
+        with open(os.path.join(otherDir, 'kspace.dat'), 'wb') as fid:
+            fid.write(bytes(range(256)) * 4)
+        with open(os.path.join(P1, 'IM-00041-00001.dcm'), 'rb') as fid:
+            dcmBytes = fid.read()
+        with open(os.path.join(otherDir, 'image.IMA'), 'wb') as fid:
+            fid.write(dcmBytes)
+        with open(os.path.join(otherDir, 'no_preamble'), 'wb') as fid:
+            fid.write(dcmBytes[132:])
+        self.assertTrue(mi_utils.isDicomFile(os.path.join(otherDir, 'image.IMA')))
+        self.assertTrue(mi_utils.isDicomFile(os.path.join(otherDir, 'no_preamble')))
+        self.assertFalse(mi_utils.isDicomFile(os.path.join(otherDir, 'kspace.dat')))
+        iSubj = mi_subject.AbstractSubject(9, subjectPrefix='MIX', dataRoot=self.dataRoot)
+        iSubj.initDirectoryStructure()
+        iSubj.addOtherData(otherDir)
+        self.assertEqual(sorted(os.listdir(iSubj.getRawDirOther())), ['kspace.dat', 'log.txt'])
+        with open(os.path.join(iSubj.getRawDirOther(), 'kspace.dat'), 'rb') as fid:
+            self.assertEqual(fid.read(), bytes(range(256)) * 4)
+
+    def test_transferFile(self):
+        srcFile = os.path.join(P1, 'IM-00041-00001.dcm')
+        destFile = os.path.join(self.tmpDir, 'reflink.dcm')
+        self.assertIn(mi_utils.transferFile(srcFile, destFile, 'reflink'), ['reflink', 'copy'])
+        with open(srcFile, 'rb') as fid1, open(destFile, 'rb') as fid2:
+            self.assertEqual(fid1.read(), fid2.read())
+        with self.assertRaises(ValueError):
+            mi_utils.transferFile(srcFile, destFile, 'teleport')
+
+    @classmethod
+    def tearDownClass(cls, OVERRIDE=False):
+        if (not DEBUG) or OVERRIDE:
+            shutil.rmtree(cls.tmpDir)
+
+class TestArchiveLoad(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpDir = os.path.join(this_dir, 'TestArchiveLoad')
+        if os.path.isdir(cls.tmpDir):
+            cls.tearDownClass(True)
+        os.makedirs(cls.tmpDir)
+        cls.subjZip = mi_subject.createNew_OrAddTo_Subject(PZip, cls.tmpDir, subjPrefix='MIZ', QUIET=True)[0]
+        cls.subjTar = mi_subject.createNew_OrAddTo_Subject(PTar, cls.tmpDir, subjPrefix='MIZ', QUIET=True)[0]
+        cls.subjTarGZ = mi_subject.createNew_OrAddTo_Subject(PTarGZ, cls.tmpDir, subjPrefix='MIZ', QUIET=True)[0]
+        cls.subjAnon = mi_subject.createNew_OrAddTo_Subject(PTar, cls.tmpDir, subjPrefix='MIZA', QUIET=True, anonName="HARD")[0]
+
+    def test_archiveLoad(self):
+        self.assertEqual(self.subjZip.subjID, 'MIZ000001')
+        self.assertEqual(self.subjTar.subjID, 'MIZ000002')
+        self.assertEqual(self.subjTarGZ.subjID, 'MIZ000001', msg="Same study as zip - should add to")
+        self.assertEqual(self.subjZip.countNumberOfDicoms(), 2)
+        self.assertEqual(self.subjTar.countNumberOfDicoms(), 3)
+        self.assertEqual(self.subjZip.getListOfSeNums(), [88])
+        self.assertEqual(self.subjTar.getListOfSeNums(), [99])
+        self.assertTrue(os.path.isfile(self.subjZip.getSeriesMetaCSV()))
+
+    def test_archiveLoadAnonymised(self):
+        self.assertTrue(self.subjAnon.isAnonymised())
+        self.assertEqual(self.subjAnon.countNumberOfDicoms(), 3)
+        self.assertEqual(self.subjAnon.getMetaTagValue('PatientID'), '')
+        self.assertEqual(self.subjAnon.getName(), 'Name-Unknown')
+
     @classmethod
     def tearDownClass(cls, OVERRIDE=False):
         if (not DEBUG) or OVERRIDE:
@@ -226,7 +472,102 @@ class TestSubjects(unittest.TestCase):
     def tearDownClass(cls, OVERRIDE=False):
         if (not DEBUG) or OVERRIDE:
             shutil.rmtree(cls.tmpDir)
-        
+
+class TestSubjectCatalog(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpDir = os.path.join(this_dir, 'TestSubjectCatalog')
+        if os.path.isdir(cls.tmpDir):
+            cls.tearDownClass(True)
+        os.makedirs(cls.tmpDir)
+        cls.newSubj1 = mi_subject.createNew_OrAddTo_Subject(P1, cls.tmpDir, subjPrefix='MIC', QUIET=True)[0]
+        cls.newSubj2 = mi_subject.createNew_OrAddTo_Subject(P2, cls.tmpDir, subjPrefix='MIC', QUIET=True)[0]
+        cls.subjList = mi_subject.SubjectList.setByDirectory(cls.tmpDir)
+
+    def test_catalog(self):
+        self.assertEqual(len(self.subjList), 2, "Error making subject list")
+        catalog = mi_catalog.getCatalog(self.tmpDir)
+        self.assertTrue(os.path.isfile(catalog.catalogFile))
+        self.assertEqual(catalog.getSubjIDs('MIC'), ['MIC000001', 'MIC000002'])
+        self.assertEqual(catalog.getTags('MIC000002')['StudyDate'], "20111014")
+        self.assertEqual(catalog.refresh(), 0, "Unchanged Tags files should not be re-read")
+        self.newSubj1.setTagValue('PatientWeight', 81)
+        self.assertEqual(catalog.refresh(), 1, "Changed Tags file should be re-read")
+        self.assertEqual(catalog.getTags('MIC000001')['PatientWeight'], 81)
+
+    def test_catalogQueries(self):
+        self.assertEqual([i.subjID for i in self.subjList.findSubjMatchingPatientID('12345')], ['MIC000002'])
+        self.assertEqual(len(self.subjList.findSubjMatchingPatientID('NOT-A-PID')), 0)
+        self.assertEqual(self.subjList.findSubjMatchingStudyID(1).subjID, 'MIC000001')
+        self.assertIsNone(self.subjList.findSubjMatchingStudyID(999))
+        iSubj = self.subjList.findSubjMatchingStudyUID(self.newSubj2.getTagValue('StudyInstanceUID'))
+        self.assertEqual(iSubj.subjID, 'MIC000002')
+        self.assertEqual(len(self.subjList.filterSubjectListByDOS('20140409')), 1)
+        self.assertEqual(len(self.subjList.filterSubjectListByDOS('20110101', '20141231')), 2)
+        self.assertEqual(len(self.subjList.filterSubjectListByDOS('20120101', '20141231')), 1)
+
+    def test_dataFrame(self):
+        dfStudy = self.subjList.toDataFrame('study')
+        self.assertEqual(list(dfStudy['SubjectID']), ['MIC000001', 'MIC000002'])
+        self.assertEqual(list(dfStudy['StudyDate']), ['20140409', '20111014'])
+        self.assertEqual(list(dfStudy['TotalDicoms']), [iSubj.countNumberOfDicoms() for iSubj in self.subjList])
+        dfSeries = self.subjList.toDataFrame('series')
+        self.assertEqual(len(dfSeries), sum([len(iSubj.getMetaTagValue('Series')) for iSubj in self.subjList]))
+        catalog = mi_catalog.getCatalog(self.tmpDir)
+        self.assertTrue(os.path.isfile(catalog.getFrameFile('study', '.pkl')) or
+                        os.path.isfile(catalog.getFrameFile('study', '.parquet')))
+        self.newSubj2.setTagValue('StudyDescription', 'Changed')
+        dfStudy = mi_subject.SubjectList(self.subjList[::-1]).toDataFrame('study')
+        self.assertEqual(list(dfStudy['SubjectID']), ['MIC000002', 'MIC000001'])
+        self.assertEqual(dfStudy['StudyDescription'][0], 'Changed')
+        summaryCSV = os.path.join(self.tmpDir, 'summary.csv')
+        self.subjList.writeSummaryCSV(summaryCSV)
+        with open(summaryCSV, 'r') as fid:
+            self.assertEqual(len(fid.readlines()), 3)
+
+    def test_dateMatching(self):
+        self.assertEqual(self.subjList.filterSubjectListByDOS_closest('20140101')[0].subjID, 'MIC000001')
+        self.assertEqual(self.subjList.filterSubjectListByDOS_closest('20140101', A_less_than_B=True)[0].subjID, 'MIC000002')
+        res = self.subjList.matchPatientIDsAndDates(['12345', '12345', '12345', 'ANON', 'NOT-A-PID'],
+                                                    ['20111014', '20111016', None, '20140410', '20140409'],
+                                                    tolerance_days=1)
+        self.assertEqual(res, ['MIC000002', None, None, 'MIC000001', None])
+        res = self.subjList.matchPatientIDsAndDates(['12345'], ['20200101'], tolerance_days=None)
+        self.assertEqual(res, ['MIC000002'])
+
+    def test_lazyList(self):
+        subjList = mi_subject.SubjectList.setByDirectory(self.tmpDir, subjectPrefix='MIC')
+        self.assertTrue(all([isinstance(list.__getitem__(subjList, i), mi_subject.SubjectHandle) for i in range(2)]))
+        self.assertEqual(subjList.subjIDs, ['MIC000001', 'MIC000002'])
+        self.assertEqual(subjList.subjNs, [1, 2])
+        self.assertTrue(self.newSubj2 in subjList)
+        self.assertIsInstance(subjList[-1], mi_subject.AbstractSubject)
+        self.assertIsInstance(list.__getitem__(subjList, 0), mi_subject.SubjectHandle)
+        self.assertIsInstance(list.__getitem__(subjList, 1), mi_subject.AbstractSubject)
+        self.assertEqual([i.subjID for i in subjList], ['MIC000001', 'MIC000002'])
+        self.assertEqual(len(subjList[:1]), 1)
+
+    def test_studyUIDLookup(self):
+        iSubj = mi_subject.findSubjMatchingDicomStudyUID(P2, self.tmpDir, 'MIC')
+        self.assertEqual(iSubj.subjID, 'MIC000002')
+        self.assertIsNone(mi_subject.findSubjMatchingDicomStudyUID(P2, self.tmpDir, 'OTHER'))
+        catalog = mi_catalog.getCatalog(self.tmpDir)
+        studyUID = self.newSubj2.getTagValue('StudyInstanceUID')
+        tmpSubj = mi_subject.AbstractSubject(5, dataRoot=self.tmpDir, subjectPrefix='MIC')
+        tmpSubj.QUIET = True
+        tmpSubj.loadDicomsToSubject(P2, HIDE_PROGRESSBAR=True)
+        self.assertEqual(sorted(catalog.findSubjIDsMatchingStudyUID(studyUID)), ['MIC000002', 'MIC000005'])
+        tmpSubj.renameSubjID('MIC000006')
+        self.assertEqual(sorted(catalog.findSubjIDsMatchingStudyUID(studyUID)), ['MIC000002', 'MIC000006'])
+        shutil.rmtree(tmpSubj.getTopDir())
+        self.assertEqual(catalog.findSubjIDsMatchingStudyUID(studyUID), ['MIC000002'])
+
+    @classmethod
+    def tearDownClass(cls, OVERRIDE=False):
+        if (not DEBUG) or OVERRIDE:
+            shutil.rmtree(cls.tmpDir)
+
+
 class TestSubjects2(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
@@ -250,13 +591,327 @@ class TestSubjects2(unittest.TestCase):
     def test_filterList(self):
         filtList = self.subjList.filterSubjectListByDOS('20111014')
         self.assertEqual(len(filtList), 1, "Error filtering subject list")
-        
+
+    def test_dataRootScan(self):
+        scan = mi_subject.scanDataRoot(self.tmpDir)
+        self.assertEqual(scan.prefixCounts['MIBB'], 4)
+        self.assertEqual(scan.prefixMaxN['MIBB'], 4)
+        self.assertEqual(mi_subject.guessSubjectPrefix(self.tmpDir, QUIET=True), 'MIBB')
+        self.assertEqual(mi_subject.getNextSubjN(self.tmpDir, 'MIBB'), 5)
+        self.assertTrue(mi_subject.doesSubjectExist(2, self.tmpDir, 'MIBB'))
+        self.assertFalse(mi_subject.doesSubjectExist(5, self.tmpDir, 'MIBB'))
+        self.assertIs(mi_subject.scanDataRoot(self.tmpDir), scan, "Listing should be reused")
+        os.makedirs(os.path.join(self.tmpDir, 'MIBB000007'))
+        self.assertEqual(mi_subject.getNextSubjN(self.tmpDir, 'MIBB'), 8)
+        os.rmdir(os.path.join(self.tmpDir, 'MIBB000007'))
+        self.assertEqual(mi_subject.getNextSubjN(self.tmpDir, 'MIBB'), 5)
 
     @classmethod
     def tearDownClass(cls, OVERRIDE=False):
         if (not DEBUG) or OVERRIDE:
             shutil.rmtree(cls.tmpDir)
-                
+
+class TestSubjectsParallel(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpDir = os.path.join(this_dir, 'TestSubjectsParallel')
+        if os.path.isdir(cls.tmpDir):
+            cls.tearDownClass(True)
+        os.makedirs(cls.tmpDir)
+        cls.subjList = mi_subject.createNew_OrAddTo_Subject(TEST_DIR, cls.tmpDir, subjPrefix='MIPP', QUIET=True, 
+                                                            LOAD_MULTI=True, workers=2)
+
+    def test_newSubjs(self):
+        self.assertEqual(sorted(os.listdir(self.tmpDir))[-4:], [f'MIPP00000{i}' for i in range(1,5)])
+        self.assertEqual(len(self.subjList), 5)
+        self.assertEqual(len(set(self.subjList.subjIDs)), 4)
+
+    def test_inputOrder(self):
+        dirsLoaded = [os.path.join(TEST_DIR, i) for i in os.listdir(TEST_DIR)]
+        dirsLoaded = [i for i in dirsLoaded if os.path.isdir(i)]
+        for iDir, iSubj in zip(dirsLoaded, self.subjList):
+            studyUID = mi_subject.spydcm.returnFirstDicomFound(iDir).get('StudyInstanceUID')
+            self.assertEqual(iSubj.getMetaTagValue('StudyInstanceUID'), studyUID)
+
+    def test_reserveSubjN(self):
+        n = mi_subject.reserveSubjN(self.tmpDir, 'MIPP')
+        self.assertEqual(n, 5)
+        self.assertEqual(mi_subject.reserveSubjN(self.tmpDir, 'MIPP'), 6)
+        for i in [5, 6]:
+            os.rmdir(os.path.join(self.tmpDir, f'MIPP00000{i}'))
+        mi_subject.clearDataRootScan(self.tmpDir)
+
+    @classmethod
+    def tearDownClass(cls, OVERRIDE=False):
+        if (not DEBUG) or OVERRIDE:
+            shutil.rmtree(cls.tmpDir)
+
+class TestLoadBatch(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpDir = os.path.join(this_dir, 'TestLoadBatch')
+        if os.path.isdir(cls.tmpDir):
+            cls.tearDownClass(True)
+        os.makedirs(cls.tmpDir)
+        cls.manifest = os.path.join(cls.tmpDir, 'manifest.csv')
+        with open(cls.manifest, 'w') as fid:
+            fid.write("source,subjNumber,anonName\n")
+            fid.write(f"{P1},,\n{P2},5,HARD\n{P4},,\n{P4_extra},,\n{PTar},,\n")
+            fid.write("NOT_A_SOURCE,,\n")
+        cls.report = mi_batch.loadBatch(cls.manifest, dataRoot=cls.tmpDir, subjPrefix='MIB', 
+                                                 SubjClass=mi_subject.AbstractSubject, workers=2, QUIET=True)
+
+    def test_results(self):
+        results = self.report.results
+        self.assertEqual(len(results), 6)
+        self.assertEqual(results[1], [5])
+        self.assertEqual(results[2], results[3], msg="Same study should load to same subject")
+        self.assertIsInstance(results[5], str)
+        self.assertEqual(len(self.report.errors), 1)
+        self.assertEqual(self.report.nStudies, 4)
+        self.assertEqual(mi_subject.AbstractSubject(5, self.tmpDir, 'MIB').getTagValue('ANONYMISED', False), True)
+        self.assertEqual(mi_subject.AbstractSubject(results[2][0], self.tmpDir, 'MIB').countNumberOfDicoms(), 3)
+        self.assertEqual(len([i for i in os.listdir(self.tmpDir) if i.startswith('MIB')]), 4, 
+                         msg="Expected 4 subjects (unused reservations released)")
+
+    def test_report(self):
+        summary = self.report.getSummaryDict()
+        self.assertEqual(summary['files'], 8)
+        self.assertGreater(summary['files_per_s'], 0)
+        self.assertEqual(list(summary['stage_s'].keys()), mi_utils.LOAD_STAGES)
+        self.assertGreater(summary['stage_s']['write'], 0)
+        self.assertIn('studies/s', str(self.report))
+
+    @classmethod
+    def tearDownClass(cls, OVERRIDE=False):
+        if (not DEBUG) or OVERRIDE:
+            shutil.rmtree(cls.tmpDir)
+
+class TestSyntheticCohort(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpDir = os.path.join(this_dir, 'TestSyntheticCohort')
+        if os.path.isdir(cls.tmpDir):
+            cls.tearDownClass(True)
+        cls.cohortDir = os.path.join(cls.tmpDir, 'COHORT')
+        cls.dataRoot = os.path.join(cls.tmpDir, 'DATAROOT')
+        os.makedirs(cls.dataRoot)
+        cls.studyDirs = synthetic_dicom.buildSyntheticCohort(cls.cohortDir, nSubjects=3, nSeries=2, nInstances=4, matrixSize=16)
+
+    def test_cohort(self):
+        self.assertEqual(len(self.studyDirs), 3)
+        self.assertEqual(mi_utils.countFilesInDir(self.cohortDir), 24)
+        subjList = mi_subject.createNew_OrAddTo_Subject(self.cohortDir, dataRoot=self.dataRoot, subjPrefix='SYN', 
+                                                        SubjClass=mi_subject.AbstractSubject, LOAD_MULTI=True, QUIET=True)
+        self.assertEqual(len(subjList), 3)
+        self.assertEqual(len(set([i.getTagValue('StudyInstanceUID') for i in subjList])), 3)
+        for iSubj in subjList:
+            self.assertEqual(iSubj.countNumberOfDicoms(), 8)
+            self.assertEqual(sorted(iSubj.getListOfSeNums()), [1, 2])
+        # Reproducible
+        dsA = synthetic_dicom.buildSyntheticSeries(1, 0, 2, 16)
+        dsB = synthetic_dicom.buildSyntheticSeries(1, 0, 2, 16)
+        self.assertEqual(dsA[1].SOPInstanceUID, dsB[1].SOPInstanceUID)
+        self.assertEqual(dsA[1].PixelData, dsB[1].PixelData)
+
+    @classmethod
+    def tearDownClass(cls, OVERRIDE=False):
+        if (not DEBUG) or OVERRIDE:
+            shutil.rmtree(cls.tmpDir)
+
+class TestDirectoryFingerprinter(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpDir = os.path.join(this_dir, 'TestDirectoryFingerprinter')
+        if os.path.isdir(cls.tmpDir):
+            cls.tearDownClass(True)
+        for iDir in ['A/B/C', 'D/E']:
+            os.makedirs(os.path.join(cls.tmpDir, iDir))
+        for k in range(3):
+            with open(os.path.join(cls.tmpDir, 'A', 'B', 'C', f'IM{k}.dcm'), 'w') as fid:
+                fid.write('x'*10)
+        time.sleep(0.05)
+
+    def test_incremental(self):
+        fingerprinter = mi_utils.DirectoryFingerprinter(racyWindow=0)
+        fp1 = fingerprinter.fingerprint(self.tmpDir)
+        self.assertEqual(fp1[1:], (6, 3, 30))
+        self.assertEqual(fingerprinter.nScanned, 6)
+        self.assertEqual(fingerprinter.fingerprint(self.tmpDir), fp1)
+        self.assertEqual(fingerprinter.nScanned, 0)
+        # Deep change - only that directory is scanned again
+        with open(os.path.join(self.tmpDir, 'A', 'B', 'C', 'IM3.dcm'), 'w') as fid:
+            fid.write('x'*5)
+        fp2 = fingerprinter.fingerprint(self.tmpDir)
+        self.assertEqual(fp2[1:], (6, 4, 35))
+        self.assertGreaterEqual(fp2[0], fp1[0])
+        self.assertEqual(fingerprinter.nScanned, 1)
+        time.sleep(0.05)
+        shutil.rmtree(os.path.join(self.tmpDir, 'D', 'E'))
+        self.assertEqual(fingerprinter.fingerprint(self.tmpDir)[1:], (5, 4, 35))
+        self.assertEqual(fingerprinter.nScanned, 1)
+        self.assertEqual(fingerprinter.fingerprint(os.path.join(self.tmpDir, 'NONE')), None)
+        self.assertEqual(miresearch_watchdog.get_directory_modified_time(self.tmpDir), 
+                         mi_utils.DirectoryFingerprinter().getModifiedTime(self.tmpDir))
+
+    @classmethod
+    def tearDownClass(cls, OVERRIDE=False):
+        if (not DEBUG) or OVERRIDE:
+            shutil.rmtree(cls.tmpDir)
+
+class TestWatchDogArrivals(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpDir = os.path.join(this_dir, 'TestWatchDogArrivals')
+        if os.path.isdir(cls.tmpDir):
+            cls.tearDownClass(True)
+        cls.watchDir = os.path.join(cls.tmpDir, 'WATCH')
+        os.makedirs(os.path.join(cls.watchDir, 'MIResearch-PROCESSING'))
+        cls.handler = miresearch_watchdog.MIResearch_SubdirectoryHandler(cls.watchDir, os.path.join(cls.tmpDir, 'DATA'), 
+                                                                          'WD', logging.getLogger('TestWatchDogArrivals'))
+        cls.handler.pollStable = 0.5
+
+    def test_eventStability(self):
+        arrival = os.path.join(self.watchDir, 'ARRIVAL')
+        os.makedirs(os.path.join(arrival, 'SE1'))
+        self.handler.on_created(watchdog_events.DirCreatedEvent(arrival))
+        self.assertIn(arrival, self.handler.arrivals)
+        self.assertFalse(self.handler.is_stable(arrival))
+        # Nested activity extends arrival - not a new arrival
+        time.sleep(0.3)
+        self.handler.on_created(watchdog_events.FileCreatedEvent(os.path.join(arrival, 'SE1', 'IM1.dcm')))
+        time.sleep(0.3)
+        self.assertEqual(list(self.handler.arrivals.keys()), [arrival])
+        self.assertEqual(self.handler.getStableArrivals(), [])
+        time.sleep(0.3)
+        self.assertEqual(self.handler.getStableArrivals(), [arrival])
+        self.assertEqual(self.handler.arrivals, {})
+        # Ignored: processing directory and non archive files
+        self.handler.on_created(watchdog_events.DirCreatedEvent(os.path.join(self.watchDir, 'MIResearch-PROCESSING', 'X')))
+        with open(os.path.join(self.watchDir, 'notes.txt'), 'w') as fid:
+            fid.write('x')
+        self.handler.on_created(watchdog_events.FileCreatedEvent(os.path.join(self.watchDir, 'notes.txt')))
+        self.assertEqual(self.handler.arrivals, {})
+
+    def test_changeWithoutEvent(self):
+        arrival = os.path.join(self.watchDir, 'ARRIVAL_NOEVENT')
+        os.makedirs(os.path.join(arrival, 'SE1'))
+        self.handler.on_created(watchdog_events.DirCreatedEvent(arrival))
+        self.assertEqual(self.handler.getStableArrivals(), [])
+        time.sleep(0.6)
+        with open(os.path.join(arrival, 'SE1', 'IM1.dcm'), 'w') as fid: # No event sent to handler
+            fid.write('x')
+        self.assertEqual(self.handler.getStableArrivals(), [])
+        time.sleep(0.6)
+        self.assertEqual(self.handler.getStableArrivals(), [arrival])
+
+    def test_workerPool(self):
+        handler = miresearch_watchdog.MIResearch_SubdirectoryHandler(self.watchDir, os.path.join(self.tmpDir, 'DATA'), 
+                                                                     'WD', logging.getLogger('TestWatchDogArrivals'))
+        active, maxActive, lock = set(), [0], threading.Lock()
+        def _loadArrivals(arrivalPaths):
+            with lock:
+                active.add(arrivalPaths[0])
+                maxActive[0] = max(maxActive[0], len(active))
+            time.sleep(0.3)
+            with lock:
+                active.discard(arrivalPaths[0])
+        handler._loadArrivals = _loadArrivals
+        handler.startWorkers(2)
+        for k, iDir in enumerate([P1, P2, P3]):
+            handler.studiesInFlight.add(k)
+            handler.jobQueue.put((k, [iDir]))
+        handler.stopWorkers()
+        self.assertEqual(maxActive[0], 2)
+        self.assertEqual(handler.studiesInFlight, set())
+        self.assertEqual(handler.jobQueue.qsize(), 0)
+
+    def test_coalesce(self):
+        handler = miresearch_watchdog.MIResearch_SubdirectoryHandler(self.watchDir, os.path.join(self.tmpDir, 'DATA'), 
+                                                                     'WD', logging.getLogger('TestWatchDogArrivals'))
+        handler.pollStable, handler.coalesceWindow = 0.5, 1
+        now = time.time()
+        def _setStable(arrivals):
+            for k, iPath in enumerate(arrivals):
+                handler.arrivals[iPath] = {'first': now-10+k, 'last': now-10+k}
+        # P4 and P4.zip are one study - one job
+        _setStable([P4, P3, PZip])
+        handler.queueStableArrivals(now)
+        self.assertEqual(handler.jobQueue.qsize(), 0) # Within coalescing window
+        handler.queueStableArrivals(now+2)
+        jobs = [handler.jobQueue.get() for _ in range(handler.jobQueue.qsize())]
+        self.assertEqual(sorted([i[1] for i in jobs]), [[P3], [P4, PZip]])
+        # Later part of study in flight - waits for that job to finish
+        _setStable([P4_extra])
+        handler.queueStableArrivals(now+10)
+        self.assertEqual(handler.jobQueue.qsize(), 0)
+        handler._loadArrivals = lambda arrivalPaths: None
+        for iJob in jobs:
+            handler._action(*iJob)
+        handler.queueStableArrivals(now+10)
+        self.assertEqual(handler.jobQueue.get()[1], [P4_extra])
+        self.assertEqual(handler.pendingStudies, {})
+
+    def test_mergedLoad(self):
+        watchDir = os.path.join(self.tmpDir, 'WATCH_MERGE')
+        dataRoot = os.path.join(self.tmpDir, 'DATA_MERGE')
+        handler = miresearch_watchdog.MIResearch_SubdirectoryHandler(watchDir, dataRoot, 'WDM', 
+                                                                     logging.getLogger('TestWatchDogArrivals'))
+        handler.processDir = os.path.join(watchDir, 'MIResearch-PROCESSING')
+        handler.errorDir = os.path.join(watchDir, 'MIResearch-ERROR')
+        for iDir in [handler.processDir, handler.errorDir, dataRoot]:
+            os.makedirs(iDir)
+        arrivals = [os.path.join(watchDir, 'P4.zip'), os.path.join(watchDir, 'P4_extra')]
+        shutil.copy(PZip, arrivals[0])
+        shutil.copytree(P4_extra, arrivals[1])
+        handler.execute_loadArrivals(arrivals)
+        subjIDs = [i for i in os.listdir(dataRoot) if i.startswith('WDM')]
+        self.assertEqual(len(subjIDs), 1)
+        self.assertEqual(mi_subject.AbstractSubject(subjIDs[0], dataRoot).countNumberOfDicoms(), 3)
+        self.assertEqual([i for i in os.listdir(watchDir) if not i.startswith('MIResearch-')], [])
+        self.assertEqual([i for i in os.listdir(handler.processDir) if not i.endswith('.log')], [])
+
+    def test_restartReconcile(self):
+        watchDir = os.path.join(self.tmpDir, 'WATCH_RESTART')
+        processDir = os.path.join(watchDir, 'MIResearch-PROCESSING')
+        dataRoot = os.path.join(self.tmpDir, 'DATA_RESTART')
+        for iDir in [processDir, os.path.join(watchDir, 'MIResearch-ERROR'), dataRoot]:
+            os.makedirs(iDir)
+        jobs = mi_watchjobs.WatchJobs(os.path.join(processDir, mi_watchjobs.JOBS_FILE))
+        # State left by an earlier watcher: one load part way, one stable (queued), one lost, one unseen arrival
+        leftover = os.path.join(processDir, 'a'*32+'_P1')
+        shutil.copytree(P1, leftover)
+        jobs.recordProcessing(os.path.join(watchDir, 'P1'), leftover)
+        stable = os.path.join(watchDir, 'P2')
+        shutil.copytree(P2, stable)
+        jobs.recordArrived(stable)
+        jobs.recordStable(stable)
+        lost = os.path.join(watchDir, 'LOST')
+        jobs.recordProcessing(lost, os.path.join(processDir, 'b'*32+'_LOST'))
+        unseen = os.path.join(watchDir, 'UNSEEN')
+        os.makedirs(unseen)
+        #
+        handler = miresearch_watchdog.MIResearch_SubdirectoryHandler(watchDir, dataRoot, 'WDR', 
+                                                                     logging.getLogger('TestWatchDogArrivals'))
+        handler.processDir = processDir
+        handler.errorDir = os.path.join(watchDir, 'MIResearch-ERROR')
+        handler.jobs = jobs
+        handler.resume_processing()
+        self.assertFalse(os.path.exists(leftover))
+        self.assertEqual(jobs.getState(leftover), mi_watchjobs.STATE_DONE)
+        self.assertEqual(len([i for i in os.listdir(dataRoot) if i.startswith('WDR')]), 1)
+        self.assertEqual(list(handler.jobQueue.queue), [stable])
+        self.assertEqual(jobs.getState(lost), mi_watchjobs.STATE_ERROR)
+        self.assertEqual(list(handler.arrivals.keys()), [unseen])
+        self.assertEqual(jobs.getState(unseen), mi_watchjobs.STATE_ARRIVED)
+        counts = jobs.getStateCounts()
+        self.assertEqual([counts[i] for i in mi_watchjobs.JOB_STATES], [1, 1, 0, 1, 1])
+
+    @classmethod
+    def tearDownClass(cls, OVERRIDE=False):
+        if (not DEBUG) or OVERRIDE:
+            shutil.rmtree(cls.tmpDir)
+
 class TestSubjects3(unittest.TestCase):
     @classmethod
     def setUpClass(cls):